@@ -0,0 +1,37 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from zaqarclient.common import options
+from zaqarclient.queues.v1 import codec
+from zaqarclient.tests import base
+
+
+class TestBuild(base.TestBase):
+
+    def test_false_values(self):
+        self.assertIsNone(options.build(codec.Codec, None))
+        self.assertIsNone(options.build(codec.Codec, False))
+        self.assertIsNone(options.build(codec.Codec, {}))
+
+    def test_instance(self):
+        instance = codec.Codec()
+        self.assertIs(options.build(codec.Codec, instance), instance)
+
+    def test_defaults(self):
+        self.assertEqual(options.build(codec.Codec, True).threshold, 4096)
+
+    def test_keyword_arguments(self):
+        built = options.build(codec.Codec, {'threshold': 1})
+        self.assertEqual(built.threshold, 1)
@@ -0,0 +1,98 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+
+from zaqarclient.queues import client
+from zaqarclient.queues.v1 import core
+from zaqarclient.tests import base
+from zaqarclient.transport import errors
+from zaqarclient.transport import memory
+
+
+class TestAcker(base.TestBase):
+
+    def setUp(self):
+        super(TestAcker, self).setUp()
+        self.addCleanup(memory.reset)
+        self.client = client.Client('memory://localhost', 1.1, self.conf)
+        self.queue = self.client.queue('fizbit')
+        self.queue.post([{'ttl': 60, 'body': n} for n in range(20)])
+        self.claim = self.queue.claim(ttl=60, grace=60, limit=20)
+
+        patcher = mock.patch.object(core, 'message_delete_many',
+                                    wraps=core.message_delete_many)
+        self.delete_many = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _total(self):
+        return self.queue.stats['messages']['total']
+
+    def test_flush_on_claim_end(self):
+        acks = self.claim.acks(size=100, interval=100)
+        for msg in self.claim:
+            acks.ack(msg)
+            self.assertEqual(self._total(), 20)
+
+        self.assertEqual(self._total(), 0)
+        self.assertEqual(self.delete_many.call_count, 1)
+
+    def test_chunks(self):
+        with self.claim.acks(size=100, interval=100, chunk=8) as acks:
+            for msg in self.claim:
+                acks.ack(msg)
+                if len(acks) == 20:
+                    break
+
+        self.assertEqual(self.delete_many.call_count, 3)
+        self.assertEqual(self._total(), 0)
+
+    def test_flush_on_size(self):
+        acks = self.claim.acks(size=5, interval=100)
+        msgs = list(self.claim)
+        for msg in msgs[:6]:
+            acks.ack(msg)
+
+        self.assertEqual(len(acks), 1)
+        self.assertEqual(self._total(), 15)
+
+    def test_flush_on_interval(self):
+        acks = self.claim.acks(size=100, interval=0)
+        acks.ack(next(iter(self.claim)))
+        self.assertEqual(len(acks), 0)
+        self.assertEqual(self._total(), 19)
+
+    def test_flush_on_release(self):
+        acks = self.claim.acks(size=100, interval=100)
+        for msg in list(self.claim)[:2]:
+            acks.ack(msg)
+
+        self.claim.delete()
+        self.assertEqual(self._total(), 18)
+        self.assertEqual(self.queue.stats['messages']['claimed'], 0)
+
+    def test_fallback(self):
+        self.delete_many.side_effect = errors.ForbiddenError
+        acks = self.claim.acks(size=100, interval=100)
+        with mock.patch.object(core, 'message_delete',
+                               wraps=core.message_delete) as delete:
+            for msg in self.claim:
+                acks.ack(msg)
+            self.assertEqual(delete.call_count, 20)
+            self.assertEqual(delete.call_args[0][-1], self.claim.id)
+
+        self.assertFalse(acks.bulk)
+        self.assertEqual(self.delete_many.call_count, 1)
+        self.assertEqual(self._total(), 0)
@@ -0,0 +1,98 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from zaqarclient.queues import client
+from zaqarclient.queues.v1 import autotune
+from zaqarclient.tests import base
+from zaqarclient.transport import memory
+
+
+class TestClaimTuner(base.TestBase):
+
+    def test_defaults_before_observations(self):
+        tuner = autotune.ClaimTuner()
+        self.assertEqual(tuner.params(),
+                         {'limit': 10, 'ttl': 60, 'grace': 60})
+        self.assertIsNone(tuner.metrics['utilization'])
+
+    def test_slow_claims_raise_limit(self):
+        tuner = autotune.ClaimTuner(max_limit=100, target=0.9)
+        tuner.observe_claim(0.5)
+        tuner.observe_message(0.1)
+
+        # 9 * 0.5 / 0.1
+        self.assertEqual(tuner.limit, 45)
+        self.assertAlmostEqual(tuner.utilization, 0.9)
+
+    def test_bounds(self):
+        tuner = autotune.ClaimTuner(max_limit=20, max_ttl=600)
+        tuner.observe_claim(1)
+        tuner.observe_message(0.01)
+        self.assertEqual(tuner.limit, 20)
+        self.assertEqual(tuner.ttl, 60)
+
+        tuner = autotune.ClaimTuner(max_limit=20, max_ttl=600)
+        tuner.observe_claim(1)
+        tuner.observe_message(100)
+        self.assertEqual(tuner.limit, 1)
+        self.assertEqual(tuner.ttl, 201)
+
+    def test_limit_fits_in_ttl(self):
+        tuner = autotune.ClaimTuner(max_limit=100, max_ttl=101,
+                                    safety=2)
+        tuner.observe_claim(10)
+        tuner.observe_message(10)
+
+        # 9 messages would be wanted, but handling more
+        # than 4 wouldn't fit in 101 seconds.
+        self.assertEqual(tuner.limit, 4)
+        self.assertEqual(tuner.ttl, 90)
+
+    def test_moving_averages(self):
+        tuner = autotune.ClaimTuner(weight=0.5)
+        tuner.observe_message(1)
+        tuner.observe_message(3)
+        self.assertEqual(tuner.handle_time, 2)
+        self.assertEqual(tuner.metrics['messages'], 2)
+
+
+class TestTunedClaims(base.TestBase):
+
+    def setUp(self):
+        super(TestTunedClaims, self).setUp()
+        self.addCleanup(memory.reset)
+        conf = dict(self.conf, claim_tuning={'max_limit': 3})
+        self.client = client.Client('memory://localhost', 1.1, conf)
+        self.queue = self.client.queue('fizbit')
+        self.queue.post([{'ttl': 60, 'body': n} for n in range(5)])
+
+    def test_tuned_parameters(self):
+        claim = self.queue.claim()
+        self.assertEqual(claim.ttl, 60)
+        self.assertEqual(len(list(claim)), 3)
+
+        metrics = self.queue.tuner.metrics
+        self.assertEqual(metrics['claims'], 1)
+        self.assertEqual(metrics['messages'], 3)
+        self.assertIsNotNone(metrics['utilization'])
+
+    def test_given_parameters_win(self):
+        claim = self.queue.claim(ttl=120, limit=5)
+        self.assertEqual(claim.ttl, 120)
+        self.assertEqual(len(list(claim)), 5)
+
+    def test_shared_by_queue(self):
+        self.assertIs(self.queue.tuner,
+                      self.client.queue('fizbit').tuner)
@@ -0,0 +1,106 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+
+from zaqarclient.queues import client
+from zaqarclient.queues.v1 import backoff
+from zaqarclient.tests import base
+from zaqarclient.transport import memory
+
+
+class TestBackoff(base.TestBase):
+
+    def test_delay_grows_within_bounds(self):
+        state = backoff.Backoff(base=1, cap=10)
+        delays = []
+        for n in range(20):
+            state.empty()
+            delays.append(state.delay)
+
+        self.assertTrue(all(1 <= d <= 10 for d in delays))
+        self.assertEqual(max(delays), 10)
+
+    def test_success_resets(self):
+        state = backoff.Backoff(base=1, cap=10)
+        state.empty()
+        self.assertTrue(state.remaining() > 0)
+
+        state.success()
+        self.assertEqual(state.delay, 0)
+        self.assertEqual(state.remaining(), 0)
+
+    def test_wait(self):
+        state = backoff.Backoff(base=5, cap=5)
+        with mock.patch('time.sleep') as sleep:
+            state.wait()
+            self.assertFalse(sleep.called)
+
+            state.empty()
+            state.wait(timeout=1)
+            sleep.assert_called_once_with(1)
+
+
+class TestPollingBackoff(base.TestBase):
+
+    def setUp(self):
+        super(TestPollingBackoff, self).setUp()
+        self.addCleanup(memory.reset)
+        conf = dict(self.conf, polling_backoff={'base': 5, 'cap': 5})
+        self.client = client.Client('memory://localhost', 1.1, conf)
+        self.queue = self.client.queue('fizbit')
+
+        patcher = mock.patch('time.sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_shared_by_queue(self):
+        other = self.client.queue('fizbit')
+        self.assertIs(self.queue.backoff, other.backoff)
+        self.assertIsNot(self.queue.backoff,
+                         self.client.queue('fizbat').backoff)
+
+    def test_empty_claims_back_off(self):
+        self.assertEqual(list(self.queue.claim(ttl=60, grace=60)), [])
+        self.assertFalse(self.sleep.called)
+
+        self.queue.claim(ttl=60, grace=60)
+        self.assertEqual(self.sleep.call_count, 1)
+        self.assertTrue(0 < self.sleep.call_args[0][0] <= 5)
+
+    def test_messages_reset(self):
+        self.queue.pop()
+        self.assertEqual(self.queue.backoff.delay, 5)
+
+        self.queue.post({'ttl': 60, 'body': 1})
+        self.assertEqual(len(list(self.queue.pop())), 1)
+        self.assertEqual(self.queue.backoff.delay, 0)
+
+        self.queue.claim(ttl=60, grace=60)
+        self.assertEqual(self.sleep.call_count, 1)
+
+    def test_deadline_caps_wait(self):
+        self.queue.pop()
+        with self.client.deadline(timeout=1):
+            self.queue.pop()
+        self.assertTrue(self.sleep.call_args[0][0] <= 1)
+
+    def test_disabled(self):
+        self.client.conf['polling_backoff'] = None
+        queue = self.client.queue('fizbat')
+        self.assertIsNone(queue.backoff)
+        queue.pop()
+        queue.pop()
+        self.assertFalse(self.sleep.called)
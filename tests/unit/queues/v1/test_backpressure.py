@@ -0,0 +1,106 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+
+from zaqarclient import errors
+from zaqarclient.queues import client
+from zaqarclient.queues.v1 import backpressure
+from zaqarclient.queues.v1 import core
+from zaqarclient.tests import base
+from zaqarclient.transport import memory
+
+
+class TestBackpressure(base.TestBase):
+
+    def setUp(self):
+        super(TestBackpressure, self).setUp()
+        self.addCleanup(memory.reset)
+        self.client = client.Client('memory://localhost', 1.1, self.conf)
+
+        patcher = mock.patch('time.sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _queue(self, **kwargs):
+        self.client.queue('fizbit').post([{'ttl': 60, 'body': n}
+                                          for n in range(3)])
+        return self.client.queue(
+            'fizbit', backpressure=backpressure.Backpressure(**kwargs))
+
+    def test_thresholds(self):
+        policy = backpressure.Backpressure(max_free=2, max_claimed=2,
+                                           max_age=60)
+        self.assertFalse(policy.overloaded({}))
+        self.assertFalse(policy.overloaded({'free': 2, 'claimed': 2,
+                                            'oldest': {'age': 60}}))
+        self.assertTrue(policy.overloaded({'free': 3}))
+        self.assertTrue(policy.overloaded({'claimed': 3}))
+        self.assertTrue(policy.overloaded({'oldest': {'age': 61}}))
+        self.assertRaises(ValueError, backpressure.Backpressure,
+                          policy='drop')
+
+    def test_shed(self):
+        queue = self._queue(max_free=2, policy=backpressure.SHED,
+                            interval=0)
+        self.assertRaises(errors.BacklogExceeded, queue.post,
+                          {'ttl': 60, 'body': 3})
+        self.assertRaises(errors.BacklogExceeded, queue.post_raw,
+                          '3', ttl=60)
+        self.assertEqual(queue.stats['messages']['total'], 3)
+        self.assertEqual(queue.backpressure.throttled, 2)
+
+    def test_stats_are_cached(self):
+        queue = self._queue(max_free=100, interval=60)
+        with mock.patch.object(core, 'queue_get_stats',
+                               wraps=core.queue_get_stats) as stats:
+            for n in range(5):
+                queue.post({'ttl': 60, 'body': n})
+        self.assertEqual(stats.call_count, 1)
+
+    def test_slow(self):
+        queue = self._queue(max_free=2, policy=backpressure.SLOW,
+                            delay=0.5, interval=0)
+        queue.post({'ttl': 60, 'body': 3})
+        self.sleep.assert_called_once_with(0.5)
+        self.assertEqual(queue.stats['messages']['total'], 4)
+
+    def test_block_until_drained(self):
+        queue = self._queue(max_free=2, interval=1)
+        with mock.patch.object(queue.backpressure, '_fetch',
+                               side_effect=[{'free': 3}, {'free': 2}]):
+            queue.post({'ttl': 60, 'body': 3})
+
+        self.assertEqual(self.sleep.call_count, 1)
+        self.assertEqual(queue.stats['messages']['total'], 4)
+
+    def test_block_timeout(self):
+        queue = self._queue(max_free=2, interval=10, timeout=1)
+        self.assertRaises(errors.BacklogExceeded, queue.post,
+                          {'ttl': 60, 'body': 3})
+        self.assertFalse(self.sleep.called)
+
+    def test_missing_queue(self):
+        queue = self.client.queue('fizbat', backpressure=(
+            backpressure.Backpressure(max_free=0, policy=backpressure.SHED)))
+        queue.post({'ttl': 60, 'body': 1})
+        self.assertEqual(queue.stats['messages']['total'], 1)
+
+    def test_client_option(self):
+        conf = dict(self.conf, backpressure={'max_free': 1})
+        cli = client.Client('memory://localhost', 1.1, conf)
+        queue = cli.queue('fizbit')
+        self.assertIs(queue.backpressure, cli.backpressure)
+        self.assertEqual(queue.backpressure.max_free, 1)
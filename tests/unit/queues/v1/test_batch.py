@@ -0,0 +1,107 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+from zaqarclient.queues import client
+from zaqarclient.queues.v1 import claim
+from zaqarclient.tests import base
+from zaqarclient.transport import errors
+from zaqarclient.transport import memory
+
+
+class TestBatch(base.TestBase):
+
+    def setUp(self):
+        super(TestBatch, self).setUp()
+        self.addCleanup(memory.reset)
+        self.client = client.Client('memory://localhost', 1, self.conf)
+
+    def test_operations(self):
+        names = ['queue%d' % n for n in range(20)]
+        with self.client.batch(concurrency=5) as b:
+            for name in names:
+                b.queue(name).metadata({'name': name})
+            stats = b.queue(names[0], auto_create=False).stats
+
+        self.assertEqual(len(b.results), 41)
+        self.assertEqual(b.errors, [None] * 41)
+        self.assertEqual(b.results[1], {'name': 'queue0'})
+        self.assertEqual(b.results[39], {'name': 'queue19'})
+        self.assertEqual(stats.result()['messages']['total'], 0)
+
+        for name in names:
+            self.assertTrue(self.client.queue(name,
+                                              auto_create=False).exists())
+
+    def test_errors(self):
+        queue = self.client.queue('fizbit')
+        with self.client.batch() as b:
+            deferred = b.queue('fizbit', auto_create=False)
+            deferred.post({'ttl': 60, 'body': 1})
+            deferred.message('0' * 24)
+            deferred.post({'ttl': 60, 'body': 2})
+
+        self.assertIsNone(b.errors[0])
+        self.assertIsInstance(b.errors[1], errors.ResourceNotFound)
+        self.assertIsNone(b.results[1])
+        self.assertIsNone(b.errors[2])
+        self.assertEqual(queue.stats['messages']['total'], 2)
+
+    def test_concurrency(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def work(n):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return n
+
+        with self.client.batch(concurrency=3) as b:
+            for n in range(12):
+                b.add(work, n)
+
+        self.assertEqual(b.results, list(range(12)))
+        self.assertEqual(running[1], 3)
+
+    def test_nothing_runs_on_error(self):
+        def run():
+            with self.client.batch() as b:
+                b.queue('fizbit')
+                raise RuntimeError()
+
+        self.assertRaises(RuntimeError, run)
+        self.assertFalse(self.client.queue('fizbit',
+                                           auto_create=False).exists())
+
+    def test_claims(self):
+        queue = self.client.queue('fizbit')
+        queue.post([{'ttl': 60, 'body': n} for n in range(4)])
+
+        with self.client.batch() as b:
+            future = b.claim(queue, ttl=60, grace=60, limit=2)
+        new_claim = future.result()
+        self.assertIsInstance(new_claim, claim.Claim)
+
+        with self.client.batch() as b:
+            b.claim(queue, id=new_claim.id).delete()
+            b.claim(queue, id='0' * 24).delete()
+        self.assertEqual(b.errors, [None, None])
+        self.assertEqual(queue.stats['messages']['claimed'], 0)
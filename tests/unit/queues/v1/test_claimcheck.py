@@ -0,0 +1,114 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+
+import fixtures
+import mock
+
+from zaqarclient import errors
+from zaqarclient.queues import client
+from zaqarclient.queues.v1 import claimcheck
+from zaqarclient.tests import base
+from zaqarclient.transport import memory
+
+BIG = {'payload': 'x' * 2048}
+
+
+class TestFileBlobStore(base.TestBase):
+
+    def setUp(self):
+        super(TestFileBlobStore, self).setUp()
+        self.path = self.useFixture(fixtures.TempDir()).path
+        self.store = claimcheck.FileBlobStore(self.path)
+
+    def test_round_trip(self):
+        self.store.put_object('blobs', 'one', b'data')
+        self.assertEqual(self.store.get_object('blobs', 'one'), ({}, b'data'))
+        self.assertEqual(os.listdir(os.path.join(self.path, 'blobs')),
+                         ['one'])
+
+        self.store.delete_object('blobs', 'one')
+        self.store.delete_object('blobs', 'one')
+        self.assertRaises(errors.BlobNotFound,
+                          self.store.get_object, 'blobs', 'one')
+
+    def test_invalid_names(self):
+        for name in ('', '..', 'a/b'):
+            self.assertRaises(ValueError, self.store.put_object,
+                              'blobs', name, b'data')
+
+
+class TestClaimCheck(base.TestBase):
+
+    def setUp(self):
+        super(TestClaimCheck, self).setUp()
+        self.addCleanup(memory.reset)
+
+        path = self.useFixture(fixtures.TempDir()).path
+        self.store = claimcheck.FileBlobStore(path)
+        self.check = claimcheck.ClaimCheck(self.store, threshold=1024,
+                                           cache_size=2, gc=True)
+
+        conf = dict(self.conf, claim_check=self.check)
+        self.client = client.Client('memory://localhost', 1.1, conf)
+        self.queue = self.client.queue('fizbit')
+
+    def _stored(self):
+        store = memory.get_store('memory://localhost')
+        return [m.body for m in store.queues['fizbit'].messages.values()]
+
+    def test_post_and_read(self):
+        self.queue.post([{'ttl': 60, 'body': BIG},
+                         {'ttl': 60, 'body': 'small'}])
+        self.queue.post_raw([json.dumps(BIG)], ttl=60)
+
+        stored = self._stored()
+        self.assertTrue(claimcheck.is_reference(stored[0]))
+        self.assertEqual(stored[1], 'small')
+        self.assertTrue(claimcheck.is_reference(stored[2]))
+
+        msgs = list(self.queue.messages(echo=True))
+        self.assertEqual([m.body for m in msgs], [BIG, 'small', BIG])
+
+    def test_fetch_is_lazy_and_cached(self):
+        self.queue.post({'ttl': 60, 'body': BIG})
+
+        with mock.patch.object(self.store, 'get_object',
+                               wraps=self.store.get_object) as get_object:
+            msg = list(self.queue.messages(echo=True))[0]
+            self.assertFalse(get_object.called)
+
+            self.assertEqual(msg.body, BIG)
+            msg = list(self.queue.messages(echo=True))[0]
+            self.assertEqual(msg.body, BIG)
+            self.assertEqual(get_object.call_count, 1)
+
+    def test_delete_collects_blob(self):
+        self.queue.post({'ttl': 60, 'body': BIG})
+        ref = self._stored()[0][claimcheck.TAG]
+
+        msg = list(self.queue.claim(ttl=60, grace=60))[0]
+        msg.delete()
+        self.assertRaises(errors.BlobNotFound,
+                          self.store.get_object, ref['c'], ref['o'])
+
+    def test_queue_without_claim_check(self):
+        self.queue.post({'ttl': 60, 'body': BIG})
+
+        plain = self.client.queue('fizbit', claim_check=False)
+        msg = list(plain.messages(echo=True))[0]
+        self.assertTrue(claimcheck.is_reference(msg.body))
@@ -13,6 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
+import time
+
 import mock
 
 import ddt
@@ -20,6 +23,9 @@ import ddt
 from zaqarclient.queues import client
 from zaqarclient.queues.v1 import core
 from zaqarclient.tests import base
+from zaqarclient import transport
+from zaqarclient.transport import errors
+from zaqarclient.transport import memory
 from zaqarclient.transport import response
 
 VERSIONS = [1, 1.1]
@@ -42,3 +48,89 @@ class TestClient(base.TestBase):
             resp = response.Response(None, None)
             core_health.return_value = resp
             self.assertIsNotNone(cli.health())
+
+    @ddt.data(*VERSIONS)
+    def test_transport_is_cached(self, version):
+        cli = client.Client('http://example.com',
+                            version, {})
+        req, trans = cli._request_and_transport()
+        self.assertIs(trans, cli._request_and_transport()[1])
+
+    @ddt.data(*VERSIONS)
+    def test_transport_is_built_once(self, version):
+        cli = client.Client('http://example.com',
+                            version, {})
+        get_transport_for = transport.get_transport_for
+
+        def slow_get_transport_for(*args, **kwargs):
+            time.sleep(0.05)
+            return get_transport_for(*args, **kwargs)
+
+        built = []
+        with mock.patch.object(transport, 'get_transport_for',
+                               side_effect=slow_get_transport_for) as get:
+            threads = [threading.Thread(
+                target=lambda: built.append(cli._request_and_transport()[1]))
+                for n in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(len(set(map(id, built))), 1)
+
+    @ddt.data(*VERSIONS)
+    def test_deadline(self, version):
+        cli = client.Client('http://example.com',
+                            version, {})
+        self.assertIsNone(cli.get_deadline())
+
+        with cli.deadline(10) as outer:
+            req, trans = cli._request_and_transport()
+            self.assertEqual(req.deadline, outer)
+
+            # Nested deadlines can't extend
+            # the current one.
+            with cli.deadline(60) as inner:
+                self.assertEqual(inner, outer)
+
+            with cli.deadline(1) as inner:
+                self.assertTrue(inner < outer)
+            self.assertEqual(cli.get_deadline(), outer)
+
+        self.assertIsNone(cli.get_deadline())
+        req, trans = cli._request_and_transport()
+        self.assertIsNone(req.deadline)
+
+    @ddt.data(*VERSIONS)
+    def test_deadline_exceeded(self, version):
+        cli = client.Client('http://example.com',
+                            version, {})
+        with cli.deadline(at=time.time() - 1):
+            self.assertRaises(errors.DeadlineExceeded,
+                              cli._request_and_transport)
+
+    @ddt.data(*VERSIONS)
+    def test_iterator_keeps_deadline(self, version):
+        self.addCleanup(memory.reset)
+        cli = client.Client('memory://localhost', version, {})
+        queue = cli.queue('fizbit')
+        queue.post([{'ttl': 60, 'body': n} for n in range(15)])
+
+        with cli.deadline(0.2):
+            msgs = queue.messages(echo=True).stream()
+
+        # The first page is already there, the next
+        # one must fail.
+        time.sleep(0.3)
+        self.assertEqual(len([next(msgs) for n in range(10)]), 10)
+        self.assertRaises(errors.DeadlineExceeded, next, msgs)
+
+    @ddt.data(*VERSIONS)
+    def test_transports_share_executor(self, version):
+        cli = client.Client('http://example.com',
+                            version, {'async_workers': 2})
+        req, trans = cli._request_and_transport()
+        self.assertIs(trans.get_executor(), cli.executor)
+        self.assertEqual(cli.executor._max_workers, 2)
@@ -0,0 +1,118 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import json
+import zlib
+
+from zaqarclient import errors
+from zaqarclient.queues import client
+from zaqarclient.queues.v1 import codec
+from zaqarclient.tests import base
+from zaqarclient.transport import memory
+
+BIG = {'items': [{'name': 'item', 'tags': ['a', 'b']}] * 500}
+
+
+class TestCodec(base.TestBase):
+
+    def test_small_bodies_are_untouched(self):
+        body = {'event': 'ActivateAccount'}
+        self.assertIs(codec.Codec().encode(body), body)
+        self.assertEqual(codec.Codec().encode_raw('"a"'), '"a"')
+
+    def test_round_trip(self):
+        envelope = codec.Codec(threshold=100).encode(BIG)
+        self.assertTrue(codec.is_envelope(envelope))
+        self.assertEqual(envelope['_zc'], 'zlib')
+        self.assertTrue(len(envelope['d']) < len(json.dumps(BIG)) / 10)
+        self.assertEqual(codec.decode(envelope), BIG)
+
+    def test_raw_round_trip(self):
+        raw = codec.Codec(threshold=100).encode_raw(json.dumps(BIG))
+        self.assertEqual(codec.decode(json.loads(raw)), BIG)
+
+    def test_decode_plain_bodies(self):
+        for body in (None, 'd', {'_zc': 'zlib'},
+                     {'_zc': 'nope', 'd': ''}, BIG):
+            self.assertEqual(codec.decode(body), body)
+
+    def test_decode_size_limit(self):
+        envelope = codec.Codec(threshold=100).encode('a' * 100000)
+        self.assertEqual(len(codec.decode(envelope, 100002)), 100000)
+        self.assertRaises(errors.BodyTooLarge,
+                          codec.decode, envelope, 100001)
+
+    def test_decode_bomb(self):
+        bomb = zlib.compress(b'0' * (codec.MAX_SIZE + 1), 9)
+        envelope = {'_zc': 'zlib',
+                    'd': base64.b64encode(bomb).decode('ascii')}
+        self.assertRaises(errors.BodyTooLarge, codec.decode, envelope)
+
+    def test_zstd_size_limit(self):
+        if 'zstd' not in codec._ALGORITHMS:
+            self.skipTest('zstandard is not installed')
+
+        envelope = codec.Codec('zstd', threshold=100).encode('a' * 100000)
+        self.assertEqual(codec.decode(envelope), 'a' * 100000)
+        self.assertRaises(errors.BodyTooLarge,
+                          codec.decode, envelope, 100001)
+
+    def test_unsupported_algorithm(self):
+        self.assertRaises(errors.UnsupportedCodec, codec.Codec, 'lzma')
+
+
+class TestQueueCodec(base.TestBase):
+
+    def setUp(self):
+        super(TestQueueCodec, self).setUp()
+        self.addCleanup(memory.reset)
+        conf = dict(self.conf, body_codec={'threshold': 1024})
+        self.client = client.Client('memory://localhost', 1.1, conf)
+
+    def test_body_max_size_option(self):
+        self.client.queue('fizbit').post({'ttl': 60, 'body': BIG})
+
+        conf = dict(self.conf, body_max_size=1024)
+        other = client.Client('memory://localhost', 1.1, conf)
+        msg = list(other.queue('fizbit').messages(echo=True))[0]
+        self.assertRaises(errors.BodyTooLarge, getattr, msg, 'body')
+
+    def test_post_and_read(self):
+        queue = self.client.queue('fizbit')
+        queue.post([{'ttl': 60, 'body': BIG},
+                    {'ttl': 60, 'body': 'small'}])
+        queue.post_raw([json.dumps(BIG)], ttl=60)
+
+        msgs = list(queue.messages(echo=True))
+        self.assertEqual([m.body for m in msgs], [BIG, 'small', BIG])
+
+        # Consumers not using the codec still get
+        # plain small bodies.
+        plain = client.Client('memory://localhost', 1.1, self.conf)
+        bodies = [m._body for m in plain.queue('fizbit').messages(echo=True)]
+        self.assertEqual(bodies[1], 'small')
+
+        # Forwarding keeps the body compressed.
+        self.assertTrue(codec.is_envelope(json.loads(msgs[0].raw_body)))
+
+    def test_per_queue_override(self):
+        queue = self.client.queue('fizbit', codec=False)
+        self.assertIsNone(queue.codec)
+        queue.post({'ttl': 60, 'body': BIG})
+
+        store = memory.get_store('memory://localhost')
+        stored = list(store.queues['fizbit'].messages.values())[0]
+        self.assertEqual(stored.body, BIG)
@@ -0,0 +1,163 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent import futures
+import threading
+import time
+
+import mock
+
+from zaqarclient.queues import client
+from zaqarclient.queues.v1 import backoff
+from zaqarclient.queues.v1 import consumer
+from zaqarclient.tests import base
+from zaqarclient.transport import memory
+
+
+class _InlineExecutor(object):
+    """Runs submitted calls right away, making hand outs deterministic"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = futures.Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+class TestMultiQueueConsumer(base.TestBase):
+
+    def setUp(self):
+        super(TestMultiQueueConsumer, self).setUp()
+        self.addCleanup(memory.reset)
+        self.client = client.Client('memory://localhost', 1.1, self.conf)
+        self.high = self.client.queue('jobs-high')
+        self.low = self.client.queue('jobs-low')
+
+    def _fill(self, *queues):
+        for queue in queues:
+            queue.post([{'ttl': 60, 'body': n} for n in range(10)])
+
+    def _consume(self, multi, claims):
+        names = []
+        for n in range(claims):
+            claim = multi.claim()
+            names.append(claim._queue.name)
+            for msg in claim:
+                msg.delete()
+        return names
+
+    def _inline(self):
+        self.client._lazy_executor = _InlineExecutor()
+
+    def test_weighted(self):
+        self._inline()
+        self._fill(self.high, self.low)
+        multi = consumer.MultiQueueConsumer([self.high, self.low],
+                                            weights=[3, 1], ttl=60,
+                                            grace=60, limit=1)
+        names = self._consume(multi, 8)
+        self.assertEqual(names.count('jobs-high'), 6)
+        self.assertEqual(names.count('jobs-low'), 2)
+
+    def test_strict_with_starvation(self):
+        self._inline()
+        self._fill(self.high, self.low)
+        multi = consumer.MultiQueueConsumer([self.high, self.low],
+                                            policy=consumer.STRICT,
+                                            starvation=2, ttl=60,
+                                            grace=60, limit=1)
+        self.assertEqual(self._consume(multi, 6),
+                         ['jobs-high', 'jobs-high', 'jobs-low'] * 2)
+
+    def test_empty_queue_backs_off(self):
+        self._fill(self.high)
+        low = self.client.queue('jobs-low',
+                                backoff=backoff.Backoff(base=10, cap=10))
+        multi = consumer.MultiQueueConsumer([self.high, low], ttl=60,
+                                            grace=60, limit=1)
+
+        with mock.patch.object(low, 'claim', wraps=low.claim) as claim:
+            self.assertEqual(self._consume(multi, 5), ['jobs-high'] * 5)
+        self.assertEqual(claim.call_count, 1)
+
+    def test_timeout(self):
+        multi = consumer.MultiQueueConsumer([self.high, self.low],
+                                            ttl=60, grace=60)
+        self.assertIsNone(multi.claim(timeout=0.05))
+
+    def test_close_releases_buffered_claims(self):
+        self._fill(self.high, self.low)
+        multi = consumer.MultiQueueConsumer([self.high, self.low],
+                                            ttl=60, grace=60, limit=1)
+        multi.claim()
+        multi.close()
+
+        claimed = [q.stats['messages']['claimed']
+                   for q in (self.high, self.low)]
+        self.assertEqual(sorted(claimed), [0, 1])
+
+    def test_default_ttl(self):
+        self._inline()
+        self._fill(self.high)
+        multi = consumer.MultiQueueConsumer([self.high], limit=5)
+
+        with mock.patch('zaqarclient.queues.v1.core.claim_get') as get:
+            claim = multi.claim()
+            self.assertEqual(claim.ttl, 60)
+            self.assertEqual(len(list(claim)), 5)
+        self.assertFalse(get.called)
+
+    def test_stale_claims_are_released(self):
+        self._inline()
+        self._fill(self.high, self.low)
+        multi = consumer.MultiQueueConsumer([self.high, self.low],
+                                            policy=consumer.STRICT,
+                                            ttl=60, grace=60, limit=1,
+                                            headroom=30)
+        self.assertEqual(multi.claim()._queue.name, 'jobs-high')
+
+        # Age the low priority claim buffered meanwhile.
+        claim, expires = multi._ready[1]
+        multi._ready[1] = (claim, time.time() + 10)
+
+        self.assertEqual(multi.claim()._queue.name, 'jobs-high')
+        self.assertEqual(multi.expired, 1)
+        self.assertIsNone(multi._ready[1])
+        self.assertEqual(self.low.stats['messages']['claimed'], 0)
+
+    def test_slow_claim_does_not_hold_back(self):
+        self._fill(self.high, self.low)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        low_claim = self.low.claim
+
+        def slow_claim(**kwargs):
+            release.wait()
+            return low_claim(**kwargs)
+
+        multi = consumer.MultiQueueConsumer([self.high, self.low],
+                                            ttl=60, grace=60, limit=1)
+        with mock.patch.object(self.low, 'claim', side_effect=slow_claim):
+            names = self._consume(multi, 3)
+            self.assertEqual(names, ['jobs-high'] * 3)
+            release.set()
+            multi.close()
+
+        self.assertEqual(self.low.stats['messages']['claimed'], 0)
+
+    def test_invalid_arguments(self):
+        self.assertRaises(ValueError, consumer.MultiQueueConsumer,
+                          [self.high], policy='fifo')
+        self.assertRaises(ValueError, consumer.MultiQueueConsumer,
+                          [self.high, self.low], weights=[1])
@@ -13,7 +13,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from concurrent import futures
 import json
+import threading
+
 import mock
 
 from zaqarclient.queues.v1 import core
@@ -238,3 +241,60 @@ class TestV1_1Core(TestV1Core):
             self.assertIn('queue_name', req.params)
             self.assertIn('pop', req.params)
             self.assertEqual(req.params['pop'], 5)
+
+    def test_async_callback(self):
+        with mock.patch.object(self.transport, 'send',
+                               autospec=True) as send_method:
+            send_method.return_value = response.Response(None, None)
+
+            done = threading.Event()
+            called = []
+
+            def callback(future):
+                called.append(future)
+                done.set()
+
+            req = request.Request()
+            future = core.queue_exists(self.transport, req, 'test',
+                                       callback=callback)
+            self.assertIsInstance(future, futures.Future)
+            self.assertTrue(future.result(5))
+            self.assertTrue(done.wait(5))
+            self.assertEqual(called, [future])
+
+    def test_async_positional_callback(self):
+        with mock.patch.object(self.transport, 'send',
+                               autospec=True) as send_method:
+            send_method.return_value = response.Response(None, None)
+
+            done = threading.Event()
+
+            req = request.Request()
+            future = core.queue_create(self.transport, req, 'test', None,
+                                       lambda future: done.set())
+            self.assertIsInstance(future, futures.Future)
+            future.result(5)
+            self.assertTrue(done.wait(5))
+
+    def test_async_flag(self):
+        with mock.patch.object(self.transport, 'send',
+                               autospec=True) as send_method:
+            resp = response.Response(None, '{"messages": [], "links": []}')
+            send_method.return_value = resp
+
+            req = request.Request()
+            future = core.message_list(self.transport, req, 'test',
+                                       limit=5, async_=True)
+            self.assertEqual(future.result(5)['messages'], [])
+            self.assertEqual(req.params, {'queue_name': 'test', 'limit': 5})
+
+    def test_async_error(self):
+        with mock.patch.object(self.transport, 'send',
+                               autospec=True) as send_method:
+            send_method.side_effect = errors.ResourceNotFound
+
+            req = request.Request()
+            future = core.message_get(self.transport, req, 'test', 'id',
+                                      async_=True)
+            self.assertIsInstance(future.exception(5),
+                                  errors.ResourceNotFound)
@@ -0,0 +1,76 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from zaqarclient.queues import client
+from zaqarclient.queues.v1 import dedupe
+from zaqarclient.tests import base
+from zaqarclient.transport import memory
+
+
+class TestDeduplicator(base.TestBase):
+
+    def setUp(self):
+        super(TestDeduplicator, self).setUp()
+        self.addCleanup(memory.reset)
+        self.dedupe = dedupe.Deduplicator(size=10, ttl=60)
+        conf = dict(self.conf, dedupe=self.dedupe)
+        self.client = client.Client('memory://localhost', 1.1, conf)
+        self.queue = self.client.queue('fizbit')
+        self.queue.post([{'ttl': 60, 'body': n} for n in range(3)])
+
+    def _redeliver(self, claim):
+        # Simulates an expired claim.
+        claim.delete()
+        return self.queue.claim(ttl=60, grace=60)
+
+    def _total(self):
+        return self.queue.stats['messages']['total']
+
+    def test_duplicates_are_dropped(self):
+        claim = self.queue.claim(ttl=60, grace=60)
+        self.assertEqual([m.body for m in claim], [0, 1, 2])
+        self.assertEqual(self.dedupe.dropped, 0)
+
+        self.assertEqual(list(self._redeliver(claim)), [])
+        self.assertEqual(self.dedupe.dropped, 3)
+        self.assertEqual(self._total(), 0)
+
+    def test_failed_message_is_redelivered(self):
+        claim = self.queue.claim(ttl=60, grace=60)
+        for msg in claim:
+            if msg.body == 1:
+                break
+
+        # Processing the 2nd message failed, only
+        # the 1st one is a duplicate.
+        bodies = [m.body for m in self._redeliver(claim)]
+        self.assertEqual(bodies, [1, 2])
+        self.assertEqual(self.dedupe.dropped, 1)
+
+    def test_entries_expire(self):
+        claim = self.queue.claim(ttl=60, grace=60)
+        list(claim)
+
+        self.dedupe.ttl = 0
+        self.assertEqual(len(list(self._redeliver(claim))), 3)
+        self.assertEqual(self.dedupe.dropped, 0)
+
+    def test_disabled_per_claim(self):
+        claim = self.queue.claim(ttl=60, grace=60)
+        list(claim)
+        claim.delete()
+
+        claim = self.queue.claim(ttl=60, grace=60, dedupe=False)
+        self.assertEqual(len(list(claim)), 3)
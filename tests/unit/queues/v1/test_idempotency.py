@@ -0,0 +1,83 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+from zaqarclient.queues import client
+from zaqarclient.queues.v1 import idempotency
+from zaqarclient.queues.v1 import message
+from zaqarclient.tests import base
+from zaqarclient.transport import memory
+
+
+class TestIdempotentPost(base.TestBase):
+
+    def setUp(self):
+        super(TestIdempotentPost, self).setUp()
+        self.addCleanup(memory.reset)
+        conf = dict(self.conf, idempotent_posts=True,
+                    idempotency_cache_size=3, client_uuid='me')
+        self.client = client.Client('memory://localhost', 1.1, conf)
+        self.queue = self.client.queue('fizbit')
+
+    def _total(self):
+        return self.queue.stats['messages']['total']
+
+    def test_keys(self):
+        msgs = [{'ttl': 60, 'body': n} for n in range(2)]
+        self.queue.post(msgs)
+        self.assertEqual([m['key'] for m in msgs], ['me:0', 'me:1'])
+
+        read = list(self.queue.messages(echo=True))
+        self.assertEqual([m.key for m in read], ['me:0', 'me:1'])
+        self.assertEqual([m.body for m in read], [0, 1])
+
+    def test_retries_are_suppressed(self):
+        msgs = [{'ttl': 60, 'body': n} for n in range(2)]
+        posted = self.queue.post(msgs)
+
+        self.assertEqual(self.queue.post(msgs), posted)
+        self.assertEqual(self._total(), 2)
+
+        msgs.append({'ttl': 60, 'body': 2})
+        retried = self.queue.post(msgs)
+        self.assertEqual(retried['resources'][:2], posted['resources'])
+        self.assertEqual(len(retried['resources']), 3)
+        self.assertEqual(self._total(), 3)
+
+    def test_acknowledged_keys_are_bounded(self):
+        msgs = [{'ttl': 60, 'body': n} for n in range(4)]
+        self.queue.post(msgs)
+        self.assertEqual(len(self.client.publisher.acked), 3)
+
+        # The oldest key was forgotten.
+        self.queue.post(msgs)
+        self.assertEqual(self._total(), 5)
+
+    def test_plain_queue(self):
+        queue = self.client.queue('fizbat', idempotent=False)
+        msg = {'ttl': 60, 'body': 1}
+        queue.post(msg)
+        queue.post(msg)
+        self.assertNotIn('key', msg)
+        self.assertEqual(queue.stats['messages']['total'], 2)
+
+    def test_raw_message_key(self):
+        body = idempotency.wrap('me:7', {'a': 1})
+        msg = message.Message(self.queue, '/v1.1/queues/fizbit/messages/1',
+                              60, 0, body)
+        self.assertEqual(msg.key, 'me:7')
+        self.assertEqual(msg.body, {'a': 1})
+        self.assertEqual(json.loads(msg.raw_body), body)
@@ -104,6 +104,22 @@ class TestMessageIterator(base.QueuesTestBase):
             self.assertEqual(len(iterated), 1)
 
 
+class TestMessageBody(base.QueuesTestBase):
+
+    def _message(self, **kwargs):
+        return message.Message(self.queue,
+                               '/v1/queues/mine/messages/123123423',
+                               800, 790, **kwargs)
+
+    def test_raw_body_from_body(self):
+        msg = self._message(body={'event': 'ActivateAccount'})
+        self.assertEqual(json.loads(msg.raw_body),
+                         {'event': 'ActivateAccount'})
+
+        msg.body = None
+        self.assertEqual(msg.raw_body, 'null')
+
+
 class QueuesV1MessageHttpUnitTest(test_message.QueuesV1MessageUnitTest):
 
     transport_cls = http.HttpTransport
@@ -0,0 +1,79 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+import mock
+
+from zaqarclient.queues import client
+from zaqarclient.tests import base
+from zaqarclient.transport import errors
+from zaqarclient.transport import memory
+
+
+class TestPrefetcher(base.TestBase):
+
+    def setUp(self):
+        super(TestPrefetcher, self).setUp()
+        self.addCleanup(memory.reset)
+        self.client = client.Client('memory://localhost', 1.1, self.conf)
+        self.queue = self.client.queue('fizbit')
+        self.queue.post([{'ttl': 60, 'body': n} for n in range(4)])
+
+    def _close_later(self, prefetcher, delay=0.3):
+        timer = threading.Timer(delay, prefetcher.close)
+        timer.start()
+        self.addCleanup(timer.join)
+
+    def test_messages_are_handed_out(self):
+        bodies = []
+        with self.queue.prefetch(depth=2, limit=1) as claims:
+            for msg in claims:
+                bodies.append(msg.body)
+                msg.delete()
+                if len(bodies) == 4:
+                    break
+
+        self.assertEqual(sorted(bodies), [0, 1, 2, 3])
+        self.assertEqual(self.queue.stats['messages']['total'], 0)
+
+    def test_close_releases_buffered_claims(self):
+        prefetcher = self.queue.prefetch(depth=2, limit=1)
+        msg = next(iter(prefetcher))
+        prefetcher.close()
+
+        # Only the claim being iterated over
+        # is still there.
+        released = list(self.queue.claim(ttl=60, grace=60, limit=10))
+        self.assertEqual(len(released), 3)
+        self.assertNotIn(msg.body, [m.body for m in released])
+
+    def test_stale_claims_are_released(self):
+        prefetcher = self.queue.prefetch(depth=1, limit=2, headroom=60)
+        self._close_later(prefetcher)
+
+        self.assertEqual(list(prefetcher), [])
+        self.assertTrue(prefetcher.expired > 0)
+
+        claimed = list(self.queue.claim(ttl=60, grace=60, limit=10))
+        self.assertEqual(len(claimed), 4)
+
+    def test_errors_are_raised(self):
+        with mock.patch.object(self.queue, 'claim',
+                               side_effect=errors.ServiceUnavailableError):
+            prefetcher = self.queue.prefetch()
+            self.assertRaises(errors.ServiceUnavailableError,
+                              list, prefetcher)
+            prefetcher.close()
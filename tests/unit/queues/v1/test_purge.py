@@ -0,0 +1,57 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+
+from zaqarclient.queues import client
+from zaqarclient.queues.v1 import core
+from zaqarclient.tests import base
+from zaqarclient.transport import memory
+
+
+class TestPurge(base.TestBase):
+
+    def setUp(self):
+        super(TestPurge, self).setUp()
+        self.addCleanup(memory.reset)
+        self.client = client.Client('memory://localhost', 1.1, self.conf)
+        self.queue = self.client.queue('fizbit')
+        self.queue.post([{'ttl': 60, 'body': n} for n in range(45)])
+
+    def test_pipelined(self):
+        self.queue.claim(ttl=60, grace=60, limit=5)
+        progress = mock.Mock()
+        with mock.patch.object(core, 'message_delete_many',
+                               wraps=core.message_delete_many) as delete:
+            deleted = self.queue.purge(page_size=20, chunk=10,
+                                       progress=progress)
+
+        self.assertEqual(deleted, 45)
+        self.assertEqual([c[0][0] for c in progress.call_args_list],
+                         [20, 40, 45])
+        self.assertEqual(delete.call_count, 5)
+        self.assertEqual(self.queue.stats['messages']['total'], 0)
+
+    def test_empty_queue(self):
+        self.assertEqual(self.client.queue('fizbat').purge(), 0)
+
+    def test_metadata_is_kept(self):
+        cli = client.Client('memory://localhost', 1, self.conf)
+        queue = cli.queue('fizbat')
+        queue.metadata(new_meta={'a': 1})
+        queue.post([{'ttl': 60, 'body': n} for n in range(3)])
+
+        self.assertEqual(queue.purge(), 3)
+        self.assertEqual(queue.metadata(force_reload=True), {'a': 1})
@@ -0,0 +1,108 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from zaqarclient.queues import client
+from zaqarclient.tests import base
+from zaqarclient.transport import memory
+
+
+class TestShardedQueue(base.TestBase):
+
+    def setUp(self):
+        super(TestShardedQueue, self).setUp()
+        self.addCleanup(memory.reset)
+        self.client = client.Client('memory://localhost', 1.1, self.conf)
+        self.queue = self.client.sharded_queue('events', 3)
+        self.store = memory.get_store('memory://localhost')
+
+    def _sizes(self):
+        return [len(self.store.queues[q.name].messages)
+                if q.name in self.store.queues else 0
+                for q in self.queue.queues]
+
+    def test_shard_names(self):
+        self.assertEqual([q.name for q in self.queue.queues],
+                         ['events.0', 'events.1', 'events.2'])
+        self.assertRaises(ValueError, self.client.sharded_queue,
+                          'events', 0)
+
+    def test_round_robin(self):
+        for n in range(6):
+            self.queue.post({'ttl': 60, 'body': n})
+        self.assertEqual(self._sizes(), [2, 2, 2])
+
+    def test_keyed_posts(self):
+        for n in range(4):
+            self.queue.post({'ttl': 60, 'body': n}, key='user-1')
+
+        sizes = self._sizes()
+        self.assertEqual(sorted(sizes), [0, 0, 4])
+        self.assertIs(self.queue.shard('user-1'),
+                      self.queue.queues[sizes.index(4)])
+
+    def test_claims_go_through_shards(self):
+        self.queue.post({'ttl': 60, 'body': 0}, key='a')
+
+        claim = self.queue.claim(ttl=60, grace=60)
+        self.assertEqual([m.body for m in claim], [0])
+
+        claim = self.queue.claim(ttl=60, grace=60)
+        self.assertIsNone(claim.id)
+        self.assertEqual(list(claim), [])
+
+    def test_claims_are_fair(self):
+        for n in range(6):
+            self.queue.post({'ttl': 60, 'body': n})
+
+        claimed = [m.queue.name
+                   for n in range(3)
+                   for m in self.queue.claim(ttl=60, grace=60, limit=1)]
+        self.assertEqual(sorted(claimed),
+                         ['events.0', 'events.1', 'events.2'])
+
+    def test_messages(self):
+        for n in range(3):
+            self.queue.post({'ttl': 60, 'body': n})
+        bodies = [m.body for m in self.queue.messages(echo=True)]
+        self.assertEqual(sorted(bodies), [0, 1, 2])
+
+    def test_messages_by_id(self):
+        posted = []
+        for n in range(3):
+            res = self.queue.post({'ttl': 60, 'body': n})
+            posted.append(res['resources'][0].split('/')[-1])
+
+        bodies = [m.body for m in self.queue.messages(posted[1])]
+        self.assertEqual(bodies, [1])
+
+        bodies = [m.body for m in self.queue.messages(*posted)]
+        self.assertEqual(sorted(bodies), [0, 1, 2])
+
+    def test_messages_by_id_with_missing_shards(self):
+        self.queue.queues[0].post({'ttl': 60, 'body': 0})
+        self.queue.queues[1].delete()
+        self.assertEqual(list(self.queue.messages('missing')), [])
+
+    def test_stats(self):
+        for n in range(5):
+            self.queue.post({'ttl': 60, 'body': n})
+        self.queue.claim(ttl=60, grace=60, limit=1)
+
+        stats = self.queue.stats['messages']
+        self.assertEqual(stats['total'], 5)
+        self.assertEqual(stats['claimed'], 1)
+        self.assertEqual(stats['free'], 4)
+        self.assertIn('oldest', stats)
+        self.assertIn('newest', stats)
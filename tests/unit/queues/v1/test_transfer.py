@@ -0,0 +1,166 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import io
+import json
+import os
+
+import fixtures
+import mock
+
+from zaqarclient.queues import client
+from zaqarclient.queues.v1 import transfer
+from zaqarclient.tests import base
+from zaqarclient.transport import memory
+
+
+class TestCopy(base.TestBase):
+
+    def setUp(self):
+        super(TestCopy, self).setUp()
+        self.addCleanup(memory.reset)
+        self.client = client.Client('memory://localhost', 1.1, self.conf)
+        self.source = self.client.queue('fizbit')
+        self.source.post([{'ttl': 3600, 'body': n} for n in range(25)])
+
+        other = client.Client('memory://elsewhere', 1.1, self.conf)
+        self.target = other.queue('fizbat')
+
+    def _bodies(self, queue):
+        return sorted(m.body for m in
+                      queue.messages(echo=True, include_claimed=True)
+                      .stream())
+
+    def test_list(self):
+        progress = mock.Mock()
+        stats = transfer.copy(self.source, self.target, batch_size=10,
+                              window=2, progress=progress)
+
+        self.assertEqual(stats.messages, 25)
+        self.assertEqual(stats.deleted, 0)
+        self.assertEqual(progress.call_count, 3)
+        self.assertEqual(self._bodies(self.target), list(range(25)))
+        self.assertEqual(self._bodies(self.source), list(range(25)))
+
+    def test_list_and_delete(self):
+        stats = transfer.copy(self.source, self.target, delete=True,
+                              batch_size=10, window=1)
+        self.assertEqual(stats.deleted, 25)
+        self.assertEqual(self._bodies(self.target), list(range(25)))
+        self.assertEqual(self.source.stats['messages']['total'], 0)
+
+    def test_claim(self):
+        stats = transfer.copy(self.source, self.target,
+                              mode=transfer.CLAIM, batch_size=10)
+        self.assertEqual(stats.messages, 25)
+        self.assertEqual(stats.deleted, 25)
+        self.assertEqual(self._bodies(self.target), list(range(25)))
+        self.assertEqual(self.source.stats['messages']['total'], 0)
+
+    def test_ttl_is_kept(self):
+        transfer.copy(self.source, self.target)
+        # Minus the messages' age.
+        ttls = [m.ttl for m in self.target.messages(echo=True)]
+        self.assertTrue(all(3590 <= ttl <= 3600 for ttl in ttls))
+
+    def test_failed_posts_keep_the_source(self):
+        with mock.patch.object(transfer.core, 'message_post_raw',
+                               side_effect=RuntimeError):
+            self.assertRaises(RuntimeError, transfer.copy, self.source,
+                              self.target, delete=True)
+        self.assertEqual(self.source.stats['messages']['total'], 25)
+
+    def test_posted_form_is_kept(self):
+        conf = dict(self.conf, body_codec={'threshold': 1024},
+                    idempotent_posts=True, client_uuid='me')
+        source = client.Client('memory://localhost', 1.1,
+                               conf).queue('fizbat')
+        source.post({'ttl': 60, 'body': 'x' * 4096})
+
+        transfer.copy(source, self.target)
+        raw = [m.raw_body for m in source.messages(echo=True)]
+        msgs = list(self.target.messages(echo=True))
+        self.assertEqual([m.raw_body for m in msgs], raw)
+        self.assertEqual(msgs[0].key, 'me:0')
+
+        # Bodies are decoded by their consumers.
+        target = client.Client('memory://elsewhere', 1.1, conf)
+        msg = list(target.queue('fizbat').messages(echo=True))[0]
+        self.assertEqual(msg.body, 'x' * 4096)
+
+    def test_invalid_mode(self):
+        self.assertRaises(ValueError, transfer.copy, self.source,
+                          self.target, mode='pop')
+
+
+class TestExportImport(base.TestBase):
+
+    def setUp(self):
+        super(TestExportImport, self).setUp()
+        self.addCleanup(memory.reset)
+        self.client = client.Client('memory://localhost', 1.1, self.conf)
+        self.queue = self.client.queue('fizbit')
+        self.queue.post([{'ttl': 3600, 'body': {'n': n}}
+                         for n in range(25)])
+        self.queue.claim(ttl=60, grace=60, limit=5)
+        self.path = self.useFixture(fixtures.TempDir()).path
+
+    def _bodies(self, queue):
+        return sorted(m.body['n'] for m in
+                      queue.messages(echo=True, include_claimed=True)
+                      .stream())
+
+    def test_export(self):
+        path = os.path.join(self.path, 'fizbit.jsonl')
+        progress = mock.Mock()
+        stats = transfer.export_queue(self.queue, path, page_size=10,
+                                      progress=progress)
+        self.assertEqual(stats.messages, 25)
+        self.assertEqual(progress.call_count, 2)
+
+        with open(path) as dump:
+            records = [json.loads(line) for line in dump]
+        self.assertEqual(sorted(r['body']['n'] for r in records),
+                         list(range(25)))
+        self.assertEqual(set(records[0]), set(['id', 'ttl', 'age', 'body']))
+
+    def test_export_free_messages(self):
+        out = io.BytesIO()
+        stats = transfer.export_queue(self.queue, out,
+                                      include_claimed=False)
+        self.assertEqual(stats.messages, 20)
+        self.assertFalse(out.closed)
+
+    def test_round_trip_gzip(self):
+        path = os.path.join(self.path, 'fizbit.jsonl.gz')
+        transfer.export_queue(self.queue, path)
+        with gzip.open(path) as dump:
+            self.assertEqual(len(dump.readlines()), 25)
+
+        target = self.client.queue('fizbat')
+        stats = transfer.import_queue(target, path, batch_size=10,
+                                      window=2)
+        self.assertEqual(stats.messages, 25)
+        self.assertEqual(self._bodies(target), list(range(25)))
+
+    def test_import_keeps_remaining_ttl(self):
+        dump = io.BytesIO(b'{"ttl": 3600, "age": 600, "body": 1}\n\n'
+                          b'{"ttl": 120, "age": 100, "body": 2}\n')
+        target = self.client.queue('fizbat')
+        transfer.import_queue(target, dump)
+
+        ttls = sorted(m.ttl for m in target.messages(echo=True))
+        self.assertEqual(ttls, [60, 3000])
@@ -39,3 +39,12 @@ class TestApi(base.TestBase):
     def test_invalid_operation(self):
         self.assertRaises(errors.InvalidOperation, self.api.validate,
                           'super_secret_op', {})
+
+    def test_resolve(self):
+        operation, params = self.api.resolve('/v1/test/Sauron?address=x')
+        self.assertEqual(operation, 'test_operation')
+        self.assertEqual(params, {'name': 'Sauron', 'address': 'x'})
+
+    def test_resolve_unknown_ref(self):
+        self.assertRaises(errors.InvalidOperation, self.api.resolve,
+                          '/v1/nowhere')
@@ -0,0 +1,106 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import threading
+import time
+
+from zaqarclient.queues import client
+from zaqarclient.tests import base
+from zaqarclient.transport import coalescing
+from zaqarclient.transport import errors
+from zaqarclient.transport import memory
+from zaqarclient.transport import request
+from zaqarclient.transport import response
+
+
+class _SlowTransport(object):
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+
+    def send(self, request):
+        self.calls += 1
+        time.sleep(0.1)
+        if self.error is not None:
+            raise self.error
+        return response.Response(request, json.dumps({'free': 1}))
+
+
+class TestCoalescingTransport(base.TestBase):
+
+    def _run(self, trans, operation, count=10, **params):
+        results = []
+
+        def call():
+            params['queue_name'] = 'fizbit'
+            req = request.Request('memory://localhost',
+                                  operation=operation,
+                                  params=dict(params),
+                                  api='queues.v1')
+            try:
+                results.append(trans.send(req).deserialized_content)
+            except Exception as ex:
+                results.append(ex)
+
+        threads = [threading.Thread(target=call) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_reads_are_coalesced(self):
+        inner = _SlowTransport()
+        trans = coalescing.CoalescingTransport(self.conf, inner)
+        results = self._run(trans, 'queue_get_stats')
+        self.assertEqual(inner.calls, 1)
+        self.assertEqual(results, [{'free': 1}] * 10)
+
+        # Callers get their own copy.
+        self.assertIsNot(results[0], results[1])
+
+    def test_different_params_are_not_coalesced(self):
+        inner = _SlowTransport()
+        trans = coalescing.CoalescingTransport(self.conf, inner)
+        self._run(trans, 'message_list', count=1, limit=1)
+        self._run(trans, 'message_list', count=1, limit=2)
+        self.assertEqual(inner.calls, 2)
+
+    def test_writes_are_not_coalesced(self):
+        inner = _SlowTransport()
+        trans = coalescing.CoalescingTransport(self.conf, inner)
+        self._run(trans, 'queue_delete', count=3)
+        self.assertEqual(inner.calls, 3)
+
+    def test_errors_are_shared(self):
+        inner = _SlowTransport(error=errors.ResourceNotFound())
+        trans = coalescing.CoalescingTransport(self.conf, inner)
+        results = self._run(trans, 'queue_exists')
+        self.assertEqual(inner.calls, 1)
+        for result in results:
+            self.assertIsInstance(result, errors.ResourceNotFound)
+
+    def test_client_option(self):
+        self.addCleanup(memory.reset)
+        conf = dict(self.conf, coalesce_reads=True)
+        cli = client.Client('memory://localhost', 1, conf)
+        queue = cli.queue('fizbit')
+        queue.post({'ttl': 60, 'body': 1})
+        self.assertEqual(queue.stats['messages']['free'], 1)
+
+        req, trans = cli._request_and_transport()
+        self.assertIsInstance(trans, coalescing.CoalescingTransport)
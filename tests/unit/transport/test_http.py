@@ -13,11 +13,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
+import threading
+import time
+
 import mock
 import requests as prequest
+from six.moves import BaseHTTPServer as server
+from six.moves import http_client
+from six.moves import socketserver
 
+from zaqarclient.queues import client
 from zaqarclient.tests import base
 from zaqarclient.tests.transport import api
+from zaqarclient.transport import errors
 from zaqarclient.transport import http
 from zaqarclient.transport import request
 
@@ -57,7 +66,8 @@ class TestHttpTransport(base.TestBase):
             request_method.assert_called_with('GET', url=final_url,
                                               params=final_params,
                                               headers=final_headers,
-                                              data=None)
+                                              data=None,
+                                              timeout=30)
 
     def test_send_without_api(self):
         params = {'name': 'Test',
@@ -79,7 +89,8 @@ class TestHttpTransport(base.TestBase):
             request_method.assert_called_with('GET', url=final_url,
                                               params=params,
                                               headers=final_headers,
-                                              data=None)
+                                              data=None,
+                                              timeout=30)
 
     def test_error_handling(self):
         params = {'name': 'Opportunity',
@@ -99,3 +110,196 @@ class TestHttpTransport(base.TestBase):
                 resp.status_code = response_code
                 request_method.return_value = resp
                 self.assertRaises(exception, lambda: self.transport.send(req))
+
+    def _send_timeout(self, req):
+        req._api = self.api
+        with mock.patch.object(self.transport.client, 'request',
+                               autospec=True) as request_method:
+            request_method.return_value = prequest.Response()
+            self.transport.send(req)
+            return request_method.call_args[1]['timeout']
+
+    def test_timeouts_option(self):
+        timeouts = {'default': 10}
+        self.transport.options = dict(self.conf, timeouts=timeouts)
+
+        req = request.Request('http://example.org/',
+                              operation='test_operation',
+                              params={'name': 'Test'})
+        self.assertEqual(self._send_timeout(req), 10)
+
+        timeouts['test_operation'] = 2
+        req = request.Request('http://example.org/',
+                              operation='test_operation',
+                              params={'name': 'Test'})
+        self.assertEqual(self._send_timeout(req), 2)
+
+    def test_schema_timeouts(self):
+        req = request.Request('http://example.org/',
+                              operation='health',
+                              api='queues.v1')
+        self.assertEqual(self.transport.get_timeout(req), 5)
+
+        self.transport.options = dict(self.conf, timeouts={'health': 1})
+        self.assertEqual(self.transport.get_timeout(req), 1)
+
+    def test_timeout_is_capped_by_deadline(self):
+        req = request.Request('http://example.org/',
+                              operation='test_operation',
+                              params={'name': 'Test'},
+                              deadline=time.time() + 1)
+        self.assertTrue(0 < self._send_timeout(req) <= 1)
+
+    def test_deadline_exceeded(self):
+        req = request.Request('http://example.org/',
+                              operation='test_operation',
+                              params={'name': 'Test'},
+                              deadline=time.time() - 1)
+        req._api = self.api
+
+        with mock.patch.object(self.transport.client, 'request',
+                               autospec=True) as request_method:
+            self.assertRaises(errors.DeadlineExceeded,
+                              self.transport.send, req)
+            self.assertFalse(request_method.called)
+
+    def test_timeout_error(self):
+        req = request.Request('http://example.org/',
+                              operation='test_operation',
+                              params={'name': 'Test'})
+        req._api = self.api
+
+        with mock.patch.object(self.transport.client, 'request',
+                               autospec=True) as request_method:
+            request_method.side_effect = prequest.Timeout('too slow')
+            self.assertRaises(errors.RequestTimeout,
+                              self.transport.send, req)
+
+
+class _Handler(server.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8')
+        self.server.seen.append((self.command, self.path, body,
+                                 self.client_address, self.headers))
+
+        if 'slow' in self.path:
+            time.sleep(0.5)
+
+        if 'drop' in self.path:
+            # Handle the request but lose the reply.
+            self.close_connection = True
+            return
+
+        status = 404 if '404' in self.path else 200
+        payload = json.dumps({'description': 'nope', 'path': self.path})
+        payload = payload.encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_PUT = do_POST = do_DELETE = _reply
+
+
+class _Server(socketserver.ThreadingMixIn, server.HTTPServer):
+
+    daemon_threads = True
+
+
+class TestHttplibTransport(base.TestBase):
+
+    """Tests for the `http.client` based HTTP transport."""
+
+    def setUp(self):
+        super(TestHttplibTransport, self).setUp()
+        self.api = api.FakeApi()
+        self.transport = http.HttplibTransport(self.conf)
+
+        self.server = _Server(('127.0.0.1', 0), _Handler)
+        self.server.seen = []
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.endpoint = 'http://127.0.0.1:%d/' % self.server.server_port
+
+    def _request(self, name, operation='test_operation', **params):
+        params['name'] = name
+        req = request.Request(self.endpoint,
+                              operation=operation,
+                              params=params,
+                              headers={'Client-ID': 'me'})
+        req._api = self.api
+        return req
+
+    def test_basic_send(self):
+        resp = self.transport.send(self._request('Test', address='Space'))
+        self.assertEqual(resp.deserialized_content['path'],
+                         '/v1/test/Test?address=Space')
+
+    def test_keep_alive(self):
+        for i in range(3):
+            self.transport.send(self._request('Test'))
+
+        clients = set(seen[3] for seen in self.server.seen)
+        self.assertEqual(len(self.server.seen), 3)
+        self.assertEqual(len(clients), 1)
+
+    def test_error_handling(self):
+        self.assertRaises(errors.ResourceNotFound,
+                          self.transport.send, self._request('404'))
+
+    def test_timeout(self):
+        self.transport.options = dict(self.conf, timeouts={'default': 0.1})
+        self.assertRaises(errors.RequestTimeout,
+                          self.transport.send, self._request('slow'))
+
+        # Timeouts must not be retried as
+        # stale connections.
+        self.assertEqual(len(self.server.seen), 1)
+
+    def test_lost_reply_is_retried_when_idempotent(self):
+        self.transport.send(self._request('Test'))
+        self.assertRaises(http_client.BadStatusLine,
+                          self.transport.send, self._request('drop'))
+
+        # Sent on the kept-alive connection then on a new one.
+        self.assertEqual(len(self.server.seen), 3)
+
+    def test_lost_reply_is_not_retried_when_not_idempotent(self):
+        self.api.schema = dict(self.api.schema)
+        self.api.schema['test_post'] = dict(
+            self.api.schema['test_operation'], method='POST')
+
+        self.transport.send(self._request('Test'))
+        self.assertRaises(http_client.BadStatusLine, self.transport.send,
+                          self._request('drop', operation='test_post'))
+        self.assertEqual(len(self.server.seen), 2)
+
+    def test_client_option(self):
+        conf = dict(self.conf, transport='httplib')
+        cli = client.Client(self.endpoint, 1, conf)
+        req, trans = cli._request_and_transport()
+        self.assertIsInstance(trans, http.HttplibTransport)
+
+    def test_client_without_project(self):
+        cli = client.Client(self.endpoint, 1, {'transport': 'httplib'})
+
+        queue = cli.queue('fizbit', auto_create=False)
+        self.assertEqual(queue.metadata()['path'],
+                         '/v1/queues/fizbit/metadata')
+
+        headers = self.server.seen[0][4]
+        self.assertNotIn('X-Project-Id', headers)
+        self.assertIsNotNone(headers.get('Client-ID'))
@@ -0,0 +1,181 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import socket
+import threading
+import time
+
+from h2 import config
+from h2 import connection
+from h2 import events
+from h2 import exceptions
+from six.moves import socketserver
+
+from zaqarclient.queues import client
+from zaqarclient.tests import base
+from zaqarclient.tests.transport import api
+from zaqarclient.transport import errors
+from zaqarclient.transport import http2
+from zaqarclient.transport import request
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Echoes every request back as JSON, once `delay` has passed."""
+
+    def handle(self):
+        self.server.connections += 1
+        self.lock = threading.Lock()
+        self.conn = connection.H2Connection(
+            config=config.H2Configuration(client_side=False,
+                                          header_encoding='utf-8'))
+        self.conn.initiate_connection()
+        self.request.sendall(self.conn.data_to_send())
+
+        streams = {}
+        while True:
+            try:
+                data = self.request.recv(65535)
+            except socket.error:
+                return
+            if not data:
+                return
+
+            with self.lock:
+                received = self.conn.receive_data(data)
+                self.request.sendall(self.conn.data_to_send())
+
+            for event in received:
+                if isinstance(event, events.RequestReceived):
+                    streams[event.stream_id] = [dict(event.headers), b'']
+                elif isinstance(event, events.DataReceived):
+                    streams[event.stream_id][1] += event.data
+                    with self.lock:
+                        self.conn.acknowledge_received_data(
+                            event.flow_controlled_length, event.stream_id)
+                elif isinstance(event, events.StreamReset):
+                    self.server.resets += 1
+                elif isinstance(event, events.StreamEnded):
+                    headers, body = streams.pop(event.stream_id)
+                    worker = threading.Thread(target=self._reply,
+                                              args=(event.stream_id,
+                                                    headers, body))
+                    worker.daemon = True
+                    worker.start()
+
+    def _reply(self, stream_id, headers, body):
+        time.sleep(self.server.delay)
+
+        status = '404' if '404' in headers[':path'] else '200'
+        payload = json.dumps({'path': headers[':path'],
+                              'method': headers[':method'],
+                              'client': headers.get('client-id'),
+                              'body': body.decode('utf-8'),
+                              'description': 'nope'}).encode('utf-8')
+
+        with self.lock:
+            try:
+                self.conn.send_headers(stream_id, [(':status', status)])
+            except exceptions.StreamClosedError:
+                # Reset by the client meanwhile.
+                return
+            self.conn.send_data(stream_id, payload, end_stream=True)
+
+            # Say goodbye along with the response.
+            if 'goaway' in headers[':path']:
+                self.conn.close_connection()
+            self.request.sendall(self.conn.data_to_send())
+
+
+class _Server(socketserver.ThreadingTCPServer):
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class TestHttp2Transport(base.TestBase):
+
+    def setUp(self):
+        super(TestHttp2Transport, self).setUp()
+        self.api = api.FakeApi()
+
+        self.server = _Server(('127.0.0.1', 0), _Handler)
+        self.server.delay = 0
+        self.server.connections = 0
+        self.server.resets = 0
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.endpoint = 'http://127.0.0.1:%d/' % self.server.server_address[1]
+        self.transport = http2.Http2Transport(self.conf)
+        self.addCleanup(self.transport.close)
+
+    def _request(self, name, **params):
+        params['name'] = name
+        req = request.Request(self.endpoint,
+                              operation='test_operation',
+                              params=params,
+                              content='{"a": 1}',
+                              headers={'Client-ID': 'me'})
+        req._api = self.api
+        return req
+
+    def test_send(self):
+        resp = self.transport.send(self._request('Test', address='Space'))
+        content = resp.deserialized_content
+        self.assertEqual(content['path'], '/v1/test/Test?address=Space')
+        self.assertEqual(content['client'], 'me')
+        self.assertEqual(content['body'], '{"a": 1}')
+
+    def test_multiplexing(self):
+        self.server.delay = 0.1
+        futures = [self.transport.submit(self._request('Test%d' % n))
+                   for n in range(20)]
+
+        paths = [f.result(5).deserialized_content['path'] for f in futures]
+        self.assertEqual(paths, ['/v1/test/Test%d' % n for n in range(20)])
+        self.assertEqual(self.server.connections, 1)
+
+    def test_error_handling(self):
+        self.assertRaises(errors.ResourceNotFound,
+                          self.transport.send, self._request('404'))
+
+    def test_timeout_resets_stream(self):
+        self.server.delay = 0.3
+        self.transport.options = dict(self.conf, timeouts={'default': 0.05})
+        self.assertRaises(errors.RequestTimeout,
+                          self.transport.send, self._request('Test'))
+
+        conn = list(self.transport._connections.values())[0]
+        self.assertEqual(conn._streams, {})
+
+        time.sleep(0.4)
+        self.assertEqual(self.server.resets, 1)
+        self.assertTrue(conn.alive)
+
+    def test_response_along_with_goaway(self):
+        self.transport.options = dict(self.conf, timeouts={'default': 2})
+        resp = self.transport.send(self._request('goaway'))
+        self.assertEqual(resp.deserialized_content['path'],
+                         '/v1/test/goaway')
+
+    def test_client_option(self):
+        conf = dict(self.conf, transport='http2')
+        cli = client.Client(self.endpoint, 1, conf)
+        req, trans = cli._request_and_transport()
+        self.assertIsInstance(trans, http2.Http2Transport)
@@ -0,0 +1,200 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+import mock
+
+from zaqarclient.queues import client
+from zaqarclient.queues.v1 import core
+from zaqarclient.tests import base
+from zaqarclient import transport
+from zaqarclient.transport import errors
+from zaqarclient.transport import memory
+
+
+class TestMemoryTransport(base.TestBase):
+
+    url = 'memory://localhost'
+    version = 1
+
+    def setUp(self):
+        super(TestMemoryTransport, self).setUp()
+        self.addCleanup(memory.reset)
+        self.client = client.Client(self.url, self.version, self.conf)
+        self.queue = self.client.queue('test_queue')
+
+    def _post(self, count, queue=None):
+        queue = queue or self.queue
+        return queue.post([{'ttl': 60, 'body': {'n': n}}
+                           for n in range(count)])
+
+    def test_get_transport_for(self):
+        trans = transport.get_transport_for(self.url)
+        self.assertIsInstance(trans, memory.MemoryTransport)
+
+    def test_store_is_shared(self):
+        self._post(3)
+        other = client.Client(self.url, self.version, self.conf)
+        queue = other.queue('test_queue', auto_create=False)
+        self.assertEqual(queue.stats['messages']['free'], 3)
+
+    def test_queue_lifecycle(self):
+        self.assertTrue(self.queue.exists())
+        self.queue.delete()
+        self.assertFalse(self.queue.exists())
+
+    def test_queue_list(self):
+        for name in ('a', 'b', 'c'):
+            self.client.queue(name)
+
+        names = [q.name for q in self.client.queues(limit=2).stream()]
+        self.assertEqual(names, ['a', 'b', 'c', 'test_queue'])
+
+    def test_message_post_and_stream(self):
+        res = self._post(25)
+        self.assertEqual(len(res['resources']), 25)
+
+        msgs = list(self.queue.messages(echo=True).stream())
+        self.assertEqual([m.body['n'] for m in msgs], list(range(25)))
+
+    def test_message_list_no_echo(self):
+        self._post(3)
+        self.assertEqual(len(list(self.queue.messages())), 0)
+
+    def test_message_get_many(self):
+        res = self._post(3)
+        ids = [ref.split('/')[-1] for ref in res['resources']]
+        self.assertEqual(len(list(self.queue.messages(*ids))), 3)
+
+    def test_message_expires(self):
+        self._post(2)
+        now = time.time()
+        with mock.patch.object(memory.time, 'time',
+                               return_value=now + 61):
+            self.assertEqual(self.queue.stats['messages']['total'], 0)
+
+    def test_claim(self):
+        self._post(5)
+        claim = self.queue.claim(ttl=30, grace=30, limit=2)
+        msgs = list(claim)
+        self.assertEqual(len(msgs), 2)
+        self.assertEqual(msgs[0].claim_id, claim.id)
+
+        stats = self.queue.stats['messages']
+        self.assertEqual(stats['claimed'], 2)
+        self.assertEqual(stats['free'], 3)
+
+        msgs[0].delete()
+        self.assertEqual(len(list(self.queue.claim(id=claim.id))), 1)
+
+        claim.delete()
+        self.assertEqual(self.queue.stats['messages']['free'], 4)
+
+    def test_claim_empty(self):
+        claim = self.queue.claim(ttl=30, grace=30)
+        self.assertIsNone(claim.id)
+        self.assertEqual(list(claim), [])
+
+    def test_claim_expires(self):
+        self._post(1)
+        claim = self.queue.claim(ttl=30, grace=30)
+        now = time.time()
+        with mock.patch.object(memory.time, 'time',
+                               return_value=now + 31):
+            self.assertEqual(self.queue.stats['messages']['free'], 1)
+            self.assertRaises(errors.ResourceNotFound, claim.update,
+                              ttl=10)
+
+    def test_claim_update_extends_claim(self):
+        self._post(2)
+        claim = self.queue.claim(ttl=30, grace=30, limit=1)
+        claim.update(ttl=60)
+        now = time.time()
+        with mock.patch.object(memory.time, 'time',
+                               return_value=now + 31):
+            stats = self.queue.stats['messages']
+            self.assertEqual(stats['claimed'], 1)
+            self.assertEqual(stats['free'], 1)
+
+    def test_released_messages_are_claimed_first(self):
+        self._post(3)
+        first = self.queue.claim(ttl=30, grace=30, limit=1)
+        bodies = [m.body for m in first]
+        self.queue.claim(ttl=30, grace=30, limit=1)
+        first.delete()
+
+        claim = self.queue.claim(ttl=30, grace=30, limit=2)
+        self.assertEqual([m.body for m in claim], bodies + [{'n': 2}])
+
+    def test_delete_claimed_message(self):
+        res = self._post(1)
+        self.queue.claim(ttl=30, grace=30)
+        msg_id = res['resources'][0].split('/')[-1]
+        msg = self.queue.message(msg_id)
+        self.assertRaises(errors.ForbiddenError, msg.delete)
+
+    def test_message_not_found(self):
+        self.assertRaises(errors.ResourceNotFound,
+                          self.queue.message, 'nope')
+
+    def test_pool(self):
+        self.client.pool('pool', weight=10, uri='mongodb://localhost')
+        store = memory.get_store(self.url)
+        self.assertIn('pool', store.pools)
+
+
+class TestMemoryTransportV1_1(TestMemoryTransport):
+
+    version = 1.1
+
+    def test_queue_lifecycle(self):
+        # v1.1 creates queues lazily.
+        self.assertFalse(self.queue.exists())
+        self._post(1)
+        self.assertTrue(self.queue.exists())
+        self.queue.delete()
+        self.assertFalse(self.queue.exists())
+
+    def test_queue_list(self):
+        for name in ('a', 'b', 'c'):
+            self._post(1, queue=self.client.queue(name))
+
+        names = [q.name for q in self.client.queues(limit=2).stream()]
+        self.assertEqual(names, ['a', 'b', 'c'])
+
+    def test_store_is_shared(self):
+        self._post(3)
+        other = client.Client(self.url, self.version, self.conf)
+        queue = other.queue('test_queue', auto_create=False)
+        self.assertEqual(len(list(queue.messages())), 3)
+
+    def test_message_pop(self):
+        self._post(3)
+        self.assertEqual(len(list(self.queue.pop(count=2))), 2)
+        self.assertEqual(self.queue.stats['messages']['total'], 1)
+
+    def test_message_pop_response(self):
+        self._post(1)
+        req, trans = self.client._request_and_transport()
+        popped = core.message_pop(trans, req, 'test_queue', count=2)
+        self.assertEqual(list(popped), ['messages'])
+        self.assertEqual(len(popped['messages']), 1)
+
+    def test_flavor(self):
+        self.client.pool('pool', weight=10, uri='mongodb://localhost')
+        self.client.flavor('gold', pool='pool')
+        store = memory.get_store(self.url)
+        self.assertIn('gold', store.flavors)
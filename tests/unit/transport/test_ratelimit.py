@@ -0,0 +1,158 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+from zaqarclient.queues import client
+from zaqarclient.tests import base
+from zaqarclient.transport import errors
+from zaqarclient.transport import memory
+from zaqarclient.transport import ratelimit
+from zaqarclient.transport import request
+from zaqarclient.transport import response
+
+
+class _FlakyTransport(object):
+
+    def __init__(self):
+        self.unavailable = False
+
+    def send(self, request):
+        if self.unavailable:
+            raise errors.ServiceUnavailableError()
+        return response.Response(request, None)
+
+
+class TestTokenBucket(base.TestBase):
+
+    def test_reserve(self):
+        bucket = ratelimit.TokenBucket(10)
+        self.assertEqual(bucket.reserve(10), 0)
+
+        delay = bucket.reserve(5)
+        self.assertTrue(0.4 < delay <= 0.5)
+
+        # Failed reservations don't take any
+        # tokens.
+        self.assertRaises(errors.RateLimitExceeded,
+                          bucket.reserve, 1, timeout=0.1)
+        self.assertTrue(0.5 < bucket.reserve(1) <= 0.6)
+
+    def test_big_requests_pass(self):
+        bucket = ratelimit.TokenBucket(10)
+        self.assertEqual(bucket.reserve(50, timeout=0), 0)
+        self.assertTrue(bucket.reserve(1) > 4)
+
+    def test_aimd(self):
+        bucket = ratelimit.TokenBucket(100)
+        bucket.decrease()
+        bucket.decrease()
+        self.assertEqual(bucket.rate, 25)
+
+        bucket.increase()
+        self.assertEqual(bucket.rate, 25.2)
+
+        for i in range(1000):
+            bucket.increase()
+        self.assertEqual(bucket.rate, 100)
+
+
+class TestRateLimitingTransport(base.TestBase):
+
+    def setUp(self):
+        super(TestRateLimitingTransport, self).setUp()
+        self.addCleanup(memory.reset)
+
+    def _client(self, **limits):
+        conf = dict(self.conf, rate_limits=limits)
+        return client.Client('memory://localhost', 1.1, conf)
+
+    def test_raise_policy(self):
+        cli = self._client(project={'requests': 3}, policy='raise')
+        queue = cli.queue('fizbit')
+        for i in range(3):
+            queue.post({'ttl': 60, 'body': i})
+        self.assertRaises(errors.RateLimitExceeded,
+                          queue.post, {'ttl': 60, 'body': 3})
+
+    def test_block_policy(self):
+        cli = self._client(project={'requests': 20})
+        queue = cli.queue('fizbit')
+
+        start = time.time()
+        for i in range(25):
+            queue.post({'ttl': 60, 'body': i})
+        self.assertTrue(time.time() - start >= 0.2)
+
+    def test_block_policy_honors_deadline(self):
+        cli = self._client(project={'requests': 1})
+        queue = cli.queue('fizbit')
+        queue.post({'ttl': 60, 'body': 1})
+
+        with cli.deadline(0.2):
+            self.assertRaises(errors.RateLimitExceeded,
+                              queue.post, {'ttl': 60, 'body': 2})
+
+    def test_queue_limits(self):
+        cli = self._client(queue={'requests': 2}, policy='raise')
+        fizbit = cli.queue('fizbit')
+        fizbat = cli.queue('fizbat')
+        for i in range(2):
+            fizbit.post({'ttl': 60, 'body': i})
+            fizbat.post({'ttl': 60, 'body': i})
+
+        self.assertRaises(errors.RateLimitExceeded,
+                          fizbit.post, {'ttl': 60, 'body': 2})
+
+        # Requests not bound to a queue are not
+        # limited per queue.
+        cli.health()
+
+    def test_message_limits(self):
+        cli = self._client(queue={'messages': 10}, policy='raise')
+        queue = cli.queue('fizbit')
+        queue.post([{'ttl': 60, 'body': i} for i in range(10)])
+        self.assertEqual(queue.stats['messages']['total'], 10)
+        self.assertRaises(errors.RateLimitExceeded,
+                          queue.post, {'ttl': 60, 'body': 10})
+
+    def test_adaptive(self):
+        inner = _FlakyTransport()
+        limiter = ratelimit.RateLimiter({'project': {'requests': 100},
+                                         'adaptive': True})
+        trans = ratelimit.RateLimitingTransport({'rate_limiter': limiter},
+                                                inner)
+        req = request.Request('memory://localhost', operation='health',
+                              api='queues.v1.1')
+        bucket = limiter.buckets(None, None, 0)[0][0]
+
+        inner.unavailable = True
+        self.assertRaises(errors.ServiceUnavailableError, trans.send, req)
+        self.assertEqual(bucket.rate, 50)
+
+        inner.unavailable = False
+        trans.send(req)
+        self.assertTrue(50 < bucket.rate < 51)
+
+    def test_shared_limiter(self):
+        limiter = ratelimit.RateLimiter({'project': {'requests': 2},
+                                         'policy': 'raise'})
+        conf = dict(self.conf, rate_limiter=limiter)
+        first = client.Client('memory://localhost', 1.1, conf)
+        second = client.Client('memory://localhost', 1.1, conf)
+
+        first.health()
+        second.health()
+        self.assertRaises(errors.RateLimitExceeded, first.health)
@@ -0,0 +1,97 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import fixtures
+import mock
+
+from zaqarclient.queues import client
+from zaqarclient.tests import base
+from zaqarclient.transport import errors
+from zaqarclient.transport import memory
+from zaqarclient.transport import recording
+
+
+class TestRecordAndReplay(base.TestBase):
+
+    def setUp(self):
+        super(TestRecordAndReplay, self).setUp()
+        self.addCleanup(memory.reset)
+        self.tmp = self.useFixture(fixtures.TempDir()).path
+
+    def _record(self, path):
+        conf = dict(self.conf, record_file=path, client_uuid='me')
+        cli = client.Client('memory://localhost', 1.1, conf)
+        queue = cli.queue('test_queue')
+        queue.post([{'ttl': 60, 'body': n} for n in range(3)])
+        claimed = [m.body for m in queue.claim(ttl=30, grace=30)]
+        self.assertRaises(errors.ResourceNotFound, queue.message, 'nope')
+        cli._transports['memory://localhost'].close()
+        return claimed
+
+    def _replay(self, path, **options):
+        conf = dict(self.conf, replay_file=path, client_uuid='me', **options)
+        cli = client.Client('replay://localhost', 1.1, conf)
+        queue = cli.queue('test_queue')
+        queue.post([{'ttl': 60, 'body': n} for n in range(3)])
+        claimed = [m.body for m in queue.claim(ttl=30, grace=30)]
+        self.assertRaises(errors.ResourceNotFound, queue.message, 'nope')
+        return claimed
+
+    def test_record_and_replay(self):
+        path = os.path.join(self.tmp, 'session.jsonl')
+        recorded = self._record(path)
+        self.assertEqual(recorded, [0, 1, 2])
+
+        # Make sure nothing reaches the memory store
+        # while replaying.
+        memory.reset()
+        self.assertEqual(self._replay(path), recorded)
+
+    def test_record_and_replay_gzip(self):
+        path = os.path.join(self.tmp, 'session.jsonl.gz')
+        recorded = self._record(path)
+        self.assertEqual(self._replay(path), recorded)
+
+    def test_clients_sharing_a_record_file(self):
+        path = os.path.join(self.tmp, 'session.jsonl')
+        conf = dict(self.conf, record_file=path, client_uuid='me')
+        clients = [client.Client('memory://localhost', 1.1, conf)
+                   for n in range(2)]
+        for cli in clients:
+            cli.queue('test_queue').post({'ttl': 60, 'body': 1})
+
+        for cli in clients:
+            cli._transports['memory://localhost'].close()
+
+        with open(path) as session:
+            self.assertEqual(len(session.readlines()), 2)
+
+    def test_replay_latency(self):
+        path = os.path.join(self.tmp, 'session.jsonl')
+        self._record(path)
+
+        with mock.patch.object(recording.time, 'sleep') as sleep:
+            self._replay(path, replay_latency=2)
+            self.assertEqual(sleep.call_count, 3)
+
+    def test_replay_unknown_request(self):
+        path = os.path.join(self.tmp, 'session.jsonl')
+        self._record(path)
+
+        conf = dict(self.conf, replay_file=path)
+        cli = client.Client('replay://localhost', 1.1, conf)
+        self.assertRaises(errors.TransportError, cli.health)
@@ -15,8 +15,13 @@
 # limitations under the License.
 
 import json
+import time
 
+import mock
+
+from zaqarclient import auth
 from zaqarclient.tests import base
+from zaqarclient.transport import errors
 from zaqarclient.transport import request
 
 
@@ -44,3 +49,21 @@ class TestRequest(base.TestBase):
         req = request.prepare_request(auth_opts, data=data)
         self.assertTrue(isinstance(req, request.Request))
         self.assertEqual(req.content, json.dumps(data))
+
+    def test_remaining(self):
+        req = request.Request()
+        self.assertIsNone(req.remaining())
+
+        req.deadline = time.time() + 10
+        self.assertTrue(0 < req.remaining() <= 10)
+
+        req.deadline = time.time() - 1
+        self.assertRaises(errors.DeadlineExceeded, req.remaining)
+
+    def test_prepare_request_deadline_exceeded(self):
+        auth_opts = self.conf.get('auth_opts', {})
+        with mock.patch.object(auth, 'get_backend') as get_backend:
+            self.assertRaises(errors.DeadlineExceeded,
+                              request.prepare_request, auth_opts,
+                              deadline=time.time() - 1)
+            self.assertFalse(get_backend.called)
@@ -0,0 +1,105 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+from zaqarclient.queues import client
+from zaqarclient.tests import base
+from zaqarclient.tests.transport import ws as ws_server
+from zaqarclient.transport import errors
+from zaqarclient.transport import ws
+
+
+class TestWebsocketTransport(base.TestBase):
+
+    def setUp(self):
+        super(TestWebsocketTransport, self).setUp()
+        self.server = ws_server.WebsocketServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+        self.client = client.Client(self.server.url, 1.1, self.conf)
+        self.queue = self.client.queue('test_queue')
+
+    def _transport(self):
+        req, trans = self.client._request_and_transport()
+        self.addCleanup(trans.close)
+        return trans
+
+    def test_get_transport(self):
+        self.assertIsInstance(self._transport(), ws.WebsocketTransport)
+
+    def test_messages(self):
+        self._transport()
+        self.queue.post([{'ttl': 60, 'body': n} for n in range(15)])
+
+        msgs = list(self.queue.messages(echo=True).stream())
+        self.assertEqual([m.body for m in msgs], list(range(15)))
+
+        claim = self.queue.claim(ttl=30, grace=30, limit=5)
+        msgs = list(claim)
+        self.assertEqual(len(msgs), 5)
+        msgs[0].delete()
+        claim.delete()
+
+        stats = self.queue.stats['messages']
+        self.assertEqual(stats['free'], 14)
+
+    def test_error_mapping(self):
+        self._transport()
+        self.assertRaises(errors.ResourceNotFound,
+                          self.queue.message, 'nope')
+
+    def test_multiplexing(self):
+        self.server.delay = 0.05
+        self._transport()
+
+        def post(n):
+            self.queue.post({'ttl': 60, 'body': n})
+
+        threads = [threading.Thread(target=post, args=(n,))
+                   for n in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self.server.connections), 1)
+        self.assertEqual(self.queue.stats['messages']['total'], 20)
+
+    def test_timeout_forgets_request(self):
+        self.server.delay = 0.3
+        trans = self._transport()
+        trans.options = dict(self.conf, timeouts={'default': 0.05})
+        self.assertRaises(errors.RequestTimeout, self.queue.post,
+                          {'ttl': 60, 'body': 1})
+
+        conn = trans._pools[self.server.url][0]
+        self.assertEqual(conn._pending, {})
+
+    def test_reconnect(self):
+        trans = self._transport()
+        self.queue.post({'ttl': 60, 'body': 1})
+        conn = trans._pools[self.server.url][0]
+
+        self.server.drop()
+        for i in range(100):
+            if not conn.alive:
+                break
+            time.sleep(0.01)
+
+        self.queue.post({'ttl': 60, 'body': 2})
+        self.assertEqual(self.queue.stats['messages']['total'], 2)
@@ -79,6 +79,12 @@ class KeystoneAuth(base.AuthBackend):
                 'insecure': self.conf.get('insecure'),
             }
 
+            # Don't let auth go past the
+            # request's deadline.
+            remaining = request.remaining()
+            if remaining is not None:
+                ks_kwargs['timeout'] = remaining
+
             _ksclient = self._get_ksclient(**ks_kwargs)
 
             if not token:
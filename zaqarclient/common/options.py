@@ -0,0 +1,34 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+def build(cls, options):
+    """Returns an instance of `cls` out of an option's value
+
+    :param cls: Class the option configures.
+    :param options: Either an instance of `cls`, the keyword
+        arguments to build one, True to build one with the
+        default arguments or a false value.
+
+    :returns: An instance of `cls` or None if `options`
+        is a false value.
+    """
+    if not options:
+        return None
+    if isinstance(options, cls):
+        return options
+    if options is True:
+        return cls()
+    return cls(**options)
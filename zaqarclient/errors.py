@@ -12,7 +12,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-__all__ = ['ZaqarError', 'DriverLoadFailure', 'InvalidOperation']
+__all__ = ['ZaqarError', 'DriverLoadFailure', 'InvalidOperation',
+           'UnsupportedCodec', 'BlobNotFound', 'BacklogExceeded']
 
 
 class ZaqarError(Exception):
@@ -35,3 +36,19 @@ class InvalidOperation(ZaqarError):
 
 class UnsupportedVersion(ZaqarError):
     """Raised if there is no endpoint which supports the requested version."""
+
+
+class UnsupportedCodec(ZaqarError):
+    """Raised if a body codec's algorithm is not available."""
+
+
+class BodyTooLarge(ZaqarError):
+    """Raised if a compressed body decodes into a too large one."""
+
+
+class BlobNotFound(ZaqarError):
+    """Raised if a claim-check blob doesn't exist."""
+
+
+class BacklogExceeded(ZaqarError):
+    """Raised if a post is shed because of the queue's backlog."""
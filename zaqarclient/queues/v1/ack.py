@@ -0,0 +1,128 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Batched acknowledgements
+
+Deleting the messages of a claim one by one costs a round trip per
+message. An `Acker` collects the processed messages and deletes them
+with `message_delete_many`, in chunks, once enough of them are
+pending, when one is acked a while after the first pending one or
+when the claim ends::
+
+    claim = queue.claim(ttl=60, grace=60, limit=20)
+    with claim.acks() as acks:
+        for msg in claim:
+            process(msg)
+            acks.ack(msg)
+
+Servers refusing to delete claimed messages in bulk get a delete per
+message, with the claim id, instead.
+"""
+
+import threading
+import time
+
+from zaqarclient.queues.v1 import core
+import zaqarclient.transport.errors as errors
+
+# Zaqar's default maximum number of
+# messages per request.
+DEFAULT_CHUNK = 20
+
+
+class Acker(object):
+    """Deletes a claim's processed messages in batches
+
+    :param claim: The claim the messages belong to.
+    :type claim: `claim.Claim`
+    :param size: Number of pending messages triggering a
+        flush. Default: 20
+    :type size: int
+    :param interval: Seconds after the first pending message
+        was acked triggering a flush. Default: 1
+    :type interval: float
+    :param chunk: Maximum number of messages deleted per
+        request. Default: 20
+    :type chunk: int
+    """
+
+    def __init__(self, claim, size=DEFAULT_CHUNK, interval=1.0,
+                 chunk=DEFAULT_CHUNK):
+        self.claim = claim
+        self.size = size
+        self.interval = interval
+        self.chunk = chunk
+
+        # Set once the server refused a bulk delete,
+        # the following ones are skipped.
+        self.bulk = True
+
+        self._pending = []
+        self._since = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def ack(self, message):
+        """Marks `message` as processed
+
+        It's deleted by the next flush, which happens right
+        away if `size` messages are pending or `interval`
+        seconds passed since the first one was acked.
+        """
+        with self._lock:
+            if not self._pending:
+                self._since = time.time()
+            self._pending.append(message)
+            due = (len(self._pending) >= self.size or
+                   time.time() - self._since >= self.interval)
+
+        if due:
+            self.flush()
+
+    def _delete_many(self, messages):
+        queue = self.claim._queue
+        req, trans = queue.client._request_and_transport()
+        core.message_delete_many(trans, req, queue._name,
+                                 [msg._id for msg in messages])
+        for msg in messages:
+            msg._collect()
+
+    def _delete_each(self, messages):
+        for msg in messages:
+            msg.delete()
+
+    def flush(self):
+        """Deletes the pending messages"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._since = None
+
+        for start in range(0, len(pending), self.chunk):
+            messages = pending[start:start + self.chunk]
+            if self.bulk:
+                try:
+                    self._delete_many(messages)
+                    continue
+                except (errors.ForbiddenError, errors.MalformedRequest):
+                    self.bulk = False
+            self._delete_each(messages)
@@ -193,6 +193,7 @@ class V1(api.Api):
         'claim_create': {
             'ref': 'queues/{queue_name}/claims',
             'method': 'POST',
+            'timeout': 60,
             'required': ['queue_name'],
             'properties': {
                 'queue_name': {'type': 'string'},
@@ -236,6 +237,7 @@ class V1(api.Api):
             'admin': True,
             'ref': 'health',
             'method': 'GET',
+            'timeout': 5,
         },
     }
 
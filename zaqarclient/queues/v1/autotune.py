@@ -0,0 +1,148 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Claim parameters tuned out of the observed processing rate
+
+A `ClaimTuner` keeps moving averages of the time it takes to create a
+claim and to handle each of its messages, and derives from them:
+
+- `limit`: the number of messages per claim for the time spent
+  handling them to be `target` of the time spent consuming, the rest
+  being spent waiting on claims.
+- `ttl`: the time it takes to handle `limit` messages times `safety`,
+  so claims don't expire while being processed.
+
+Both are kept within the configured bounds, `limit` is lowered if
+handling it wouldn't fit in the maximum `ttl`.
+"""
+
+import math
+import threading
+
+
+class ClaimTuner(object):
+    """Tunes the claims' limit and ttl
+
+    :param min_limit: Default: 1
+    :type min_limit: int
+    :param max_limit: Default: 20
+    :type max_limit: int
+    :param min_ttl: Default: 60
+    :type min_ttl: int
+    :param max_ttl: Default: 43200
+    :type max_ttl: int
+    :param grace: Claims' grace. Default: 60
+    :type grace: int
+    :param target: Target ratio of the time spent handling
+        messages. Default: 0.9
+    :type target: float
+    :param safety: Factor applied to the expected time to
+        handle a claim to get its ttl. Default: 2
+    :type safety: float
+    :param weight: Weight of new observations in the
+        moving averages. Default: 0.2
+    :type weight: float
+    """
+
+    def __init__(self, min_limit=1, max_limit=20, min_ttl=60,
+                 max_ttl=43200, grace=60, target=0.9, safety=2.0,
+                 weight=0.2):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.grace = grace
+        self.target = target
+        self.safety = safety
+        self.weight = weight
+
+        self.limit = min(max_limit, max(min_limit, 10))
+        self.ttl = min_ttl
+        self.handle_time = None
+        self.claim_latency = None
+        self.claims = 0
+        self.messages = 0
+        self._lock = threading.Lock()
+
+    def _average(self, current, sample):
+        if current is None:
+            return sample
+        return current + self.weight * (sample - current)
+
+    def _clamp(self, value, low, high):
+        return int(min(high, max(low, value)))
+
+    def params(self):
+        """Returns the keyword arguments of the next claim"""
+        return {'limit': self.limit, 'ttl': self.ttl,
+                'grace': self.grace}
+
+    def observe_claim(self, latency):
+        """Records the seconds it took to create a claim"""
+        with self._lock:
+            self.claims += 1
+            self.claim_latency = self._average(self.claim_latency,
+                                               latency)
+            self._tune()
+
+    def observe_message(self, seconds):
+        """Records the seconds it took to handle a message"""
+        with self._lock:
+            self.messages += 1
+            self.handle_time = self._average(self.handle_time, seconds)
+            self._tune()
+
+    def _tune(self):
+        if self.handle_time is None or self.claim_latency is None:
+            return
+
+        # Avoid dividing by zero with messages handled faster
+        # than the clock's resolution.
+        handle_time = max(self.handle_time, 1e-6)
+
+        # Round first, 0.9 / 0.1 is slightly above
+        # 9 and would give 10.
+        limit = math.ceil(round(self.target / (1 - self.target) *
+                                self.claim_latency / handle_time, 6))
+        fits = (self.max_ttl - self.claim_latency) / (handle_time *
+                                                      self.safety)
+        self.limit = self._clamp(min(limit, fits),
+                                 self.min_limit, self.max_limit)
+
+        ttl = math.ceil(self.limit * handle_time * self.safety +
+                        self.claim_latency)
+        self.ttl = self._clamp(ttl, self.min_ttl, self.max_ttl)
+
+    @property
+    def utilization(self):
+        """Expected ratio of the time spent handling messages"""
+        if self.handle_time is None or self.claim_latency is None:
+            return None
+        busy = self.limit * self.handle_time
+        total = busy + self.claim_latency
+        return busy / total if total else None
+
+    @property
+    def metrics(self):
+        """The current decisions and the observations behind them"""
+        with self._lock:
+            return {'limit': self.limit,
+                    'ttl': self.ttl,
+                    'grace': self.grace,
+                    'handle_time': self.handle_time,
+                    'claim_latency': self.claim_latency,
+                    'utilization': self.utilization,
+                    'claims': self.claims,
+                    'messages': self.messages}
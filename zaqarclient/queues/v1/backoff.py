@@ -0,0 +1,85 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Adaptive polling of empty queues
+
+Claims and pops on an empty queue return nothing right away, loops
+consuming them would poll the server as fast as it answers. A
+`Backoff` spaces out the polls of a queue that keeps coming back
+empty, using decorrelated jitter, and goes back to polling right
+away as soon as a poll returns messages.
+
+The state is meant to be shared by all the workers consuming the
+same queue, the first one finding it empty slows down the rest.
+"""
+
+import random
+import threading
+import time
+
+
+class Backoff(object):
+    """Decorrelated jitter backoff for empty polls
+
+    :param base: Minimum delay, in seconds, after an
+        empty poll. Default: 0.1
+    :type base: float
+    :param cap: Maximum delay, in seconds. Default: 30
+    :type cap: float
+    """
+
+    def __init__(self, base=0.1, cap=30.0):
+        self.base = base
+        self.cap = cap
+        self.delay = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def empty(self):
+        """Records an empty poll, growing the delay"""
+        with self._lock:
+            self.delay = min(self.cap,
+                             random.uniform(self.base,
+                                            max(self.base,
+                                                self.delay * 3)))
+            self._next = time.time() + self.delay
+
+    def success(self):
+        """Records a poll that returned messages"""
+        with self._lock:
+            self.delay = 0
+            self._next = 0
+
+    def record(self, found):
+        if found:
+            self.success()
+        else:
+            self.empty()
+
+    def remaining(self):
+        """Seconds left before the next poll"""
+        return max(0, self._next - time.time())
+
+    def wait(self, timeout=None):
+        """Sleeps until the next poll is due
+
+        :param timeout: Maximum number of seconds to sleep.
+        :type timeout: float
+        """
+        delay = self.remaining()
+        if timeout is not None:
+            delay = min(delay, timeout)
+        if delay > 0:
+            time.sleep(delay)
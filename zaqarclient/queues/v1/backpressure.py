@@ -0,0 +1,156 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Producer backpressure
+
+Producers outpacing their consumers fill queues up until messages
+expire unprocessed. A `Backpressure` checks the stats of a queue
+before posting to it and, when its backlog is over the thresholds,
+either:
+
+- `SLOW`: waits `delay` seconds before posting.
+- `BLOCK`: waits for the backlog to go under the thresholds, checking
+  it every `interval` seconds at most, raising
+  `errors.BacklogExceeded` after `timeout` seconds.
+- `SHED`: raises `errors.BacklogExceeded` right away.
+
+Stats are fetched at most once every `interval` seconds per queue,
+checks in between use the cached ones.
+"""
+
+import threading
+import time
+
+from zaqarclient import errors
+import zaqarclient.transport.errors as transport_errors
+
+SLOW = 'slow'
+BLOCK = 'block'
+SHED = 'shed'
+
+
+class Backpressure(object):
+    """Holds posts back while a queue's backlog is too big
+
+    :param max_free: Maximum number of messages not claimed.
+    :type max_free: int
+    :param max_claimed: Maximum number of claimed messages.
+    :type max_claimed: int
+    :param max_age: Maximum age, in seconds, of the oldest
+        message.
+    :type max_age: int
+    :param policy: Either `SLOW`, `BLOCK` or `SHED`.
+        Default: `BLOCK`
+    :param interval: Minimum seconds between two fetches of
+        a queue's stats. Default: 5
+    :type interval: float
+    :param delay: Seconds posts wait with the `SLOW`
+        policy, and minimum seconds between two checks
+        with the `BLOCK` one. Default: 1
+    :type delay: float
+    :param timeout: Maximum seconds posts wait with the
+        `BLOCK` policy, None to wait for as long as the
+        current deadline allows. Default: None
+    :type timeout: float
+    """
+
+    def __init__(self, max_free=None, max_claimed=None, max_age=None,
+                 policy=BLOCK, interval=5.0, delay=1.0, timeout=None):
+        if policy not in (SLOW, BLOCK, SHED):
+            raise ValueError('Unknown policy: %s' % policy)
+
+        self.max_free = max_free
+        self.max_claimed = max_claimed
+        self.max_age = max_age
+        self.policy = policy
+        self.interval = interval
+        self.delay = delay
+        self.timeout = timeout
+
+        # Number of posts held back.
+        self.throttled = 0
+
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, queue):
+        try:
+            return queue.stats['messages']
+        except transport_errors.ResourceNotFound:
+            # Queues are created lazily by the first
+            # post, there's no backlog yet.
+            return {}
+
+    def sample(self, queue, refresh=False):
+        """Returns `queue`'s message stats, cached for `interval`"""
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get(queue.name)
+            if (not refresh and cached is not None and
+                    now - cached[0] < self.interval):
+                return cached[1]
+
+        stats = self._fetch(queue)
+        with self._lock:
+            self._cache[queue.name] = (time.time(), stats)
+        return stats
+
+    def _expires(self, queue):
+        with self._lock:
+            cached = self._cache.get(queue.name)
+        return cached[0] + self.interval if cached else 0
+
+    def overloaded(self, stats):
+        """Returns whether `stats` are over the thresholds"""
+        for key, limit in (('free', self.max_free),
+                           ('claimed', self.max_claimed)):
+            if limit is not None and stats.get(key, 0) > limit:
+                return True
+
+        oldest = stats.get('oldest')
+        return (self.max_age is not None and oldest is not None and
+                oldest['age'] > self.max_age)
+
+    def check(self, queue):
+        """Holds back a post to `queue` as the policy says
+
+        :raises: `errors.BacklogExceeded`
+        """
+        if not self.overloaded(self.sample(queue)):
+            return
+
+        with self._lock:
+            self.throttled += 1
+
+        if self.policy == SHED:
+            raise errors.BacklogExceeded(queue.name)
+
+        if self.policy == SLOW:
+            time.sleep(self.delay)
+            return
+
+        expires = queue.client.get_deadline()
+        if self.timeout is not None:
+            timeout = time.time() + self.timeout
+            expires = timeout if expires is None else min(expires,
+                                                          timeout)
+
+        while True:
+            wait = max(self.delay, self._expires(queue) - time.time())
+            if expires is not None and time.time() + wait >= expires:
+                raise errors.BacklogExceeded(queue.name)
+            time.sleep(wait)
+            if not self.overloaded(self.sample(queue, refresh=True)):
+                return
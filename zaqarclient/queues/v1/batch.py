@@ -0,0 +1,200 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent import futures
+import functools
+
+from zaqarclient.queues.v1 import claim as claim_api
+from zaqarclient.queues.v1 import pool as pool_api
+from zaqarclient.queues.v1 import queues
+
+
+class _Deferred(object):
+    """Records the calls made on `obj` instead of running them
+
+    Methods return a `Future` for their result. So do
+    properties, i.e: `Queue.stats`, since reading them
+    hits the server as well.
+    """
+
+    def __init__(self, batch, obj):
+        self._batch = batch
+        self._obj = obj
+
+    def __getattr__(self, name):
+        attr = getattr(type(self._obj), name, None)
+        if isinstance(attr, property):
+            return self._batch.add(getattr, self._obj, name)
+
+        value = getattr(self._obj, name)
+        if not callable(value):
+            return value
+
+        @functools.wraps(value)
+        def record(*args, **kwargs):
+            return self._batch.add(value, *args, **kwargs)
+        return record
+
+    def __repr__(self):
+        return '<Deferred %r>' % self._obj
+
+
+def _unwrap(obj):
+    if isinstance(obj, _Deferred):
+        return obj._obj
+    return obj
+
+
+class Batch(object):
+    """Runs many independent operations concurrently
+
+    Operations are recorded, either through `add` or on the
+    handles returned by `queue`, `claim` and `pool`, and run
+    once the `with` block exits, at most `concurrency` at a
+    time. Each operation gets a `Future` for its result and,
+    once the batch has run, `results` and `errors` hold the
+    outcome of every operation in the order they were
+    recorded. Errors don't stop the remaining operations.
+
+    Nothing is run if the `with` block raises.
+
+    :param client: The client to run the operations with.
+    :type client: `v1.Client`
+    :param concurrency: Maximum number of operations
+        running at the same time.
+    :type concurrency: `int`
+    """
+
+    def __init__(self, client, concurrency=10):
+        self.client = client
+        self.concurrency = concurrency
+        self.results = []
+        self.errors = []
+        self._calls = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.run()
+        else:
+            self._cancel()
+
+    def add(self, func, *args, **kwargs):
+        """Records `func(*args, **kwargs)`
+
+        :returns: A future for the call's result.
+        :rtype: `concurrent.futures.Future`
+        """
+        future = futures.Future()
+        self._calls.append((future, func, args, kwargs))
+        return future
+
+    def queue(self, name, auto_create=True):
+        """Returns a deferred queue handle
+
+        :param name: Queue's reference name.
+        :type name: `six.text_type`
+        :param auto_create: Whether to record the
+            queue's creation.
+        :type auto_create: `bool`
+        """
+        queue = _Deferred(self, queues.Queue(self.client, name,
+                                             auto_create=False))
+        if auto_create:
+            queue.ensure_exists()
+        return queue
+
+    def claim(self, queue, id=None, ttl=None, grace=None, limit=None):
+        """Returns a deferred claim handle
+
+        If `id` is not given, the claim's creation is recorded
+        instead and a future for the new `Claim` is returned.
+
+        :param queue: The queue the claim belongs to.
+        :type queue: `queues.Queue`
+        :param id: Claim's id.
+        :type id: `six.text_type`
+        """
+        queue = _unwrap(queue)
+        if id is None:
+            return self.add(claim_api.Claim, queue, ttl=ttl,
+                            grace=grace, limit=limit)
+        return _Deferred(self, claim_api.Claim(queue, id=id, ttl=ttl,
+                                               grace=grace, limit=limit))
+
+    def pool(self, name, weight=None, uri=None,
+             auto_create=True, **options):
+        """Returns a deferred pool handle
+
+        :param name: Pool's reference name.
+        :type name: `six.text_type`
+        :param auto_create: Whether to record the
+            pool's creation.
+        :type auto_create: `bool`
+        """
+        pool = _Deferred(self, pool_api.Pool(self.client, name,
+                                             weight=weight, uri=uri,
+                                             auto_create=False,
+                                             **options))
+        if auto_create:
+            pool.ensure_exists()
+        return pool
+
+    def _cancel(self):
+        calls, self._calls = self._calls, []
+        for future, func, args, kwargs in calls:
+            future.cancel()
+
+    def run(self):
+        """Runs the recorded operations
+
+        :returns: The results, in the order the
+            operations were recorded. Failed operations
+            have `None` as result and their error in
+            `errors`.
+        :rtype: `list`
+        """
+        calls, self._calls = self._calls, []
+
+        # Operations run in other threads, keep the
+        # deadline set for this one, if any.
+        deadline = self.client.get_deadline()
+
+        def call(future, func, args, kwargs):
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                with self.client.deadline(at=deadline):
+                    future.set_result(func(*args, **kwargs))
+            except Exception as ex:
+                future.set_exception(ex)
+
+        if calls:
+            workers = max(1, min(self.concurrency, len(calls)))
+            with futures.ThreadPoolExecutor(workers) as executor:
+                for item in calls:
+                    executor.submit(call, *item)
+
+        for future, func, args, kwargs in calls:
+            if future.cancelled():
+                error = futures.CancelledError()
+            else:
+                error = future.exception()
+
+            self.errors.append(error)
+            self.results.append(future.result() if error is None else None)
+        return self.results
@@ -13,21 +13,41 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import time
+
+from zaqarclient.queues.v1 import ack
 from zaqarclient.queues.v1 import core
 from zaqarclient.queues.v1 import iterator as iterate
 from zaqarclient.queues.v1 import message
 
 
 class Claim(object):
+    """A claim on a queue's messages
+
+    Iterating over it yields the claimed messages. If a
+    `dedupe.Deduplicator` is given, or set in the client's
+    `dedupe` option, messages processed already are dropped.
+    Messages acked through `acks` are deleted in batches.
+
+    On queues with a `autotune.ClaimTuner`, the parameters not
+    given are tuned and the time taken to create the claim and
+    to handle each message, until the next one is requested, is
+    fed back to the tuner.
+    """
+
     def __init__(self, queue, id=None,
-                 ttl=None, grace=None, limit=None):
+                 ttl=None, grace=None, limit=None, dedupe=None):
         self._queue = queue
+        if dedupe is None:
+            dedupe = queue.client.deduplicator
+        self._dedupe = dedupe or None
         self.id = id
         self._ttl = ttl
         self._grace = grace
         self._age = None
         self._limit = limit
         self._message_iter = None
+        self._acker = None
         if id is None:
             self._create()
 
@@ -53,12 +73,27 @@ class Claim(object):
                                                ))
 
     def _create(self):
+        tuner = self._queue.tuner
+        if tuner is not None:
+            params = tuner.params()
+            if self._ttl is None:
+                self._ttl = params['ttl']
+            if self._grace is None:
+                self._grace = params['grace']
+            if self._limit is None:
+                self._limit = params['limit']
+
+        self._queue._wait_for_poll()
         req, trans = self._queue.client._request_and_transport()
+        started = time.time()
         msgs = core.claim_create(trans, req,
                                  self._queue._name,
                                  ttl=self._ttl,
                                  grace=self._grace,
                                  limit=self._limit)
+        if tuner is not None:
+            tuner.observe_claim(time.time() - started)
+        self._queue._polled(msgs)
         # extract the id from the first message
         if msgs is not None:
             self.id = msgs[0]['href'].split('=')[-1]
@@ -72,7 +107,41 @@ class Claim(object):
     def __iter__(self):
         if self._message_iter is None:
             self._get()
-        return self._message_iter
+        messages = self._message_iter
+        if self._dedupe is not None:
+            messages = self._dedupe.filter(messages)
+        if self._queue.tuner is not None:
+            messages = self._timed(messages)
+        if self._acker is not None:
+            messages = self._flushing(messages)
+        return messages
+
+    def _timed(self, messages):
+        for msg in messages:
+            started = time.time()
+            yield msg
+            self._queue.tuner.observe_message(time.time() - started)
+
+    def _flushing(self, messages):
+        for msg in messages:
+            yield msg
+        self._acker.flush()
+
+    def acks(self, size=ack.DEFAULT_CHUNK, interval=1.0,
+             chunk=ack.DEFAULT_CHUNK):
+        """Returns the claim's batched acknowledgements
+
+        Refer to `ack.Acker` for the parameters, which only
+        apply the first time it's called. Pending messages are
+        flushed once the claim's messages are exhausted and
+        before the claim is released.
+
+        :rtype: `ack.Acker`
+        """
+        if self._acker is None:
+            self._acker = ack.Acker(self, size=size, interval=interval,
+                                    chunk=chunk)
+        return self._acker
 
     @property
     def age(self):
@@ -87,6 +156,8 @@ class Claim(object):
         return self._ttl
 
     def delete(self):
+        if self._acker is not None:
+            self._acker.flush()
         req, trans = self._queue.client._request_and_transport()
         core.claim_delete(trans, req, self._queue._name, self.id)
 
@@ -0,0 +1,189 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Claim-check offload of oversized message bodies
+
+Bodies bigger than a threshold, once serialized, are written to a
+blob store and the message posted only carries a reference to them::
+
+    {"_zcc": {"c": "<container>", "o": "<object>", "s": <size>}}
+
+Messages read from a queue with a `ClaimCheck` fetch the referenced
+body the first time it's accessed. Blob stores implement the subset
+of python-swiftclient's `Connection` API used here, so a Swift
+connection can be used as it is.
+"""
+
+import abc
+import errno
+import json
+import os
+import tempfile
+import uuid
+
+import six
+
+from zaqarclient.common import lru
+from zaqarclient import errors
+
+TAG = '_zcc'
+
+
+@six.add_metaclass(abc.ABCMeta)
+class BlobStore(object):
+    """Swift compatible blob store interface"""
+
+    @abc.abstractmethod
+    def put_object(self, container, obj, contents):
+        """Stores `contents` as `obj` within `container`"""
+
+    @abc.abstractmethod
+    def get_object(self, container, obj):
+        """Returns a `(headers, contents)` tuple
+
+        :raises: `errors.BlobNotFound`
+        """
+
+    @abc.abstractmethod
+    def delete_object(self, container, obj):
+        """Deletes `obj` from `container`"""
+
+
+class FileBlobStore(BlobStore):
+    """Stores blobs as files under `path`
+
+    Containers are directories, created when needed.
+
+    :param path: Root directory of the store.
+    :type path: `six.text_type`
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _path(self, container, obj):
+        for name in (container, obj):
+            if not name or os.sep in name or name in ('.', '..'):
+                raise ValueError('Invalid blob name: %s' % name)
+        return os.path.join(self.path, container, obj)
+
+    def put_object(self, container, obj, contents):
+        path = self._path(container, obj)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory)
+        except OSError as ex:
+            if ex.errno != errno.EEXIST:
+                raise
+
+        # Write to a temporary file first, readers must
+        # never see a partial blob.
+        fd, tmp = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, 'wb') as blob:
+            blob.write(contents)
+        os.rename(tmp, path)
+
+    def get_object(self, container, obj):
+        try:
+            with open(self._path(container, obj), 'rb') as blob:
+                return {}, blob.read()
+        except IOError as ex:
+            if ex.errno == errno.ENOENT:
+                raise errors.BlobNotFound('%s/%s' % (container, obj))
+            raise
+
+    def delete_object(self, container, obj):
+        try:
+            os.remove(self._path(container, obj))
+        except OSError as ex:
+            if ex.errno != errno.ENOENT:
+                raise
+
+
+def is_reference(body):
+    """Returns whether `body` is a claim-check reference"""
+    return (isinstance(body, dict) and len(body) == 1 and
+            isinstance(body.get(TAG), dict))
+
+
+class ClaimCheck(object):
+    """Offloads big message bodies to a blob store
+
+    :param store: Where to put the bodies.
+    :type store: `BlobStore`
+    :param container: Container to put the bodies in.
+        Default: zaqar-claim-check
+    :type container: `six.text_type`
+    :param threshold: Size, in bytes, of the serialized body
+        from which it's offloaded. Default: 65536
+    :type threshold: int
+    :param cache_size: Number of fetched bodies to keep in
+        memory. Default: 128
+    :type cache_size: int
+    :param gc: Whether to delete the blob of a message when
+        the message is deleted. Default: False
+    :type gc: `bool`
+    """
+
+    def __init__(self, store, container='zaqar-claim-check',
+                 threshold=65536, cache_size=128, gc=False):
+        self.store = store
+        self.container = container
+        self.threshold = threshold
+        self.gc = gc
+        self._cache = lru.LRU(cache_size)
+
+    def check_raw(self, body):
+        """Returns the body, or its reference, to post
+
+        :param body: The body serialized as JSON.
+        :type body: `six.text_type` or `bytes`
+        """
+        data = body
+        if isinstance(data, six.text_type):
+            data = data.encode('utf-8')
+        if len(data) < self.threshold:
+            return body
+
+        obj = uuid.uuid4().hex
+        self.store.put_object(self.container, obj, data)
+        return json.dumps({TAG: {'c': self.container,
+                                 'o': obj,
+                                 's': len(data)}})
+
+    def check(self, body):
+        """Same as `check_raw` for a body that's not serialized"""
+        raw = json.dumps(body)
+        checked = self.check_raw(raw)
+        return body if checked is raw else json.loads(checked)
+
+    def fetch(self, reference):
+        """Returns the body `reference` points to"""
+        ref = reference[TAG]
+        key = (ref['c'], ref['o'])
+
+        data = self._cache.get(key)
+        if data is None:
+            headers, data = self.store.get_object(*key)
+            self._cache.put(key, data)
+
+        return json.loads(data.decode('utf-8'))
+
+    def release(self, reference):
+        """Deletes the blob `reference` points to"""
+        ref = reference[TAG]
+        key = (ref['c'], ref['o'])
+        self._cache.pop(key)
+        self.store.delete_object(*key)
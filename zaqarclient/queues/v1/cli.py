@@ -21,6 +21,8 @@ from cliff import show
 
 from openstackclient.common import utils
 
+from zaqarclient.queues.v1 import transfer
+
 
 class CreateQueue(show.ShowOne):
     """Create a queue."""
@@ -225,3 +227,178 @@ class GetQueueStats(show.ShowOne):
         columns = ("Stats",)
         data = dict(stats=queue.stats)
         return columns, utils.get_dict_properties(data, columns)
+
+
+class CopyMessages(show.ShowOne):
+    """Copy, or move, the messages of a queue to another queue."""
+
+    log = logging.getLogger(__name__ + ".CopyMessages")
+
+    def get_parser(self, prog_name):
+        parser = super(CopyMessages, self).get_parser(prog_name)
+        parser.add_argument(
+            "source_queue",
+            metavar="<source_queue>",
+            help="Name of the queue to read the messages from")
+        parser.add_argument(
+            "target_queue",
+            metavar="<target_queue>",
+            help="Name of the queue to post the messages to")
+        parser.add_argument(
+            "--target-url",
+            metavar="<target_url>",
+            help="Zaqar endpoint of the target queue, defaults "
+                 "to the source's one")
+        parser.add_argument(
+            "--mode",
+            choices=(transfer.LIST, transfer.CLAIM),
+            default=transfer.LIST,
+            help="Whether to list or claim the messages, "
+                 "claimed messages are moved")
+        parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="Delete the messages listed once copied")
+        parser.add_argument(
+            "--batch-size",
+            metavar="<batch_size>",
+            type=int,
+            default=10,
+            help="Number of messages per post")
+        parser.add_argument(
+            "--window",
+            metavar="<window>",
+            type=int,
+            default=4,
+            help="Maximum number of posts in flight")
+        return parser
+
+    def _report(self, progress):
+        self.log.info("%d messages copied, %.1f messages/s"
+                      % (progress.messages, progress.rate))
+
+    def take_action(self, parsed_args):
+        self.log.debug("take_action(%s)" % parsed_args)
+
+        client = self.app.client_manager.messaging
+        target_client = client
+        if parsed_args.target_url:
+            target_client = client.__class__(url=parsed_args.target_url,
+                                             version=client.api_version,
+                                             conf=client.conf)
+
+        queue_name = parsed_args.source_queue
+        source = client.queue(queue_name, auto_create=False)
+        if not source.exists():
+            raise RuntimeError('Queue(%s) does not exist.' % queue_name)
+
+        target = target_client.queue(parsed_args.target_queue)
+        progress = transfer.copy(source, target, mode=parsed_args.mode,
+                                 delete=parsed_args.delete,
+                                 batch_size=parsed_args.batch_size,
+                                 window=parsed_args.window,
+                                 progress=self._report)
+
+        columns = ("Messages", "Deleted", "Seconds", "Rate")
+        data = dict(messages=progress.messages,
+                    deleted=progress.deleted,
+                    seconds=round(progress.elapsed, 2),
+                    rate=round(progress.rate, 2))
+        return columns, utils.get_dict_properties(data, columns)
+
+
+def _transfer_columns(progress):
+    columns = ("Messages", "Seconds", "Rate")
+    data = dict(messages=progress.messages,
+                seconds=round(progress.elapsed, 2),
+                rate=round(progress.rate, 2))
+    return columns, utils.get_dict_properties(data, columns)
+
+
+class ExportQueue(show.ShowOne):
+    """Export the messages of a queue to a JSON Lines file."""
+
+    log = logging.getLogger(__name__ + ".ExportQueue")
+
+    def get_parser(self, prog_name):
+        parser = super(ExportQueue, self).get_parser(prog_name)
+        parser.add_argument(
+            "queue_name",
+            metavar="<queue_name>",
+            help="Name of the queue")
+        parser.add_argument(
+            "path",
+            metavar="<path>",
+            help="File to write, gzipped if it ends with .gz")
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            default=None,
+            help="Gzip the file whatever its name")
+        parser.add_argument(
+            "--free-only",
+            action="store_true",
+            help="Skip the claimed messages")
+        return parser
+
+    def take_action(self, parsed_args):
+        self.log.debug("take_action(%s)" % parsed_args)
+
+        client = self.app.client_manager.messaging
+
+        queue_name = parsed_args.queue_name
+        queue = client.queue(queue_name, auto_create=False)
+        if not queue.exists():
+            raise RuntimeError('Queue(%s) does not exist.' % queue_name)
+
+        progress = transfer.export_queue(
+            queue, parsed_args.path, compress=parsed_args.gzip,
+            include_claimed=not parsed_args.free_only)
+        return _transfer_columns(progress)
+
+
+class ImportQueue(show.ShowOne):
+    """Post the messages of a JSON Lines file to a queue."""
+
+    log = logging.getLogger(__name__ + ".ImportQueue")
+
+    def get_parser(self, prog_name):
+        parser = super(ImportQueue, self).get_parser(prog_name)
+        parser.add_argument(
+            "queue_name",
+            metavar="<queue_name>",
+            help="Name of the queue")
+        parser.add_argument(
+            "path",
+            metavar="<path>",
+            help="File written by queue export")
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            default=None,
+            help="The file is gzipped whatever its name")
+        parser.add_argument(
+            "--batch-size",
+            metavar="<batch_size>",
+            type=int,
+            default=10,
+            help="Number of messages per post")
+        parser.add_argument(
+            "--window",
+            metavar="<window>",
+            type=int,
+            default=4,
+            help="Maximum number of posts in flight")
+        return parser
+
+    def take_action(self, parsed_args):
+        self.log.debug("take_action(%s)" % parsed_args)
+
+        client = self.app.client_manager.messaging
+
+        queue = client.queue(parsed_args.queue_name)
+        progress = transfer.import_queue(
+            queue, parsed_args.path, compress=parsed_args.gzip,
+            batch_size=parsed_args.batch_size,
+            window=parsed_args.window)
+        return _transfer_columns(progress)
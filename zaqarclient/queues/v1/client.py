@@ -13,16 +13,31 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from concurrent import futures
+import contextlib
+import threading
+import time
 import uuid
 import warnings
 
 from zaqarclient.common import decorators
+from zaqarclient.common import options
+from zaqarclient.queues.v1 import autotune
+from zaqarclient.queues.v1 import backoff as backoff_api
+from zaqarclient.queues.v1 import backpressure as backpressure_api
+from zaqarclient.queues.v1 import batch
 from zaqarclient.queues.v1 import core
+from zaqarclient.queues.v1 import dedupe
 from zaqarclient.queues.v1 import flavor
+from zaqarclient.queues.v1 import idempotency
 from zaqarclient.queues.v1 import iterator
 from zaqarclient.queues.v1 import pool
 from zaqarclient.queues.v1 import queues
+from zaqarclient.queues.v1 import sharded
 from zaqarclient import transport
+from zaqarclient.transport import coalescing
+from zaqarclient.transport import ratelimit
+from zaqarclient.transport import recording
 from zaqarclient.transport import request
 
 
@@ -39,6 +54,53 @@ class Client(object):
         - auth_opts: Authentication options:
             - backend
             - options
+        - transport: Name of the transport to use instead
+        of the one registered for the url's scheme, i.e:
+        `httplib`.
+        - record_file: Path of a file to record the
+        session to. Use it with the `replay://` transport
+        and its `replay_file` option to replay the session.
+        - coalesce_reads: Whether identical read requests
+        issued concurrently should share a single request
+        to the server. Default: False
+        - rate_limits: Requests and messages allowed per
+        second, per project and per queue. Refer to
+        `transport.ratelimit.RateLimiter`.
+        - rate_limiter: `transport.ratelimit.RateLimiter`
+        instance to share the limits with other clients.
+        - body_codec: Compression of the message bodies
+        posted, either True or the keyword arguments of
+        `codec.Codec`, i.e: `{'threshold': 65536}`. It can be
+        overridden per queue. Default: None
+        - body_max_size: Maximum size, in bytes, of the
+        compressed bodies once decoded, refer to `codec`.
+        Default: 16 MiB
+        - claim_check: `claimcheck.ClaimCheck` offloading
+        big message bodies to a blob store. It can be
+        overridden per queue. Default: None
+        - idempotent_posts: Whether queues post messages
+        with an idempotency key. It can be overridden per
+        queue. Default: False
+        - idempotency_cache_size: Number of acknowledged
+        idempotency keys to remember. Default: 10000
+        - dedupe: Whether claims drop the messages processed
+        already, either True or the keyword arguments of
+        `dedupe.Deduplicator`. Default: None
+        - polling_backoff: Whether claims and pops wait before
+        polling a queue found empty, either True or the keyword
+        arguments of `backoff.Backoff`. Default: None
+        - claim_tuning: Whether claims' limit, ttl and grace are
+        tuned out of the observed processing rate when not given,
+        either True or the keyword arguments of
+        `autotune.ClaimTuner`. Default: None
+        - backpressure: Keyword arguments of the
+        `backpressure.Backpressure` holding posts back while the
+        queues' backlogs are too big. Default: None
+        - async_workers: Maximum number of operations run
+        concurrently by the client's executor. Default: 10
+        - timeouts: Seconds to wait for a response keyed by
+        operation name, i.e: `{'claim_create': 120}`. The
+        `default` key applies to the remaining operations.
     :type options: `dict`
     """
 
@@ -50,6 +112,11 @@ class Client(object):
         self.auth_opts = self.conf.get('auth_opts', {})
         self.client_uuid = self.conf.get('client_uuid',
                                          uuid.uuid4().hex)
+        self._transports = {}
+        self._transports_lock = threading.Lock()
+        self._local = threading.local()
+        self._queue_states = {}
+        self._queue_states_lock = threading.Lock()
 
     def _get_transport(self, request):
         """Gets a transport and caches its instance
@@ -64,21 +131,150 @@ class Client(object):
         :type request: `transport.request.Request`
         """
 
-        trans = transport.get_transport_for(request,
+        trans = self._transports.get(request.endpoint)
+        if trans is not None:
+            return trans
+
+        # Concurrent first requests must share a single
+        # transport, i.e: recordings open their file once.
+        with self._transports_lock:
+            trans = self._transports.get(request.endpoint)
+            if trans is None:
+                trans = self._build_transport(request)
+                self._transports[request.endpoint] = trans
+        return trans
+
+    def _build_transport(self, request):
+        name = self.conf.get('transport')
+        if name:
+            trans = transport.get_transport(name, self.api_version,
                                             options=self.conf)
-        return (trans or self.transport)
+        else:
+            trans = transport.get_transport_for(request,
+                                                self.api_version,
+                                                options=self.conf)
+        if self.conf.get('record_file'):
+            trans = recording.RecordingTransport(self.conf, trans)
+        if (self.conf.get('rate_limits') or
+                self.conf.get('rate_limiter')):
+            trans = ratelimit.RateLimitingTransport(self.conf, trans)
+        if self.conf.get('coalesce_reads'):
+            trans = coalescing.CoalescingTransport(self.conf, trans)
+        trans.executor = self.executor
+        return trans
 
     def _request_and_transport(self):
         api = 'queues.v' + str(self.api_version)
         req = request.prepare_request(self.auth_opts,
                                       endpoint=self.api_url,
-                                      api=api)
+                                      api=api,
+                                      deadline=self.get_deadline())
 
         req.headers['Client-ID'] = self.client_uuid
 
         trans = self._get_transport(req)
         return req, trans
 
+    @decorators.lazy_property(write=False)
+    def publisher(self):
+        """Keys and acknowledgements of idempotent posts"""
+        return idempotency.Publisher(
+            self.client_uuid,
+            int(self.conf.get('idempotency_cache_size', 10000)))
+
+    @decorators.lazy_property(write=False)
+    def deduplicator(self):
+        """Drops redelivered messages in this client's claims"""
+        return options.build(dedupe.Deduplicator, self.conf.get('dedupe'))
+
+    @decorators.lazy_property(write=False)
+    def backpressure(self):
+        """Holds posts back while queues' backlogs are too big"""
+        return options.build(backpressure_api.Backpressure,
+                             self.conf.get('backpressure'))
+
+    @decorators.lazy_property(write=False)
+    def executor(self):
+        """Executor running this client's asynchronous operations"""
+        return futures.ThreadPoolExecutor(
+            int(self.conf.get('async_workers', 10)))
+
+    def _queue_state(self, option, queue_name, cls):
+        value = self.conf.get(option)
+        if not value:
+            return None
+
+        with self._queue_states_lock:
+            key = (option, queue_name)
+            state = self._queue_states.get(key)
+            if state is None:
+                state = options.build(cls, value)
+                self._queue_states[key] = state
+            return state
+
+    def backoff(self, queue_name):
+        """Returns the polling backoff of `queue_name`
+
+        The same instance is shared by all this client's
+        consumers of the queue.
+
+        :returns: A `backoff.Backoff` or None if the
+            `polling_backoff` option is not set.
+        """
+        return self._queue_state('polling_backoff', queue_name,
+                                 backoff_api.Backoff)
+
+    def claim_tuner(self, queue_name):
+        """Returns the claim tuner of `queue_name`
+
+        The same instance is shared by all this client's
+        consumers of the queue.
+
+        :returns: An `autotune.ClaimTuner` or None if the
+            `claim_tuning` option is not set.
+        """
+        return self._queue_state('claim_tuning', queue_name,
+                                 autotune.ClaimTuner)
+
+    def get_deadline(self):
+        """Returns the deadline set for the current thread
+
+        :returns: The deadline, as returned by `time.time`,
+            or None if there's none.
+        :rtype: float
+        """
+        return getattr(self._local, 'deadline', None)
+
+    @contextlib.contextmanager
+    def deadline(self, timeout=None, at=None):
+        """Sets a deadline for the operations issued within
+
+        Every request sent by the current thread within this
+        context, authentication, iterator pages and bulk
+        operations included, won't wait past the deadline and
+        raises `DeadlineExceeded` once it's been reached.
+        Nested deadlines can only shorten the current one.
+
+        :param timeout: Seconds from now.
+        :type timeout: float
+        :param at: Absolute deadline, as returned by `time.time`.
+        :type at: float
+        """
+        previous = self.get_deadline()
+
+        deadline = at
+        if timeout is not None:
+            deadline = time.time() + timeout
+        if deadline is None or (previous is not None and
+                                previous < deadline):
+            deadline = previous
+
+        self._local.deadline = deadline
+        try:
+            yield deadline
+        finally:
+            self._local.deadline = previous
+
     def transport(self):
         """Gets a transport based the api url and version."""
         return transport.get_transport_for(self.api_url,
@@ -95,6 +291,19 @@ class Client(object):
         """
         return queues.Queue(self, ref, **kwargs)
 
+    def sharded_queue(self, ref, shards, **kwargs):
+        """Returns a queue spread over `shards` physical queues
+
+        :param ref: Logical queue's name.
+        :type ref: `six.text_type`
+        :param shards: Number of physical queues.
+        :type shards: int
+
+        :returns: A sharded queue instance
+        :rtype: `sharded.ShardedQueue`
+        """
+        return sharded.ShardedQueue(self, ref, shards, **kwargs)
+
     def queues(self, **params):
         """Gets a list of queues from the server
 
@@ -110,6 +319,26 @@ class Client(object):
                                   'queues',
                                   queues.create_object(self))
 
+    def batch(self, concurrency=10):
+        """Returns a batch to run many operations concurrently
+
+        Use it as a context manager, the operations recorded
+        within the `with` block are run when it exits::
+
+            with client.batch(concurrency=20) as b:
+                for name in names:
+                    b.queue(name).metadata({'owner': 'me'})
+
+            print(b.results, b.errors)
+
+        :param concurrency: Maximum number of operations
+            running at the same time.
+        :type concurrency: `int`
+
+        :rtype: `batch.Batch`
+        """
+        return batch.Batch(self, concurrency)
+
     def follow(self, ref):
         """Follows ref.
 
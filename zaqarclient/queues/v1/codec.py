@@ -0,0 +1,163 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compression of large message bodies
+
+Bodies bigger than a threshold, once serialized, are compressed
+and posted within an envelope::
+
+    {"_zc": "zlib", "d": "<base64 of the compressed JSON body>"}
+
+Envelopes are recognized and decoded when messages are read, so
+consumers don't need any configuration. Bodies below the threshold
+are posted as they are and stay readable by any consumer.
+
+Decoded bodies can't be bigger than `max_size` bytes, refer to the
+client's `body_max_size` option, so a small envelope can't inflate
+into a body exhausting the consumer's memory.
+"""
+
+import base64
+import json
+import zlib
+
+import six
+
+from zaqarclient import errors
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+TAG = '_zc'
+DATA = 'd'
+
+# Maximum size, in bytes, of a decoded body.
+MAX_SIZE = 16 * 1024 * 1024
+
+
+def _zlib_decompress(data, max_size):
+    # Ask for one byte more than allowed to tell
+    # whether the body is too large.
+    return zlib.decompressobj().decompress(data, max_size + 1)
+
+
+def _zstd_compress(data, level):
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def _zstd_decompress(data, max_size):
+    # Frames may declare their content size, which
+    # `decompress` would allocate upfront. Read the stream
+    # instead, it never holds more than what was read.
+    chunks = []
+    size = 0
+    with zstandard.ZstdDecompressor().stream_reader(data) as reader:
+        while size <= max_size:
+            chunk = reader.read(max_size + 1 - size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+    return b''.join(chunks)
+
+
+_ALGORITHMS = {
+    'zlib': (zlib.compress, _zlib_decompress),
+}
+
+if zstandard is not None:
+    _ALGORITHMS['zstd'] = (_zstd_compress, _zstd_decompress)
+
+
+def is_envelope(body):
+    """Returns whether `body` is a compressed body's envelope"""
+    return (isinstance(body, dict) and len(body) == 2 and
+            body.get(TAG) in _ALGORITHMS and
+            isinstance(body.get(DATA), six.string_types))
+
+
+def decode(body, max_size=None):
+    """Returns the original body of an envelope
+
+    Anything that's not an envelope is returned as it is.
+
+    :param max_size: Maximum size, in bytes, of the decoded
+        body. Default: `MAX_SIZE`
+    :type max_size: int
+    :raises: `errors.BodyTooLarge` if the decoded body
+        would be bigger than `max_size`.
+    """
+    if not is_envelope(body):
+        return body
+
+    if max_size is None:
+        max_size = MAX_SIZE
+
+    decompress = _ALGORITHMS[body[TAG]][1]
+    data = decompress(base64.b64decode(body[DATA]), max_size)
+    if len(data) > max_size:
+        raise errors.BodyTooLarge('Decoded body exceeds %d bytes'
+                                  % max_size)
+    return json.loads(data.decode('utf-8'))
+
+
+class Codec(object):
+    """Compresses message bodies above a size threshold
+
+    :param algorithm: Either `zlib` or, if the `zstandard`
+        package is installed, `zstd`. Default: `zlib`
+    :type algorithm: `six.text_type`
+    :param threshold: Size, in bytes, of the serialized body
+        from which it gets compressed. Default: 4096
+    :type threshold: int
+    :param level: Compression level. Default: 6
+    :type level: int
+    """
+
+    def __init__(self, algorithm='zlib', threshold=4096, level=6):
+        if algorithm not in _ALGORITHMS:
+            raise errors.UnsupportedCodec('%s is not supported' % algorithm)
+
+        self.algorithm = algorithm
+        self.threshold = threshold
+        self.level = level
+        self._compress = _ALGORITHMS[algorithm][0]
+
+    def _envelope(self, data):
+        compressed = self._compress(data, self.level)
+        return {TAG: self.algorithm,
+                DATA: base64.b64encode(compressed).decode('ascii')}
+
+    def encode(self, body):
+        """Returns the body to post instead of `body`"""
+        data = json.dumps(body).encode('utf-8')
+        if len(data) < self.threshold:
+            return body
+        return self._envelope(data)
+
+    def encode_raw(self, body):
+        """Same as `encode` for a serialized body
+
+        :param body: The body serialized as JSON.
+        :type body: `six.text_type` or `bytes`
+        """
+        data = body
+        if isinstance(data, six.text_type):
+            data = data.encode('utf-8')
+        if len(data) < self.threshold:
+            return body
+        return json.dumps(self._envelope(data))
@@ -0,0 +1,239 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Prioritized consumption of several queues
+
+Priorities are usually modeled as separate queues. A
+`MultiQueueConsumer` claims from all of them concurrently and hands
+out the claims following either policy:
+
+- `WEIGHTED`: smooth weighted round robin, queues get claims in
+  proportion to their weight.
+- `STRICT`: queues are served in order, a queue that's been skipped
+  `starvation` times in a row is served next though.
+
+Queues found empty are not claimed from again until their polling
+backoff, refer to `backoff`, allows it. Queues without a backoff get
+one of their own. Claims not handed out right away are buffered,
+one per queue, until they are. Like in `prefetch`, buffered claims
+about to expire are released instead of being handed out::
+
+    consumer = MultiQueueConsumer([high, low], weights=[4, 1],
+                                  ttl=60, grace=60, limit=10)
+    for msg in consumer:
+        process(msg)
+        msg.delete()
+"""
+
+from concurrent import futures
+import time
+
+from zaqarclient.queues.v1 import backoff as backoff_api
+from zaqarclient.queues.v1 import prefetch
+
+WEIGHTED = 'weighted'
+STRICT = 'strict'
+
+
+class MultiQueueConsumer(object):
+    """Claims messages from several queues
+
+    :param queues: Queues to consume, in priority order.
+    :type queues: List of `queues.Queue`
+    :param weights: Weight of each queue with the `WEIGHTED`
+        policy. Default: 1 for every queue
+    :type weights: List of int
+    :param policy: Either `WEIGHTED` or `STRICT`.
+    :param starvation: Number of consecutive times a queue
+        can be skipped with the `STRICT` policy. Default: 10
+    :type starvation: int
+    :param ttl: Claims' ttl. Tuned on queues with a
+        `autotune.ClaimTuner`, 60 otherwise.
+    :type ttl: int
+    :param grace: Claims' grace. Tuned on queues with a
+        `autotune.ClaimTuner`, 60 otherwise.
+    :type grace: int
+    :param limit: Maximum number of messages per claim.
+    :param headroom: Seconds before their claim expires
+        from which buffered claims are not handed out anymore.
+        Defaults to a tenth of the claim's ttl.
+    :type headroom: float
+    """
+
+    def __init__(self, queues, weights=None, policy=WEIGHTED,
+                 starvation=10, ttl=None, grace=None, limit=None,
+                 headroom=None):
+        if policy not in (WEIGHTED, STRICT):
+            raise ValueError('Unknown policy: %s' % policy)
+
+        weights = weights or [1] * len(queues)
+        if len(weights) != len(queues):
+            raise ValueError('There must be a weight per queue')
+
+        self.queues = queues
+        self.weights = weights
+        self.policy = policy
+        self.starvation = starvation
+        self.ttl = ttl
+        self.grace = grace
+        self.limit = limit
+        self.headroom = headroom
+
+        # Number of buffered claims released because they were too old.
+        self.expired = 0
+
+        self._backoffs = [queue.backoff or backoff_api.Backoff()
+                          for queue in queues]
+        self._ready = [None] * len(queues)
+        self._pending = {}
+        self._current = [0] * len(queues)
+        self._skipped = [0] * len(queues)
+
+    def __iter__(self):
+        while True:
+            claim = self.claim()
+            for msg in claim:
+                yield msg
+
+    def _claim(self, queue, deadline):
+        with queue.client.deadline(at=deadline):
+            return prefetch.timed_claim(queue, ttl=self.ttl,
+                                        grace=self.grace, limit=self.limit)
+
+    def _submit(self):
+        for index, queue in enumerate(self.queues):
+            if (self._ready[index] is not None or
+                    index in self._pending or
+                    self._backoffs[index].remaining() > 0):
+                continue
+            deadline = queue.client.get_deadline()
+            future = queue.client.executor.submit(self._claim, queue,
+                                                  deadline)
+            self._pending[index] = future
+
+    def _collect(self, timeout):
+        """Buffers the claims created within `timeout` seconds"""
+        if not self._pending:
+            return
+
+        done, _ = futures.wait(list(self._pending.values()),
+                               timeout=timeout,
+                               return_when=futures.FIRST_COMPLETED)
+        for index, future in list(self._pending.items()):
+            if future not in done:
+                continue
+
+            del self._pending[index]
+            claim, expires = future.result()
+            if self.queues[index].backoff is None:
+                self._backoffs[index].record(claim.id is not None)
+            if claim.id is not None:
+                self._ready[index] = (claim, expires)
+
+    def _release_stale(self):
+        for index, ready in enumerate(self._ready):
+            if (ready is not None and
+                    prefetch.is_stale(ready[0], ready[1], self.headroom)):
+                self.expired += 1
+                self._ready[index] = None
+                ready[0].delete()
+
+    def _pick_weighted(self, ready):
+        total = 0
+        for index in ready:
+            self._current[index] += self.weights[index]
+            total += self.weights[index]
+
+        picked = max(ready, key=lambda index: self._current[index])
+        self._current[picked] -= total
+        return picked
+
+    def _pick_strict(self, ready):
+        picked = ready[0]
+        for index in ready:
+            if self._skipped[index] >= self.starvation:
+                picked = index
+                break
+
+        for index in ready:
+            self._skipped[index] += 1
+        self._skipped[picked] = 0
+        return picked
+
+    def _pick(self):
+        ready = [index for index, claim in enumerate(self._ready)
+                 if claim is not None]
+        if not ready:
+            return None
+
+        if self.policy == WEIGHTED:
+            picked = self._pick_weighted(ready)
+        else:
+            picked = self._pick_strict(ready)
+
+        claim = self._ready[picked][0]
+        self._ready[picked] = None
+        return claim
+
+    def claim(self, timeout=None):
+        """Returns the next claim to process
+
+        Waits for a queue to have messages, for up to `timeout`
+        seconds if given.
+
+        :returns: A claim, or None if `timeout` passed.
+        :rtype: `claim.Claim`
+        """
+        expires = None
+        if timeout is not None:
+            expires = time.time() + timeout
+
+        while True:
+            self._submit()
+            self._collect(0)
+            self._release_stale()
+            claim = self._pick()
+            if claim is not None:
+                return claim
+
+            # Wait for either a claim to be created or a queue's
+            # backoff to let it be claimed from again.
+            idle = [backoff.remaining()
+                    for index, backoff in enumerate(self._backoffs)
+                    if index not in self._pending]
+            delay = min(idle) if idle else None
+            if expires is not None:
+                left = expires - time.time()
+                if left <= 0:
+                    return None
+                delay = left if delay is None else min(delay, left)
+
+            if self._pending:
+                self._collect(delay)
+            else:
+                time.sleep(delay)
+
+    def close(self):
+        """Releases the buffered claims
+
+        Claims being created are waited for and released too.
+        """
+        while self._pending:
+            self._collect(None)
+
+        for index, ready in enumerate(self._ready):
+            if ready is not None:
+                self._ready[index] = None
+                ready[0].delete()
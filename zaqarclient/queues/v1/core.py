@@ -25,14 +25,52 @@ Functions present in this module assume that:
 
     2. Transport instance holds the conf instance to use for this
     request.
+
+Every operation is sent asynchronously when called with a `callback`
+or with `async_=True`. It's then run by the transport's executor and a
+`concurrent.futures.Future` for its result is returned right away. The
+callback, if any, is called with that future once it's done.
 """
 
+import functools
+import inspect
 import json
 import warnings
 
+import six
+
 import zaqarclient.transport.errors as errors
 
 
+def _asynchronous(func):
+    """Runs `func` in the transport's executor when asked to"""
+
+    # `callback` may be passed positionally, find out where it'd be
+    # within the arguments following `transport` and `request`.
+    getargspec = getattr(inspect, 'getfullargspec', None)
+    arg_names = (getargspec or inspect.getargspec)(func).args
+    position = None
+    if 'callback' in arg_names:
+        position = arg_names.index('callback') - 2
+
+    @functools.wraps(func)
+    def wrapper(transport, request, *args, **kwargs):
+        callback = kwargs.pop('callback', None)
+        if position is not None and len(args) > position:
+            callback = args[position]
+            args = args[:position] + (None,) + args[position + 1:]
+
+        if not (kwargs.pop('async_', False) or callback):
+            return func(transport, request, *args, **kwargs)
+
+        future = transport.get_executor().submit(func, transport,
+                                                 request, *args, **kwargs)
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+    return wrapper
+
+
 def _common_queue_ops(operation, transport, request, name, callback=None):
     """Function for common operation
 
@@ -47,7 +85,6 @@ def _common_queue_ops(operation, transport, request, name, callback=None):
     :type name: `six.text_type`
     :param callback: Optional callable to use as callback.
         If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
     :type callback: Callable object.
     """
     request.operation = operation
@@ -56,6 +93,7 @@ def _common_queue_ops(operation, transport, request, name, callback=None):
     return resp.deserialized_content
 
 
+@_asynchronous
 def queue_create(transport, request, name,
                  metadata=None, callback=None):
     """Creates a queue
@@ -70,7 +108,6 @@ def queue_create(transport, request, name,
     :type metadata: `dict`
     :param callback: Optional callable to use as callback.
         If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
     :type callback: Callable object.
     """
 
@@ -82,6 +119,7 @@ def queue_create(transport, request, name,
     return resp.deserialized_content
 
 
+@_asynchronous
 def queue_exists(transport, request, name, callback=None):
     """Checks if the queue exists."""
     try:
@@ -92,12 +130,14 @@ def queue_exists(transport, request, name, callback=None):
         return False
 
 
+@_asynchronous
 def queue_get_metadata(transport, request, name, callback=None):
     """Gets queue metadata."""
     return _common_queue_ops('queue_get_metadata', transport,
                              request, name, callback=callback)
 
 
+@_asynchronous
 def queue_set_metadata(transport, request, name, metadata, callback=None):
     """Sets queue metadata."""
 
@@ -108,17 +148,20 @@ def queue_set_metadata(transport, request, name, metadata, callback=None):
     transport.send(request)
 
 
+@_asynchronous
 def queue_get_stats(transport, request, name):
     return _common_queue_ops('queue_get_stats', transport,
                              request, name)
 
 
+@_asynchronous
 def queue_delete(transport, request, name, callback=None):
     """Deletes queue."""
     return _common_queue_ops('queue_delete', transport,
                              request, name, callback=callback)
 
 
+@_asynchronous
 def queue_list(transport, request, callback=None, **kwargs):
     """Gets a list of queues
 
@@ -128,7 +171,6 @@ def queue_list(transport, request, callback=None, **kwargs):
     :type request: `transport.request.Request`
     :param callback: Optional callable to use as callback.
         If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
     :type callback: Callable object.
     :param kwargs: Optional arguments for this operation.
         - marker: Where to start getting queues from.
@@ -147,6 +189,7 @@ def queue_list(transport, request, callback=None, **kwargs):
     return resp.deserialized_content
 
 
+@_asynchronous
 def message_list(transport, request, queue_name, callback=None, **kwargs):
     """Gets a list of messages in queue `queue_name`
 
@@ -158,7 +201,6 @@ def message_list(transport, request, queue_name, callback=None, **kwargs):
     :type queue_name: `six.text_type`
     :param callback: Optional callable to use as callback.
         If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
     :type callback: Callable object.
     :param kwargs: Optional arguments for this operation.
         - marker: Where to start getting messages from.
@@ -189,6 +231,7 @@ def message_list(transport, request, queue_name, callback=None, **kwargs):
     return resp.deserialized_content
 
 
+@_asynchronous
 def message_post(transport, request, queue_name, messages, callback=None):
     """Post messages to `queue_name`
 
@@ -202,7 +245,6 @@ def message_post(transport, request, queue_name, messages, callback=None):
     :param messages: `list`
     :param callback: Optional callable to use as callback.
         If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
     :type callback: Callable object.
     """
 
@@ -214,6 +256,43 @@ def message_post(transport, request, queue_name, messages, callback=None):
     return resp.deserialized_content
 
 
+@_asynchronous
+def message_post_raw(transport, request, queue_name, messages,
+                     callback=None):
+    """Post pre-serialized messages to `queue_name`
+
+    The bodies are spliced into the request's content as
+    they are, they're neither decoded nor validated.
+
+    :param transport: Transport instance to use
+    :type transport: `transport.base.Transport`
+    :param request: Request instance ready to be sent.
+    :type request: `transport.request.Request`
+    :param queue_name: Queue reference name.
+    :type queue_name: `six.text_type`
+    :param messages: `(ttl, body)` pairs, where body is the
+        message's body serialized as JSON.
+    :param messages: `list`
+    :param callback: Optional callable to use as callback.
+        If specified, this request will be sent asynchronously.
+    :type callback: Callable object.
+    """
+
+    items = []
+    for ttl, body in messages:
+        if isinstance(body, six.binary_type):
+            body = body.decode('utf-8')
+        items.append('{"ttl": %d, "body": %s}' % (ttl, body))
+
+    request.operation = 'message_post'
+    request.params['queue_name'] = queue_name
+    request.content = '[' + ', '.join(items) + ']'
+
+    resp = transport.send(request)
+    return resp.deserialized_content
+
+
+@_asynchronous
 def message_get(transport, request, queue_name, message_id, callback=None):
     """Gets one message from the queue by id
 
@@ -227,7 +306,6 @@ def message_get(transport, request, queue_name, message_id, callback=None):
     :param message_id: `six.text_type`
     :param callback: Optional callable to use as callback.
         If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
     :type callback: Callable object.
     """
 
@@ -239,6 +317,7 @@ def message_get(transport, request, queue_name, message_id, callback=None):
     return resp.deserialized_content
 
 
+@_asynchronous
 def message_get_many(transport, request, queue_name, messages, callback=None):
     """Gets many messages by id
 
@@ -252,7 +331,6 @@ def message_get_many(transport, request, queue_name, messages, callback=None):
     :param messages: list of `six.text_type`
     :param callback: Optional callable to use as callback.
         If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
     :type callback: Callable object.
     """
 
@@ -264,6 +342,7 @@ def message_get_many(transport, request, queue_name, messages, callback=None):
     return resp.deserialized_content
 
 
+@_asynchronous
 def message_delete(transport, request, queue_name, message_id,
                    claim_id=None, callback=None):
     """Deletes messages from `queue_name`
@@ -278,7 +357,6 @@ def message_delete(transport, request, queue_name, message_id,
     :param message_id: `six.text_type`
     :param callback: Optional callable to use as callback.
         If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
     :type callback: Callable object.
     """
 
@@ -291,6 +369,7 @@ def message_delete(transport, request, queue_name, message_id,
     transport.send(request)
 
 
+@_asynchronous
 def message_delete_many(transport, request, queue_name,
                         ids, callback=None):
     """Deletes `ids` messages from `queue_name`
@@ -305,7 +384,6 @@ def message_delete_many(transport, request, queue_name,
     :type ids: List of `six.text_type`
     :param callback: Optional callable to use as callback.
         If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
     :type callback: Callable object.
     """
 
@@ -315,6 +393,7 @@ def message_delete_many(transport, request, queue_name,
     transport.send(request)
 
 
+@_asynchronous
 def message_pop(transport, request, queue_name,
                 count, callback=None):
     """Pops out `count` messages from `queue_name`
@@ -329,16 +408,18 @@ def message_pop(transport, request, queue_name,
     :type count: int
     :param callback: Optional callable to use as callback.
         If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
     :type callback: Callable object.
     """
 
     request.operation = 'message_delete_many'
     request.params['queue_name'] = queue_name
     request.params['pop'] = count
-    transport.send(request)
+
+    resp = transport.send(request)
+    return resp.deserialized_content
 
 
+@_asynchronous
 def claim_create(transport, request, queue_name, **kwargs):
     """Creates a Claim `claim_id` on the queue `queue_name`
 
@@ -356,6 +437,7 @@ def claim_create(transport, request, queue_name, **kwargs):
     return resp.deserialized_content
 
 
+@_asynchronous
 def claim_get(transport, request, queue_name, claim_id):
     """Gets a Claim `claim_id`
 
@@ -373,6 +455,7 @@ def claim_get(transport, request, queue_name, claim_id):
     return resp.deserialized_content
 
 
+@_asynchronous
 def claim_update(transport, request, queue_name, claim_id, **kwargs):
     """Updates a Claim `claim_id`
 
@@ -391,6 +474,7 @@ def claim_update(transport, request, queue_name, claim_id, **kwargs):
     return resp.deserialized_content
 
 
+@_asynchronous
 def claim_delete(transport, request, queue_name, claim_id):
     """Deletes a Claim `claim_id`
 
@@ -406,18 +490,21 @@ def claim_delete(transport, request, queue_name, claim_id):
     transport.send(request)
 
 
+@_asynchronous
 def shard_create(transport, request, pool_name, pool_data):
     warnings.warn(_('`shard_create`\'s been renamed to `pool_create` '),
                   DeprecationWarning, stacklevel=2)
     return pool_create(transport, request, pool_name, pool_data)
 
 
+@_asynchronous
 def shard_delete(transport, request, pool_name):
     warnings.warn(_('`shard_delete`\'s been renamed to `pool_delete` '),
                   DeprecationWarning, stacklevel=2)
     return pool_delete(transport, request, pool_name)
 
 
+@_asynchronous
 def pool_create(transport, request, pool_name, pool_data):
     """Creates a pool called `pool_name`
 
@@ -437,6 +524,7 @@ def pool_create(transport, request, pool_name, pool_data):
     transport.send(request)
 
 
+@_asynchronous
 def pool_delete(transport, request, pool_name):
     """Deletes the pool `pool_name`
 
@@ -453,6 +541,7 @@ def pool_delete(transport, request, pool_name):
     transport.send(request)
 
 
+@_asynchronous
 def flavor_create(transport, request, name, flavor_data):
     """Creates a flavor called `name`
 
@@ -472,6 +561,7 @@ def flavor_create(transport, request, name, flavor_data):
     transport.send(request)
 
 
+@_asynchronous
 def flavor_delete(transport, request, name):
     """Deletes the flavor `name`
 
@@ -488,6 +578,7 @@ def flavor_delete(transport, request, name):
     transport.send(request)
 
 
+@_asynchronous
 def health(transport, request, callback=None):
     """Check the health of web head for load balancing
 
@@ -497,7 +588,6 @@ def health(transport, request, callback=None):
     :type request: `transport.request.Request`
     :param callback: Optional callable to use as callback.
         If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
     :type callback: Callable object.
     """
 
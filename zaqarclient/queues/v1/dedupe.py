@@ -0,0 +1,94 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Consumer side deduplication
+
+Messages are redelivered when their claim expires while they're being
+processed. A `Deduplicator` remembers the messages processed lately
+and drops, deleting them right away, the ones seen again.
+
+Messages are identified by their idempotency key, if they were posted
+with one, refer to `idempotency`, and by their id otherwise. The set
+is an exact LRU bounded both in size and time. Bloom filters would
+use less memory, but their false positives would delete messages
+that were never processed.
+"""
+
+import threading
+import time
+
+from zaqarclient.common import lru
+import zaqarclient.transport.errors as errors
+
+
+def _identity(message):
+    return message.key or message._id
+
+
+class Deduplicator(object):
+    """Drops the messages processed already
+
+    Share a single instance among all the claims of a
+    consumer, duplicates come in different claims.
+
+    :param size: Maximum number of messages to remember.
+        Default: 100000
+    :type size: int
+    :param ttl: Seconds messages are remembered for. It should
+        be longer than the claims' ttl. Default: 3600
+    :type ttl: int
+    """
+
+    def __init__(self, size=100000, ttl=3600):
+        self.ttl = ttl
+        self.dropped = 0
+        self._seen = lru.LRU(size)
+        self._lock = threading.Lock()
+
+    def seen(self, message):
+        """Returns whether `message` was processed already"""
+        stamp = self._seen.get(_identity(message))
+        return stamp is not None and time.time() - stamp < self.ttl
+
+    def mark(self, message):
+        """Remembers `message` as processed"""
+        self._seen.put(_identity(message), time.time())
+
+    def _drop(self, message):
+        with self._lock:
+            self.dropped += 1
+
+        try:
+            message.delete()
+        except errors.ResourceNotFound:
+            # Deleted by whoever processed it,
+            # that's fine.
+            pass
+
+    def filter(self, messages):
+        """Yields the messages not processed yet
+
+        Duplicates are deleted and counted in `dropped`. A
+        message is remembered as processed once the next one
+        is requested, so messages whose processing raised are
+        not.
+        """
+        for message in messages:
+            if self.seen(message):
+                self._drop(message)
+                continue
+
+            yield message
+            self.mark(message)
@@ -0,0 +1,110 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Idempotent publishing
+
+Messages posted to an idempotent queue get a key, made out of the
+client's uuid and a sequence number, which travels with the body::
+
+    {"_zk": "<client_uuid>:<sequence>", "b": <body>}
+
+The key is stored in the message dict given to `Queue.post`, so
+posting the same dict again is a retry. Keys already acknowledged by
+the server are remembered, in a bounded LRU, and their retries are
+not sent again. Retries of posts whose acknowledgement was lost,
+i.e: timed out, still reach the server, consumers can drop those
+duplicates cheaply by key.
+"""
+
+import itertools
+
+from zaqarclient.common import lru
+
+TAG = '_zk'
+BODY = 'b'
+
+# Key of the message dicts holding their key. It's
+# never sent to the server as such.
+KEY = 'key'
+
+
+def is_keyed(body):
+    """Returns whether `body` carries an idempotency key"""
+    return (isinstance(body, dict) and len(body) == 2 and
+            TAG in body and BODY in body)
+
+
+def wrap(key, body):
+    return {TAG: key, BODY: body}
+
+
+def keyed(key, message):
+    """Returns the message to send for `message`"""
+    message = dict(message, body=wrap(key, message['body']))
+    message.pop(KEY, None)
+    return message
+
+
+def unwrap(body):
+    """Returns the key and the actual body of `body`
+
+    The key is None if `body` doesn't carry one.
+    """
+    if is_keyed(body):
+        return body[TAG], body[BODY]
+    return None, body
+
+
+class Publisher(object):
+    """Generates keys and keeps track of the acknowledged ones
+
+    :param client_uuid: Prefix of the keys.
+    :type client_uuid: `six.text_type`
+    :param size: Number of acknowledged keys to remember.
+    :type size: int
+    """
+
+    def __init__(self, client_uuid, size=10000):
+        self.client_uuid = client_uuid
+        self.acked = lru.LRU(size)
+        self._sequence = itertools.count()
+
+    def next_key(self):
+        return '%s:%d' % (self.client_uuid, next(self._sequence))
+
+    def prepare(self, messages):
+        """Splits `messages` into acknowledged and pending ones
+
+        Messages without a key get one.
+
+        :returns: A tuple with the list of resources, None for
+            the pending messages, and the list of `(index, key,
+            message)` tuples to send.
+        """
+        resources = []
+        pending = []
+        for index, message in enumerate(messages):
+            key = message.get(KEY)
+            if key is None:
+                key = message[KEY] = self.next_key()
+
+            href = self.acked.get(key)
+            if href is None:
+                pending.append((index, key, message))
+            resources.append(href)
+        return resources, pending
+
+    def ack(self, key, href):
+        self.acked.put(key, href)
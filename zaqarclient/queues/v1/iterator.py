@@ -40,6 +40,10 @@ class _Iterator(object):
     def __init__(self, client, listing_response, iter_key, create_function):
         self._client = client
         self._iter_key = iter_key
+
+        # Pages may be fetched once the deadline's
+        # context is gone, keep it around.
+        self._deadline = client.get_deadline()
         self._create_function = create_function
 
         self._links = []
@@ -48,9 +52,10 @@ class _Iterator(object):
 
         # NOTE(flaper87): Simple hack to
         # re-use the iterator for get_many_messages
-        # and message listing.
+        # and message listing. Responses that can't
+        # be paged through, like pops, have no links.
         if isinstance(listing_response, dict):
-            self._links = listing_response['links']
+            self._links = listing_response.get('links', [])
             self._listing_response = listing_response[self._iter_key]
 
     def __iter__(self):
@@ -82,7 +87,8 @@ class _Iterator(object):
                 # NOTE(flaper87): We already have the
                 # ref for the next set of messages, lets
                 # just follow it.
-                iterables = self._client.follow(link['href'])
+                with self._client.deadline(at=self._deadline):
+                    iterables = self._client.follow(link['href'])
 
                 # NOTE(flaper87): Since we're using
                 # `.follow`, the empty result will
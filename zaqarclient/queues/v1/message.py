@@ -14,35 +14,96 @@
 # limitations under the License.
 """Implements a message controller that understands Zaqar messages."""
 
+import json
+
+from zaqarclient.queues.v1 import claimcheck
+from zaqarclient.queues.v1 import codec
 from zaqarclient.queues.v1 import core
+from zaqarclient.queues.v1 import idempotency
+
+_MISSING = object()
 
 
 class Message(object):
     """A handler for Zaqar server Message resources.
     Attributes are only downloaded once - at creation time.
+
+    Compressed bodies and claim-check references, refer to
+    `codec` and `claimcheck`, are only decoded the first time
+    `body` is accessed, which consumers that just forward them
+    never do.
+
+    Messages posted by idempotent producers expose their
+    key as `key`, refer to `idempotency`.
     """
-    def __init__(self, queue, href, ttl, age, body):
+    def __init__(self, queue, href, ttl, age, body=None):
         self.queue = queue
         self.href = href
         self.ttl = ttl
         self.age = age
-        self.body = body
-
-        # NOTE(flaper87): Is this really
-        # necessary? Should this be returned
-        # by Zaqar?
-        # The url has two forms depending on if it has been claimed.
-        # /v1/queues/worker-jobs/messages/5c6939a8?claim_id=63c9a592
-        # or
-        # /v1/queues/worker-jobs/messages/5c6939a8
-        self._id = href.split('/')[-1]
-        if '?' in self._id:
-            self._id = self._id.split('?')[0]
+
+        self._raw_body = None
+        self._envelope = None
+        self._key, self._body = idempotency.unwrap(body)
+        if (codec.is_envelope(self._body) or
+                claimcheck.is_reference(self._body)):
+            self._envelope = self._body
+            self._body = _MISSING
+
+        self._id = message_id(href)
 
     def __repr__(self):
         return '<Message id:{id} ttl:{ttl}>'.format(id=self._id,
                                                     ttl=self.ttl)
 
+    def _posted_body(self):
+        """Returns the body as it was posted
+
+        That is, compressed or as a reference if it was.
+        """
+        if self._envelope is None:
+            return self._body
+        return self._envelope
+
+    @property
+    def body(self):
+        if self._body is _MISSING:
+            body = self._posted_body()
+            claim_check = getattr(self.queue, 'claim_check', None)
+            if claim_check is not None and claimcheck.is_reference(body):
+                body = claim_check.fetch(body)
+            max_size = self.queue.client.conf.get('body_max_size')
+            self._body = codec.decode(body, max_size)
+        return self._body
+
+    @body.setter
+    def body(self, value):
+        self._body = value
+        self._raw_body = None
+        self._envelope = None
+
+    @property
+    def key(self):
+        """Idempotency key the message was posted with, if any"""
+        return self._key
+
+    @property
+    def raw_body(self):
+        """The body serialized as JSON
+
+        Messages are read from the server with their body
+        deserialized, so it's serialized again. Like it was
+        posted, that is compressed bodies are kept compressed,
+        claim-check references are kept as references and the
+        idempotency key, if any, is kept along.
+        """
+        if self._raw_body is None:
+            body = self._posted_body()
+            if self._key is not None:
+                body = idempotency.wrap(self._key, body)
+            self._raw_body = json.dumps(body)
+        return self._raw_body
+
     @property
     def claim_id(self):
         if '=' in self.href:
@@ -52,6 +113,27 @@ class Message(object):
         req, trans = self.queue.client._request_and_transport()
         core.message_delete(trans, req, self.queue._name,
                             self._id, self.claim_id)
+        self._collect()
+
+    def _collect(self):
+        """Cleans up after the message was deleted"""
+        claim_check = getattr(self.queue, 'claim_check', None)
+        if claim_check is not None and claim_check.gc:
+            body = self._posted_body()
+            if claimcheck.is_reference(body):
+                claim_check.release(body)
+
+
+def message_id(href):
+    """Returns the id of the message at `href`"""
+    # NOTE(flaper87): Is this really
+    # necessary? Should this be returned
+    # by Zaqar?
+    # The url has two forms depending on if it has been claimed.
+    # /v1/queues/worker-jobs/messages/5c6939a8?claim_id=63c9a592
+    # or
+    # /v1/queues/worker-jobs/messages/5c6939a8
+    return href.split('/')[-1].split('?')[0]
 
 
 def create_object(parent):
@@ -0,0 +1,199 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Claim prefetching
+
+A consumer claiming a batch, processing it and only then claiming the
+next one waits for `claim_create` on every batch. A `Prefetcher`
+claims from a background thread instead, keeping up to `depth` claims
+buffered, so the next batch is there as soon as the current one is
+drained::
+
+    with queue.prefetch(depth=2, ttl=60, limit=10) as claims:
+        for msg in claims:
+            process(msg)
+            msg.delete()
+
+Buffered claims keep ageing, messages are not handed out once their
+claim is about to expire, as they'd be redelivered to someone else
+while being processed. Such claims are released so their messages
+are redelivered right away. So are the claims left in the buffer
+when the prefetcher is closed.
+"""
+
+import threading
+import time
+
+from six.moves import queue as Queue
+
+from zaqarclient.queues.v1 import backoff as backoff_api
+
+# Seconds to block on the buffer before checking
+# whether the prefetcher was closed.
+_POLL_INTERVAL = 0.1
+
+# Claims' ttl and grace on queues without a `autotune.ClaimTuner`.
+DEFAULT_TTL = 60
+DEFAULT_GRACE = 60
+
+
+def timed_claim(queue, ttl=None, grace=None, limit=None):
+    """Claims messages from `queue`
+
+    :returns: The claim and when it expires, or None instead
+        of the expiration if the claim is empty.
+    :rtype: tuple
+    """
+    if queue.tuner is None:
+        ttl = DEFAULT_TTL if ttl is None else ttl
+        grace = DEFAULT_GRACE if grace is None else grace
+
+    # The claim may have been created some time before the server
+    # answered, be conservative when computing its expiration.
+    started = time.time()
+    claim = queue.claim(ttl=ttl, grace=grace, limit=limit)
+    if claim.id is None:
+        return claim, None
+    return claim, started + claim.ttl
+
+
+def is_stale(claim, expires, headroom=None):
+    """Tells whether a claim is too close to its expiration
+
+    :param headroom: Seconds before `expires` from which the
+        claim is stale. Defaults to a tenth of the claim's ttl.
+    :type headroom: float
+    """
+    if headroom is None:
+        headroom = claim.ttl / 10.0
+    return time.time() >= expires - headroom
+
+
+class Prefetcher(object):
+    """Iterates over messages claimed in the background
+
+    :param queue: Queue to claim messages from.
+    :type queue: `queues.Queue`
+    :param depth: Maximum number of claims buffered.
+    :type depth: int
+    :param ttl: Claims' ttl. Tuned on queues with a
+        `autotune.ClaimTuner`, 60 otherwise.
+    :type ttl: int
+    :param grace: Claims' grace. Tuned on queues with a
+        `autotune.ClaimTuner`, 60 otherwise.
+    :type grace: int
+    :param limit: Maximum number of messages per claim.
+    :type limit: int
+    :param headroom: Seconds before their claim expires
+        from which messages are not handed out anymore.
+        Defaults to a tenth of the claim's ttl.
+    :type headroom: float
+    """
+
+    def __init__(self, queue, depth=2, ttl=None, grace=None, limit=None,
+                 headroom=None):
+        self.queue = queue
+        self.ttl = ttl
+        self.grace = grace
+        self.limit = limit
+        self.headroom = headroom
+
+        # Number of claims released because
+        # they were too old.
+        self.expired = 0
+
+        self._buffer = Queue.Queue(depth)
+        self._closed = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._fetch)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _claim(self):
+        return timed_claim(self.queue, ttl=self.ttl, grace=self.grace,
+                           limit=self.limit)
+
+    def _put(self, item):
+        while not self._closed.is_set():
+            try:
+                self._buffer.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except Queue.Full:
+                pass
+        return False
+
+    def _fetch(self):
+        backoff = self.queue.backoff
+        shared = backoff is not None
+        if not shared:
+            backoff = backoff_api.Backoff()
+
+        try:
+            while not self._closed.wait(backoff.remaining()):
+                claim, expires = self._claim()
+                if not shared:
+                    backoff.record(claim.id is not None)
+                if claim.id is None:
+                    continue
+
+                if not self._put((claim, expires)):
+                    claim.delete()
+        except Exception as ex:
+            self._error = ex
+            self._closed.set()
+
+    def _get(self):
+        while True:
+            try:
+                return self._buffer.get(timeout=_POLL_INTERVAL)
+            except Queue.Empty:
+                if self._closed.is_set():
+                    if self._error is not None:
+                        raise self._error
+                    return None, None
+
+    def __iter__(self):
+        while True:
+            claim, expires = self._get()
+            if claim is None:
+                return
+
+            for msg in claim:
+                if is_stale(claim, expires, self.headroom):
+                    self.expired += 1
+                    claim.delete()
+                    break
+                yield msg
+
+    def close(self):
+        """Stops claiming and releases the buffered claims
+
+        The claim being iterated over, if any, is left as
+        it is.
+        """
+        self._closed.set()
+        self._thread.join()
+        while True:
+            try:
+                claim, expires = self._buffer.get_nowait()
+            except Queue.Empty:
+                break
+            claim.delete()
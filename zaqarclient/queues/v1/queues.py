@@ -13,21 +13,89 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import time
+
+import six
+from six.moves.urllib import parse
+
+from zaqarclient.common import options
 from zaqarclient.queues.v1 import claim as claim_api
+from zaqarclient.queues.v1 import codec as codec_api
 from zaqarclient.queues.v1 import core
+from zaqarclient.queues.v1 import idempotency
 from zaqarclient.queues.v1 import iterator
 from zaqarclient.queues.v1 import message
+from zaqarclient.queues.v1 import prefetch as prefetch_api
 
 
 class Queue(object):
-
-    def __init__(self, client, name, auto_create=True):
+    """A Zaqar queue
+
+    :param client: The client instance used by the queue
+    :type client: `v1.Client`
+    :param name: Queue's reference name.
+    :type name: `six.text_type`
+    :param auto_create: Whether to create the queue.
+    :type auto_create: `bool`
+    :param codec: Codec used to compress the bodies posted
+        to this queue, the keyword arguments to build one or
+        False to disable it. Defaults to the client's
+        `body_codec` option.
+    :type codec: `codec.Codec`
+    :param claim_check: Offloads the big bodies posted to
+        this queue and fetches the ones read. Defaults to the
+        client's `claim_check` option.
+    :type claim_check: `claimcheck.ClaimCheck`
+    :param idempotent: Whether messages are posted with an
+        idempotency key, refer to `idempotency`. Defaults to
+        the client's `idempotent_posts` option.
+    :type idempotent: `bool`
+    :param backoff: Spaces out claims and pops while the
+        queue is empty, share it among the consumers of the
+        queue. Defaults to the client's backoff for `name`.
+    :type backoff: `backoff.Backoff`
+    :param tuner: Tunes the claims on this queue. Defaults
+        to the client's claim tuner for `name`.
+    :type tuner: `autotune.ClaimTuner`
+    :param backpressure: Holds posts back while the queue's
+        backlog is too big. Defaults to the client's
+        `backpressure` option.
+    :type backpressure: `backpressure.Backpressure`
+    """
+
+    def __init__(self, client, name, auto_create=True, codec=None,
+                 claim_check=None, idempotent=None, backoff=None,
+                 tuner=None, backpressure=None):
         self.client = client
 
         # NOTE(flaper87) Queue Info
         self._name = name
         self._metadata = None
 
+        if codec is None:
+            codec = client.conf.get('body_codec')
+        self.codec = options.build(codec_api.Codec, codec)
+
+        if claim_check is None:
+            claim_check = client.conf.get('claim_check')
+        self.claim_check = claim_check or None
+
+        if idempotent is None:
+            idempotent = client.conf.get('idempotent_posts', False)
+        self.idempotent = idempotent
+
+        if backoff is None:
+            backoff = client.backoff(name)
+        self.backoff = backoff or None
+
+        if tuner is None:
+            tuner = client.claim_tuner(name)
+        self.tuner = tuner or None
+
+        if backpressure is None:
+            backpressure = client.backpressure
+        self.backpressure = backpressure or None
+
         if auto_create:
             self.ensure_exists()
 
@@ -96,9 +164,78 @@ class Queue(object):
 
     # Messages API
 
+    def _list_page(self, marker, limit):
+        req, trans = self.client._request_and_transport()
+        params = {'limit': limit, 'echo': True, 'include_claimed': True}
+        if marker is not None:
+            params['marker'] = marker
+        return core.message_list(trans, req, self._name, async_=True,
+                                 **params)
+
+    def purge(self, page_size=20, chunk=10, progress=None):
+        """Deletes all the messages, keeping the queue and its metadata
+
+        Messages are listed, claimed ones included, and the
+        deletion of each page, in chunks sent in parallel,
+        overlaps with the listing of the next one.
+
+        :param page_size: Number of messages listed per page.
+        :type page_size: int
+        :param chunk: Number of messages deleted per request.
+        :type chunk: int
+        :param progress: Called with the number of messages
+            deleted so far after each page.
+        :type progress: Callable object.
+
+        :returns: The number of messages listed, and so asked
+            to be deleted. The server doesn't tell which ones
+            existed still, messages deleted meanwhile, i.e: by
+            consumers, are counted too.
+        :rtype: int
+        """
+        deleted = 0
+        page = self._list_page(None, page_size)
+        while page is not None:
+            listing = page.result()
+            ids = [message.message_id(msg['href'])
+                   for msg in listing.get('messages') or []]
+            if not ids:
+                break
+
+            page = None
+            for link in listing.get('links') or []:
+                if link['rel'] == 'next':
+                    query = parse.parse_qs(parse.urlparse(link['href']).query)
+                    page = self._list_page(query['marker'][0], page_size)
+
+            deletions = []
+            for start in range(0, len(ids), chunk):
+                req, trans = self.client._request_and_transport()
+                deletions.append(core.message_delete_many(
+                    trans, req, self._name, ids[start:start + chunk],
+                    async_=True))
+            for deletion in deletions:
+                deletion.result()
+
+            deleted += len(ids)
+            if progress is not None:
+                progress(deleted)
+        return deleted
+
+    def _hold_back(self):
+        if self.backpressure is not None:
+            self.backpressure.check(self)
+
     def post(self, messages):
         """Posts one or more messages to this queue
 
+        Posts may be held back, or raise `errors.BacklogExceeded`,
+        if the queue has a `backpressure.Backpressure`.
+
+        If the queue is idempotent, messages get their key
+        stored under `key`. Posting them again is a retry and
+        it's not sent if the server acknowledged them already.
+
         :param messages: One or more messages to post
         :type messages: `list` or `dict`
 
@@ -108,11 +245,72 @@ class Queue(object):
         if not isinstance(messages, list):
             messages = [messages]
 
+        pending = None
+        if self.idempotent:
+            publisher = self.client.publisher
+            resources, pending = publisher.prepare(messages)
+            if not pending:
+                return {'resources': resources, 'partial': False}
+            messages = [msg for index, key, msg in pending]
+
+        self._hold_back()
+        for encoder in (self.claim_check and self.claim_check.check,
+                        self.codec and self.codec.encode):
+            if encoder:
+                messages = [dict(msg, body=encoder(msg['body']))
+                            if 'body' in msg else msg for msg in messages]
+
+        if pending is not None:
+            messages = [idempotency.keyed(pending[i][1], msg)
+                        for i, msg in enumerate(messages)]
+
         req, trans = self.client._request_and_transport()
 
         # TODO(flaper87): Return a list of messages
-        return core.message_post(trans, req,
-                                 self._name, messages)
+        result = core.message_post(trans, req,
+                                   self._name, messages)
+
+        if pending is not None:
+            hrefs = (result or {}).get('resources') or []
+            for (index, key, msg), href in zip(pending, hrefs):
+                publisher.ack(key, href)
+                resources[index] = href
+            result = dict(result or {}, resources=[href for href in resources
+                                                   if href is not None])
+        return result
+
+    def post_raw(self, bodies, ttl):
+        """Posts one or more pre-serialized messages to this queue
+
+        The bodies are sent as they are, which saves encoding
+        bodies serialized already, i.e: read from a file::
+
+            dest.post_raw([line for line in events], ttl=60)
+
+        Messages read from another queue can be forwarded through
+        their `raw_body`, which serializes their body again but
+        keeps compressed bodies compressed.
+
+        :param bodies: Messages' bodies serialized as JSON.
+        :type bodies: `list` of `six.text_type` or `bytes`
+        :param ttl: Messages' ttl.
+        :type ttl: int
+
+        :returns: A dict with the result of this operation.
+        :rtype: `dict`
+        """
+        if isinstance(bodies, (six.text_type, six.binary_type)):
+            bodies = [bodies]
+
+        self._hold_back()
+        for encoder in (self.claim_check and self.claim_check.check_raw,
+                        self.codec and self.codec.encode_raw):
+            if encoder:
+                bodies = [encoder(body) for body in bodies]
+
+        req, trans = self.client._request_and_transport()
+        return core.message_post_raw(trans, req, self._name,
+                                     [(ttl, body) for body in bodies])
 
     def message(self, message_id):
         """Gets a message by id
@@ -181,6 +379,20 @@ class Queue(object):
         return core.message_delete_many(trans, req, self._name,
                                         set(messages))
 
+    def _wait_for_poll(self):
+        if self.backoff is None:
+            return
+
+        timeout = None
+        deadline = self.client.get_deadline()
+        if deadline is not None:
+            timeout = deadline - time.time()
+        self.backoff.wait(timeout)
+
+    def _polled(self, messages):
+        if self.backoff is not None:
+            self.backoff.record(bool(messages))
+
     def pop(self, count=1):
         """Pop `count` messages from the server
 
@@ -191,16 +403,39 @@ class Queue(object):
         :rtype: `list`
         """
 
+        self._wait_for_poll()
         req, trans = self.client._request_and_transport()
         msgs = core.message_pop(trans, req, self._name, count=count)
+
+        # v1.1 servers answer with a dict holding
+        # the popped messages, without links.
+        popped = msgs
+        if isinstance(msgs, dict):
+            popped = msgs.get('messages')
+        self._polled(popped)
         return iterator._Iterator(self.client,
-                                  msgs,
+                                  msgs or [],
                                   'messages',
                                   message.create_object(self))
 
     def claim(self, id=None, ttl=None, grace=None,
-              limit=None):
-        return claim_api.Claim(self, id=id, ttl=ttl, grace=grace, limit=limit)
+              limit=None, dedupe=None):
+        return claim_api.Claim(self, id=id, ttl=ttl, grace=grace,
+                               limit=limit, dedupe=dedupe)
+
+    def prefetch(self, depth=2, ttl=None, grace=None, limit=None,
+                 headroom=None):
+        """Claims messages in the background
+
+        Refer to `prefetch.Prefetcher` for the parameters.
+
+        :returns: An iterator over the claimed messages,
+            close it once done.
+        :rtype: `prefetch.Prefetcher`
+        """
+        return prefetch_api.Prefetcher(self, depth=depth, ttl=ttl,
+                                       grace=grace, limit=limit,
+                                       headroom=headroom)
 
 
 def create_object(parent):
@@ -0,0 +1,179 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Logical queues spread over several physical ones
+
+A single queue's write throughput is bounded by its backend. A
+`ShardedQueue` spreads a logical queue `name` over the physical
+queues `name.0` to `name.N-1`. Posts go to a single shard, picked by
+hashing their routing key or in turns, and claims go through the
+shards in turns, so all of them are consumed from.
+
+Messages posted with the same key land in the same shard, and so
+keep the ordering a single queue gives them.
+"""
+
+import itertools
+import threading
+import zlib
+
+import six
+
+from zaqarclient.queues.v1 import core
+from zaqarclient.queues.v1 import iterator
+from zaqarclient.queues.v1 import message
+import zaqarclient.transport.errors as errors
+
+
+def shard_name(name, index):
+    return '%s.%d' % (name, index)
+
+
+class ShardedQueue(object):
+    """A queue spread over `shards` physical queues
+
+    :param client: The client instance used by the queue
+    :type client: `v1.Client`
+    :param name: Logical queue's name.
+    :type name: `six.text_type`
+    :param shards: Number of physical queues.
+    :type shards: int
+    :param kwargs: Passed to each physical `queues.Queue`.
+    """
+
+    def __init__(self, client, name, shards, **kwargs):
+        if shards < 1:
+            raise ValueError('A sharded queue needs at least one shard')
+
+        self.client = client
+        self._name = name
+        self.queues = [client.queue(shard_name(name, index), **kwargs)
+                       for index in range(shards)]
+
+        self._turns = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return self._name
+
+    def _next(self):
+        with self._lock:
+            return next(self._turns) % len(self.queues)
+
+    def shard(self, key):
+        """Returns the physical queue messages keyed `key` go to
+
+        The shard is stable across processes.
+        """
+        if isinstance(key, six.text_type):
+            key = key.encode('utf-8')
+        index = (zlib.crc32(key) & 0xffffffff) % len(self.queues)
+        return self.queues[index]
+
+    def post(self, messages, key=None):
+        """Posts `messages` to a single shard
+
+        :param messages: One or more messages, as in `Queue.post`.
+        :param key: Routing key, messages posted with the same key
+            go to the same shard. Shards are used in turns if None.
+        :type key: `six.text_type`
+        """
+        if key is None:
+            queue = self.queues[self._next()]
+        else:
+            queue = self.shard(key)
+        return queue.post(messages)
+
+    def claim(self, ttl=None, grace=None, limit=None, dedupe=None):
+        """Claims messages from the next non empty shard
+
+        Each claim starts looking at the shard following the one
+        the previous claim started at.
+
+        :returns: The claim, empty if all shards are.
+        :rtype: `claim.Claim`
+        """
+        start = self._next()
+        for offset in range(len(self.queues)):
+            queue = self.queues[(start + offset) % len(self.queues)]
+            claim = queue.claim(ttl=ttl, grace=grace, limit=limit,
+                                dedupe=dedupe)
+            if claim.id is not None:
+                break
+        return claim
+
+    def _get_many(self, queue, messages):
+        req, trans = self.client._request_and_transport()
+        try:
+            msgs = core.message_get_many(trans, req, queue._name, messages)
+        except errors.ResourceNotFound:
+            # The shard wasn't created yet.
+            return []
+
+        # Shards holding none of the messages return nothing.
+        if not msgs:
+            return []
+        return iterator._Iterator(self.client, msgs, 'messages',
+                                  message.create_object(queue))
+
+    def messages(self, *messages, **params):
+        """Lists the messages of all the shards
+
+        Messages are listed shard after shard, refer to
+        `Queue.messages` for the parameters. Messages looked up
+        by id are searched for in every shard, as their id
+        doesn't tell which one holds them.
+        """
+        if messages:
+            return itertools.chain.from_iterable(
+                self._get_many(queue, messages) for queue in self.queues)
+
+        return itertools.chain.from_iterable(
+            queue.messages(**params) for queue in self.queues)
+
+    @property
+    def stats(self):
+        """Sum of the shards' stats
+
+        `oldest` and `newest` are those of the shards holding
+        the oldest and the newest messages.
+        """
+        pending = []
+        for queue in self.queues:
+            req, trans = self.client._request_and_transport()
+            pending.append(core.queue_get_stats(trans, req, queue._name,
+                                                async_=True))
+
+        totals = {'free': 0, 'claimed': 0, 'total': 0}
+        for future in pending:
+            stats = future.result()['messages']
+            for key in ('free', 'claimed', 'total'):
+                totals[key] += stats.get(key, 0)
+
+            for key, older in (('oldest', True), ('newest', False)):
+                message = stats.get(key)
+                if message is None:
+                    continue
+                current = totals.get(key)
+                if (current is None or
+                        (message['age'] > current['age']) == older):
+                    totals[key] = message
+        return {'messages': totals}
+
+    def delete(self):
+        """Deletes all the shards"""
+        for queue in self.queues:
+            queue.delete()
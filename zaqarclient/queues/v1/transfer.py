@@ -0,0 +1,317 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Bulk transfer of messages between queues and files
+
+`copy` streams the messages of a queue into another one, possibly
+handled by a different client, i.e: while migrating to a new
+deployment or pool. Messages are read either:
+
+- `LIST`: by listing them, claimed ones included. They're copied
+  and, optionally, deleted from the source.
+- `CLAIM`: by claiming them, which is safe while other consumers
+  are at it. They're moved, i.e: always deleted from the source.
+
+Batches are posted concurrently, with up to `window` of them in
+flight, which bounds the memory used. Source messages are only
+deleted once the post holding them succeeded. Messages are copied as
+they were posted, compressed bodies and claim-check references are
+not decoded and idempotency keys are kept.
+
+`export_queue` and `import_queue` dump a queue to a JSON Lines file,
+gzipped if its name ends with `.gz`, and load it back. Each line
+holds a message::
+
+    {"id": "<id>", "ttl": <ttl>, "age": <age>, "body": <body>}
+
+Both stream the messages, the memory they use doesn't depend on the
+size of the queue.
+"""
+
+import collections
+import gzip
+import json
+import time
+
+import six
+
+from zaqarclient.queues.v1 import core
+
+LIST = 'list'
+CLAIM = 'claim'
+
+# Zaqar's minimum message ttl.
+MIN_TTL = 60
+
+
+class Progress(object):
+    """Counts the messages transferred so far"""
+
+    def __init__(self):
+        self.messages = 0
+        self.deleted = 0
+        self.started = time.time()
+
+    @property
+    def elapsed(self):
+        return time.time() - self.started
+
+    @property
+    def rate(self):
+        """Messages transferred per second"""
+        elapsed = self.elapsed
+        return self.messages / elapsed if elapsed > 0 else 0.0
+
+
+def _remaining_ttl(ttl, age):
+    return max(MIN_TTL, int(ttl - age))
+
+
+def _post(queue, messages, deadline):
+    with queue.client.deadline(at=deadline):
+        return queue.post(messages)
+
+
+def _post_raw(queue, messages, deadline):
+    # `Queue.post_raw` would encode the bodies again, they're
+    # posted as they were read instead.
+    with queue.client.deadline(at=deadline):
+        queue._hold_back()
+        req, trans = queue.client._request_and_transport()
+        return core.message_post_raw(trans, req, queue._name, messages)
+
+
+class _Pipeline(object):
+    """Posts batches concurrently, up to `window` at a time"""
+
+    def __init__(self, target, window, done, post=_post):
+        self.target = target
+        self.window = window
+        self.done = done
+        self.post = post
+        self._inflight = collections.deque()
+
+    def _complete(self):
+        future, batch = self._inflight.popleft()
+        future.result()
+        self.done(batch)
+
+    def submit(self, messages, batch):
+        """Posts `messages`, `batch` is passed to `done` afterwards"""
+        while len(self._inflight) >= self.window:
+            self._complete()
+
+        client = self.target.client
+        future = client.executor.submit(self.post, self.target, messages,
+                                        client.get_deadline())
+        self._inflight.append((future, batch))
+
+    def drain(self):
+        while self._inflight:
+            self._complete()
+
+
+def _batches(messages, size):
+    batch = []
+    for item in messages:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _claimed(queue, size, ttl, grace):
+    while True:
+        claim = queue.claim(ttl=ttl, grace=grace, limit=size)
+        if claim.id is None:
+            return
+        for msg in claim:
+            yield msg, claim
+
+
+def _listed(queue, size):
+    messages = queue.messages(echo=True, include_claimed=True, limit=size)
+    for msg in messages.stream():
+        yield msg, None
+
+
+def copy(source, target, mode=LIST, delete=False, batch_size=10,
+         window=4, ttl=300, grace=60, progress=None):
+    """Streams the messages of `source` into `target`
+
+    :param source: Queue to read the messages from.
+    :type source: `queues.Queue`
+    :param target: Queue to post the messages to, its client
+        may differ from the source's one.
+    :type target: `queues.Queue`
+    :param mode: Either `LIST` or `CLAIM`.
+    :param delete: Whether to delete the messages from the
+        source once copied. Always True with `CLAIM`.
+    :type delete: `bool`
+    :param batch_size: Number of messages per post.
+    :type batch_size: int
+    :param window: Maximum number of posts in flight.
+    :type window: int
+    :param ttl: Claims' ttl with `CLAIM`, it must cover the time
+        to post `window` batches.
+    :type ttl: int
+    :param grace: Claims' grace with `CLAIM`.
+    :type grace: int
+    :param progress: Called with the `Progress` after each
+        batch is posted.
+    :type progress: Callable object.
+
+    :returns: The final progress.
+    :rtype: `Progress`
+    """
+    if mode not in (LIST, CLAIM):
+        raise ValueError('Unknown mode: %s' % mode)
+
+    stats = Progress()
+
+    def done(batch):
+        stats.messages += len(batch)
+        if mode == CLAIM:
+            claims = collections.OrderedDict()
+            for msg, claim in batch:
+                acks = claims.setdefault(claim.id,
+                                         claim.acks(size=len(batch)))
+                acks.ack(msg)
+            for acks in claims.values():
+                acks.flush()
+            stats.deleted += len(batch)
+        elif delete:
+            source.delete_messages(*[msg._id for msg, claim in batch])
+            stats.deleted += len(batch)
+        if progress is not None:
+            progress(stats)
+
+    if mode == CLAIM:
+        messages = _claimed(source, batch_size, ttl, grace)
+    else:
+        messages = _listed(source, batch_size)
+
+    pipeline = _Pipeline(target, window, done, post=_post_raw)
+    for batch in _batches(messages, batch_size):
+        pipeline.submit([(_remaining_ttl(msg.ttl, msg.age), msg.raw_body)
+                         for msg, claim in batch], batch)
+    pipeline.drain()
+    return stats
+
+
+def _open(path, mode, compress):
+    if not isinstance(path, six.string_types):
+        return path
+    if compress is None:
+        compress = path.endswith('.gz')
+    return (gzip.open if compress else open)(path, mode)
+
+
+def export_queue(queue, path, compress=None, include_claimed=True,
+                 page_size=20, progress=None):
+    """Writes the messages of `queue` to `path` as JSON Lines
+
+    :param queue: Queue to export.
+    :type queue: `queues.Queue`
+    :param path: Path of the file, or binary file object,
+        to write to.
+    :param compress: Whether to gzip the file. Defaults to
+        whether `path` ends with `.gz`.
+    :type compress: `bool`
+    :param include_claimed: Whether to export the claimed
+        messages too.
+    :type include_claimed: `bool`
+    :param page_size: Number of messages listed per page.
+    :type page_size: int
+    :param progress: Called with the `Progress` after each
+        page is written.
+    :type progress: Callable object.
+
+    :returns: The final progress.
+    :rtype: `Progress`
+    """
+    stats = Progress()
+    out = _open(path, 'wb', compress)
+    try:
+        messages = queue.messages(echo=True,
+                                  include_claimed=include_claimed,
+                                  limit=page_size)
+        for msg in messages.stream():
+            record = {'id': msg._id, 'ttl': msg.ttl, 'age': msg.age,
+                      'body': msg.body}
+            out.write(json.dumps(record).encode('utf-8') + b'\n')
+
+            stats.messages += 1
+            if progress is not None and stats.messages % page_size == 0:
+                progress(stats)
+    finally:
+        if out is not path:
+            out.close()
+    return stats
+
+
+def _records(lines):
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield json.loads(line.decode('utf-8'))
+
+
+def import_queue(queue, path, compress=None, batch_size=10, window=4,
+                 progress=None):
+    """Posts the messages written to `path` by `export_queue`
+
+    Messages keep the ttl they had left when exported.
+
+    :param queue: Queue to post the messages to.
+    :type queue: `queues.Queue`
+    :param path: Path of the file, or binary file object,
+        to read from.
+    :param compress: Whether the file is gzipped. Defaults to
+        whether `path` ends with `.gz`.
+    :type compress: `bool`
+    :param batch_size: Number of messages per post.
+    :type batch_size: int
+    :param window: Maximum number of posts in flight.
+    :type window: int
+    :param progress: Called with the `Progress` after each
+        batch is posted.
+    :type progress: Callable object.
+
+    :returns: The final progress.
+    :rtype: `Progress`
+    """
+    stats = Progress()
+
+    def done(batch):
+        stats.messages += len(batch)
+        if progress is not None:
+            progress(stats)
+
+    source = _open(path, 'rb', compress)
+    try:
+        pipeline = _Pipeline(queue, window, done)
+        for batch in _batches(_records(source), batch_size):
+            pipeline.submit([{'ttl': _remaining_ttl(record['ttl'],
+                                                    record['age']),
+                              'body': record['body']}
+                             for record in batch], batch)
+        pipeline.drain()
+    finally:
+        if source is not path:
+            source.close()
+    return stats
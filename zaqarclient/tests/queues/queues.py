@@ -138,6 +138,29 @@ class QueuesV1QueueUnitTest(base.QueuesTestBase):
             posted = self.queue.post(messages)
             self.assertEqual(result, posted)
 
+    def test_message_post_raw(self):
+        result = {
+            "resources": [
+                "/v1/queues/fizbit/messages/50b68a50d6f5b8c8a7c62b01",
+                "/v1/queues/fizbit/messages/50b68a50d6f5b8c8a7c62b02"
+            ],
+            "partial": False
+        }
+
+        with mock.patch.object(self.transport, 'send',
+                               autospec=True) as send_method:
+
+            resp = response.Response(None, json.dumps(result))
+            send_method.return_value = resp
+
+            posted = self.queue.post_raw(['{"a": 1}', b'"Post It!"'], ttl=30)
+            self.assertEqual(result, posted)
+
+            req = send_method.call_args[0][0]
+            self.assertEqual(json.loads(req.content),
+                             [{'ttl': 30, 'body': {'a': 1}},
+                              {'ttl': 30, 'body': 'Post It!'}])
+
     def test_message_list(self):
         returned = {
             'links': [{
@@ -402,6 +425,24 @@ class QueuesV1_1QueueUnitTest(QueuesV1QueueUnitTest):
             # just checking our way down to the transport
             # doesn't crash.
 
+    def test_message_pop_without_links(self):
+        returned = {'messages': [{
+            'href': '/v1.1/queues/fizbit/messages/50b68a50d6f5b8c8a7c62b01',
+            'ttl': 800,
+            'age': 790,
+            'body': {'event': 'ActivateAccount', 'mode': 'active'}
+        }]}
+
+        with mock.patch.object(self.transport, 'send',
+                               autospec=True) as send_method:
+
+            resp = response.Response(None, json.dumps(returned))
+            send_method.return_value = resp
+
+            msgs = list(self.queue.pop(count=2))
+            self.assertEqual(len(msgs), 1)
+            self.assertEqual(msgs[0].body['mode'], 'active')
+
 
 class QueuesV1_1QueueFunctionalTest(QueuesV1QueueFunctionalTest):
 
@@ -0,0 +1,215 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A stand-in Zaqar websocket server backed by the memory store."""
+
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+
+from six.moves import socketserver
+
+from zaqarclient.transport import errors
+from zaqarclient.transport import http
+from zaqarclient.transport import memory
+
+_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+_STATUS = dict((error, status) for status, error
+               in http.HttpTransport.http_to_zaqar.items())
+
+# Operations whose whole body is the request
+# content.
+_BODY_CONTENT = ('claim_create', 'claim_update',
+                 'pool_create', 'flavor_create')
+
+
+def _recv(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise EOFError()
+        data += chunk
+    return data
+
+
+def read_frame(sock):
+    first, second = struct.unpack('!BB', _recv(sock, 2))
+    length = second & 0x7f
+    if length == 126:
+        length = struct.unpack('!H', _recv(sock, 2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', _recv(sock, 8))[0]
+
+    mask = _recv(sock, 4) if second & 0x80 else None
+    payload = bytearray(_recv(sock, length))
+    if mask is not None:
+        mask = bytearray(mask)
+        for i in range(length):
+            payload[i] ^= mask[i % 4]
+    return first & 0x0f, bytes(payload)
+
+
+def write_frame(sock, payload, opcode=0x1):
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    sock.sendall(header + payload)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        server = self.server
+        sock = self.request
+
+        data = b''
+        while b'\r\n\r\n' not in data:
+            data += sock.recv(1024)
+
+        key = None
+        for line in data.split(b'\r\n'):
+            if line.lower().startswith(b'sec-websocket-key:'):
+                key = line.split(b':', 1)[1].strip()
+
+        accept = base64.b64encode(hashlib.sha1(key + _GUID).digest())
+        sock.sendall(b'HTTP/1.1 101 Switching Protocols\r\n'
+                     b'Upgrade: websocket\r\n'
+                     b'Connection: Upgrade\r\n'
+                     b'Sec-WebSocket-Accept: ' + accept + b'\r\n\r\n')
+
+        lock = threading.Lock()
+        with server.lock:
+            server.connections.append(sock)
+
+        try:
+            while True:
+                opcode, payload = read_frame(sock)
+                if opcode == 0x8:
+                    break
+
+                if opcode == 0x9:
+                    with lock:
+                        write_frame(sock, payload, opcode=0xa)
+                    continue
+
+                # Handle requests concurrently so responses may
+                # go out of order.
+                worker = threading.Thread(target=self._reply,
+                                          args=(sock, lock, payload))
+                worker.daemon = True
+                worker.start()
+        except (EOFError, socket.error):
+            pass
+
+    def _reply(self, sock, lock, payload):
+        req = json.loads(payload.decode('utf-8'))
+        resp = self.server.dispatch(req)
+        try:
+            with lock:
+                write_frame(sock, json.dumps(resp).encode('utf-8'))
+        except socket.error:
+            pass
+
+
+class WebsocketServer(socketserver.ThreadingTCPServer):
+    """Serves Zaqar's websocket API from a memory store
+
+    :param delay: Seconds to wait before answering
+        each request.
+    :type delay: float
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, delay=0):
+        socketserver.ThreadingTCPServer.__init__(self, ('127.0.0.1', 0),
+                                                 _Handler)
+        self.delay = delay
+        self.store = memory._Store()
+        self.lock = threading.Lock()
+        self.connections = []
+        self.requests = []
+
+    @property
+    def url(self):
+        return 'ws://127.0.0.1:%d' % self.server_address[1]
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self.drop()
+        self.shutdown()
+        self.server_close()
+
+    def drop(self):
+        """Drops all the open connections."""
+        with self.lock:
+            connections, self.connections = self.connections, []
+
+        for sock in connections:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+            sock.close()
+
+    def dispatch(self, req):
+        with self.lock:
+            self.requests.append(req)
+
+        if self.delay:
+            time.sleep(self.delay)
+
+        action = req['action']
+        params = dict(req.get('body') or {})
+        if 'message_ids' in params:
+            params['ids'] = params.pop('message_ids')
+
+        content = None
+        if action == 'message_post':
+            content = params.pop('messages', None)
+        elif action in ('queue_create', 'queue_set_metadata'):
+            content = params.pop('metadata', None)
+        elif action in _BODY_CONTENT:
+            content = params
+
+        client_id = req.get('headers', {}).get('Client-ID')
+        try:
+            with self.store.lock:
+                result = getattr(self.store, action)('v1.1', params,
+                                                     content, client_id,
+                                                     time.time())
+            status = 204 if result is None else 200
+        except errors.TransportError as ex:
+            status = _STATUS.get(type(ex), 500)
+            result = {'error': str(ex)}
+
+        return {'request': req,
+                'headers': {'status': status},
+                'body': result}
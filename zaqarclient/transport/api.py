@@ -13,8 +13,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import re
+
 import jsonschema
 from jsonschema import validators
+from six.moves.urllib import parse
 
 from zaqarclient import errors
 
@@ -25,6 +28,9 @@ class Api(object):
     label = None
     validators = {}
 
+    # Compiled refs, keyed by class.
+    _routes = {}
+
     def is_supported(self, operation):
         """Returns `True` if `operation` is supported
 
@@ -85,3 +91,61 @@ class Api(object):
             return False
 
         return True
+
+    def _get_routes(self):
+        routes = self._routes.get(type(self))
+        if routes is None:
+            routes = []
+            for operation, schema in self.schema.items():
+                pattern = re.sub(r'\\{(\w+)\\}', r'(?P<\1>[^/]+)',
+                                 re.escape(schema.get('ref', '')))
+                routes.append((re.compile('^' + pattern + '$'),
+                               schema.get('method', 'GET'),
+                               schema.get('required', []),
+                               operation))
+
+            # Operations sharing the same ref, i.e:
+            # message_list and message_get_many, are told
+            # apart by their required params. Try the most
+            # specific one first.
+            routes.sort(key=lambda route: len(route[2]), reverse=True)
+            self._routes[type(self)] = routes
+        return routes
+
+    def resolve(self, ref, method='GET'):
+        """Returns the operation and params matching `ref`
+
+        This is the inverse of building a ref out of an
+        operation's schema. Transports that don't speak
+        HTTP use it to follow links returned by the server,
+        i.e: `/v1/queues/fizbit/messages?marker=1`.
+
+        :param ref: The reference path, query included.
+        :type ref: `six.text_type`
+        :param method: The method the operation must use.
+        :type method: `six.text_type`
+
+        :returns: A tuple with the operation and its params.
+        :raises: `errors.InvalidOperation` if no operation
+            matches `ref`.
+        """
+        parsed = parse.urlparse(ref)
+        path = parsed.path.strip('/')
+        prefix = self.label + '/'
+        if path.startswith(prefix):
+            path = path[len(prefix):]
+
+        params = dict(parse.parse_qsl(parsed.query))
+
+        for regex, meth, required, operation in self._get_routes():
+            match = regex.match(path)
+            if meth != method or match is None:
+                continue
+
+            candidate = dict(params, **match.groupdict())
+            if all(param in candidate for param in required):
+                return operation, candidate
+
+        # TODO(flaper87): gettext support
+        msg = '{0} does not match any operation'.format(ref)
+        raise errors.InvalidOperation(msg)
@@ -14,9 +14,17 @@
 # limitations under the License.
 
 import abc
+from concurrent import futures
+import threading
 
 import six
 
+# Seconds to wait for a response when neither the
+# options nor the operation set a timeout.
+DEFAULT_TIMEOUT = 30
+
+_EXECUTOR_LOCK = threading.Lock()
+
 
 @six.add_metaclass(abc.ABCMeta)
 class Transport(object):
@@ -24,6 +32,58 @@ class Transport(object):
     def __init__(self, options):
         self.options = options
 
+        # Clients share their own executor among
+        # their transports.
+        self.executor = None
+
+    def get_executor(self):
+        """Returns the executor for asynchronous operations
+
+        Unless one was set, an executor bounded by the
+        `async_workers` option (default: 10) is created on
+        first use.
+
+        :rtype: `concurrent.futures.Executor`
+        """
+        if self.executor is None:
+            with _EXECUTOR_LOCK:
+                if self.executor is None:
+                    workers = (self.options or {}).get('async_workers', 10)
+                    self.executor = futures.ThreadPoolExecutor(int(workers))
+        return self.executor
+
+    def get_timeout(self, request):
+        """Returns the seconds to wait for `request`
+
+        The timeout is looked up in the `timeouts` option,
+        keyed by operation name, then in the operation's
+        schema and finally in the `default` entry of the
+        `timeouts` option. It never goes past the request's
+        deadline.
+
+        :param request: The request about to be sent.
+        :type request: `zaqarclient.transport.request.Request`
+
+        :returns: The timeout in seconds.
+        :rtype: float
+
+        :raises: `errors.DeadlineExceeded` if the request's
+            deadline has passed already.
+        """
+        remaining = request.remaining()
+        timeouts = (self.options or {}).get('timeouts') or {}
+
+        timeout = timeouts.get(request.operation)
+        if timeout is None and request.operation and request.api:
+            schema = request.api.get_schema(request.operation)
+            timeout = schema.get('timeout')
+        if timeout is None:
+            timeout = timeouts.get('default', DEFAULT_TIMEOUT)
+
+        if remaining is not None:
+            timeout = min(timeout, remaining)
+        return float(timeout)
+
     @abc.abstractmethod
     def send(self, request):
         """Returns the response.
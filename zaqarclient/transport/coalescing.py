@@ -0,0 +1,123 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import threading
+
+from zaqarclient.transport import base
+import zaqarclient.transport.errors as errors
+from zaqarclient.transport import response
+
+_READ_METHODS = ('GET', 'HEAD')
+
+
+def _default(obj):
+    if isinstance(obj, (set, frozenset, tuple)):
+        return sorted(obj)
+    return str(obj)
+
+
+class _Call(object):
+
+    __slots__ = ('_event', 'response', 'error')
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.response = None
+        self.error = None
+
+    def set(self, response=None, error=None):
+        self.response = response
+        self.error = error
+        self._event.set()
+
+    def wait(self, timeout):
+        if not self._event.wait(timeout):
+            raise errors.RequestTimeout('Timed out waiting for a response')
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+class CoalescingTransport(base.Transport):
+    """Wraps a transport and coalesces identical concurrent reads
+
+    Read requests, i.e: operations using GET or HEAD, that are
+    identical to one already in flight don't reach the server.
+    They wait for the in-flight one and get its result, errors
+    included.
+
+    Each caller gets its own `Response` built out of the shared
+    content, since callers, i.e: `_Iterator`, may consume the
+    deserialized content.
+
+    :param options: Transport options.
+    :type options: `dict`
+    :param transport: The transport to wrap.
+    :type transport: `zaqarclient.transport.base.Transport`
+    """
+
+    def __init__(self, options, transport):
+        super(CoalescingTransport, self).__init__(options)
+        self.transport = transport
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def _key(self, request):
+        if not request.api:
+            return None
+
+        # Requests with no operation come from
+        # `Client.follow` and are all GETs.
+        if request.operation:
+            schema = request.api.get_schema(request.operation)
+            if schema.get('method', 'GET') not in _READ_METHODS:
+                return None
+
+        return (request.endpoint,
+                request.operation,
+                request.ref,
+                request.headers.get('X-Project-Id'),
+                request.headers.get('Client-ID'),
+                json.dumps(request.params, sort_keys=True, default=_default))
+
+    def send(self, request):
+        key = self._key(request)
+        if key is None:
+            return self.transport.send(request)
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            resp = call.wait(self.get_timeout(request))
+            return response.Response(request, resp.content,
+                                     headers=resp.headers)
+
+        try:
+            resp = self.transport.send(request)
+        except Exception as ex:
+            with self._lock:
+                del self._calls[key]
+            call.set(error=ex)
+            raise
+
+        with self._lock:
+            del self._calls[key]
+        call.set(response=resp)
+        return resp
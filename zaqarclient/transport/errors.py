@@ -24,7 +24,8 @@ from zaqarclient import errors
 
 __all__ = ['TransportError', 'ResourceNotFound', 'MalformedRequest',
            'UnauthorizedError', 'ForbiddenError', 'ServiceUnavailableError',
-           'InternalServerError']
+           'InternalServerError', 'RequestTimeout', 'DeadlineExceeded',
+           'RateLimitExceeded']
 
 
 class TransportError(errors.ZaqarError):
@@ -74,3 +75,21 @@ class ServiceUnavailableError(TransportError):
 
     This error maps to HTTP's 503
     """
+
+
+class RequestTimeout(TransportError):
+    """Indicates that the server didn't answer in time"""
+
+
+class DeadlineExceeded(RequestTimeout):
+    """Indicates that the caller's deadline was reached
+
+    before the operation could be completed.
+    """
+
+
+class RateLimitExceeded(TransportError):
+    """Indicates that the client side rate limit
+
+    doesn't allow sending the request in time.
+    """
@@ -13,7 +13,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import functools
 import json
+import socket
+import threading
+
+import requests
+import six
+from six.moves import http_client
+from six.moves.urllib import parse
 
 from zaqarclient.common import http
 from zaqarclient.transport import base
@@ -89,23 +98,204 @@ class HttpTransport(base.Transport):
         headers = request.headers.copy()
         headers['content-type'] = 'application/json'
 
-        resp = self.client.request(method,
-                                   url=url,
-                                   params=request.params,
-                                   headers=headers,
-                                   data=request.content)
+        try:
+            resp = self.client.request(method,
+                                       url=url,
+                                       params=request.params,
+                                       headers=headers,
+                                       data=request.content,
+                                       timeout=self.get_timeout(request))
+        except requests.Timeout as ex:
+            raise errors.RequestTimeout(str(ex))
+
+        self._check_status(resp.status_code, resp.text)
 
-        if resp.status_code in self.http_to_zaqar:
+        # NOTE(flaper87): This reads the whole content
+        # and will consume any attempt of streaming.
+        return response.Response(request, resp.text,
+                                 headers=resp.headers)
+
+    def _check_status(self, status, text):
+        if status in self.http_to_zaqar:
             try:
-                msg = json.loads(resp.text)['description']
+                msg = json.loads(text)['description']
             except Exception:
                 # TODO(flaper87): Log this exception
                 # but don't stop raising the corresponding
                 # exception
                 msg = ''
-            raise self.http_to_zaqar[resp.status_code](msg)
+            raise self.http_to_zaqar[status](msg)
 
-        # NOTE(flaper87): This reads the whole content
-        # and will consume any attempt of streaming.
-        return response.Response(request, resp.text,
-                                 headers=resp.headers)
+
+class _ConnectionPool(object):
+    """Keeps idle connections to a host around for reuse."""
+
+    def __init__(self, scheme, netloc, size):
+        self.size = size
+        self._free = collections.deque()
+        if scheme == 'https':
+            self._factory = functools.partial(http_client.HTTPSConnection,
+                                              netloc)
+        else:
+            self._factory = functools.partial(http_client.HTTPConnection,
+                                              netloc)
+
+    def get(self):
+        """Returns an idle connection and whether it was reused."""
+        try:
+            return self._free.pop(), True
+        except IndexError:
+            return self.create(), False
+
+    def create(self):
+        return self._factory()
+
+    def put(self, conn):
+        if len(self._free) < self.size:
+            self._free.append(conn)
+        else:
+            conn.close()
+
+
+class HttplibTransport(HttpTransport):
+    """HTTP transport built on top of `http.client`
+
+    It's a lighter alternative to `HttpTransport` that skips
+    the `requests` machinery. Connections are kept alive and
+    pooled per host, the static headers are built once and
+    request bodies are sent as they are.
+
+    Select it by passing `transport='httplib'` in the client's
+    options.
+
+    :param options: Transport options:
+        - http_pool_size: Maximum number of idle connections
+            to keep per host. Default: 10
+        - timeouts: Seconds to wait for a response, keyed by
+            operation name. Refer to `Transport.get_timeout`.
+    :type options: `dict`
+    """
+
+    _static_headers = {'Content-Type': 'application/json',
+                       'Accept': 'application/json',
+                       'Connection': 'keep-alive'}
+
+    # Errors raised when a kept-alive connection
+    # was closed by the server while idle.
+    _stale_errors = (http_client.BadStatusLine, socket.error)
+
+    # Methods safe to send again when the reply was lost.
+    _idempotent_methods = frozenset(['GET', 'HEAD', 'PUT', 'DELETE'])
+
+    def __init__(self, options):
+        # Skip `HttpTransport.__init__`, there's no need
+        # for a `requests` session.
+        super(HttpTransport, self).__init__(options)
+        self.pool_size = int((options or {}).get('http_pool_size', 10))
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _get_pool(self, scheme, netloc):
+        key = (scheme, netloc)
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.setdefault(
+                    key, _ConnectionPool(scheme, netloc, self.pool_size))
+        return pool
+
+    @staticmethod
+    def _set_timeout(conn, timeout):
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+
+    def _send_once(self, conn, request, method, path, body, headers):
+        """Returns the response, its data and whether it can be retried
+
+        Stale connection errors are returned rather than raised, the
+        request can be sent again if it failed before being written
+        or if its method is idempotent.
+        """
+        self._set_timeout(conn, self.get_timeout(request))
+        written = False
+        try:
+            conn.request(method, path, body, headers)
+            written = True
+            resp = conn.getresponse()
+            return resp, resp.read(), None
+        except socket.timeout:
+            # Timeouts are socket errors too, make sure
+            # they're not taken as a stale connection and
+            # retried.
+            conn.close()
+            raise errors.RequestTimeout('Timed out waiting for a response')
+        except self._stale_errors as ex:
+            conn.close()
+            if written and method not in self._idempotent_methods:
+                # The server may have handled the request before
+                # the reply was lost, sending it again could
+                # duplicate it, i.e: posted messages.
+                raise
+            return None, None, ex
+
+    def _request(self, pool, request, method, path, body, headers):
+        conn, reused = pool.get()
+        try:
+            resp, data, stale = self._send_once(conn, request, method,
+                                                path, body, headers)
+            if stale is not None:
+                if not reused:
+                    raise stale
+
+                # The server closed the idle connection, try
+                # again with a new one.
+                conn = pool.create()
+                resp, data, stale = self._send_once(conn, request, method,
+                                                    path, body, headers)
+                if stale is not None:
+                    raise stale
+        except Exception:
+            conn.close()
+            raise
+
+        if resp.will_close:
+            conn.close()
+        else:
+            pool.put(conn)
+        return resp, data
+
+    def _prepare_raw(self, request):
+        """Returns the parsed url, method, path, headers and body."""
+        url, method, request = self._prepare(request)
+        parsed = parse.urlsplit(url)
+
+        path = parsed.path or '/'
+        query = [(k, v) for k, v in request.params.items() if v is not None]
+        if query:
+            path += '?' + parse.urlencode(query, doseq=True)
+
+        # `requests` drops headers set to None, i.e: X-Project-Id
+        # when no project was given, do the same.
+        headers = self._static_headers.copy()
+        headers.update((name, value)
+                       for name, value in request.headers.items()
+                       if value is not None)
+
+        body = request.content
+        if isinstance(body, six.text_type):
+            body = body.encode('utf-8')
+
+        return parsed, method, path, headers, body
+
+    def send(self, request):
+        parsed, method, path, headers, body = self._prepare_raw(request)
+
+        pool = self._get_pool(parsed.scheme, parsed.netloc)
+        resp, data = self._request(pool, request, method,
+                                   path, body, headers)
+
+        text = data.decode('utf-8')
+        self._check_status(resp.status, text)
+        return response.Response(request, text,
+                                 headers=dict(resp.getheaders()))
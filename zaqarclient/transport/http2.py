@@ -0,0 +1,336 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent import futures
+import socket
+import ssl
+import threading
+
+from h2 import config
+from h2 import connection
+from h2 import errors as h2_errors
+from h2 import events
+from h2 import exceptions as h2_exceptions
+
+import zaqarclient.transport.errors as errors
+from zaqarclient.transport import http
+from zaqarclient.transport import response
+
+
+class _Stream(object):
+
+    __slots__ = ('future', 'status', 'headers', 'data')
+
+    def __init__(self):
+        self.future = futures.Future()
+        self.status = None
+        self.headers = {}
+        self.data = []
+
+
+class _Connection(object):
+    """An HTTP/2 connection shared by many concurrent requests
+
+    Every request is sent on its own stream. A reader thread
+    feeds the received data to the protocol state machine and
+    completes the streams as they end. The state machine is
+    guarded by a single lock that's also used to wait for
+    stream slots and flow control windows.
+    """
+
+    def __init__(self, scheme, netloc, timeout):
+        host, _, port = netloc.partition(':')
+        port = int(port or (443 if scheme == 'https' else 80))
+
+        sock = socket.create_connection((host, port), timeout)
+        if scheme == 'https':
+            context = ssl.create_default_context()
+            context.set_alpn_protocols(['h2'])
+            sock = context.wrap_socket(sock, server_hostname=host)
+        sock.settimeout(None)
+
+        self.authority = netloc
+        self.scheme = scheme
+        self.alive = True
+
+        self._sock = sock
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._streams = {}
+
+        h2_config = config.H2Configuration(client_side=True,
+                                           header_encoding='utf-8')
+        self._conn = connection.H2Connection(config=h2_config)
+        self._conn.initiate_connection()
+        self._flush()
+
+        reader = threading.Thread(target=self._read)
+        reader.daemon = True
+        reader.start()
+
+    def _flush(self):
+        data = self._conn.data_to_send()
+        if data:
+            self._sock.sendall(data)
+
+    def _read(self):
+        try:
+            while True:
+                data = self._sock.recv(65535)
+                if not data:
+                    raise EOFError('Connection closed by the server')
+
+                done = []
+                try:
+                    with self._lock:
+                        for event in self._conn.receive_data(data):
+                            self._handle(event, done)
+                        self._flush()
+                        self._changed.notify_all()
+                finally:
+                    # Complete the futures without holding the lock,
+                    # their callbacks may send new requests. Streams
+                    # ended before the connection was terminated are
+                    # no longer tracked and must be completed here.
+                    self._complete(done)
+        except Exception as ex:
+            self._fail(ex)
+
+    @staticmethod
+    def _complete(done):
+        for stream, error in done:
+            # Skip the streams cancelled meanwhile.
+            if not stream.future.set_running_or_notify_cancel():
+                continue
+
+            if error is not None:
+                stream.future.set_exception(error)
+            else:
+                stream.future.set_result((stream.status,
+                                          stream.headers,
+                                          b''.join(stream.data)))
+
+    def _handle(self, event, done):
+        if isinstance(event, events.ConnectionTerminated):
+            raise EOFError('Connection terminated by the server')
+
+        stream = self._streams.get(getattr(event, 'stream_id', None))
+        if stream is None:
+            return
+
+        if isinstance(event, events.ResponseReceived):
+            headers = dict(event.headers)
+            stream.status = int(headers.pop(':status'))
+            stream.headers = headers
+        elif isinstance(event, events.DataReceived):
+            stream.data.append(event.data)
+            self._conn.acknowledge_received_data(
+                event.flow_controlled_length, event.stream_id)
+        elif isinstance(event, events.StreamEnded):
+            done.append((self._streams.pop(event.stream_id), None))
+        elif isinstance(event, events.StreamReset):
+            error = errors.TransportError('Stream reset by the server: %s'
+                                          % event.error_code)
+            done.append((self._streams.pop(event.stream_id), error))
+
+    def _fail(self, ex):
+        with self._lock:
+            self.alive = False
+            streams, self._streams = self._streams, {}
+            self._changed.notify_all()
+
+        error = errors.TransportError('Connection lost: %s' % ex)
+        self._complete([(stream, error) for stream in streams.values()])
+        self.close()
+
+    def _send_body(self, stream_id, body):
+        view = memoryview(body)
+        while view:
+            window = self._conn.local_flow_control_window(stream_id)
+            size = min(window, self._conn.max_outbound_frame_size, len(view))
+            if size <= 0:
+                self._changed.wait()
+                if not self.alive:
+                    raise errors.TransportError('Connection lost')
+                continue
+
+            self._conn.send_data(stream_id, view[:size].tobytes(),
+                                 end_stream=size == len(view))
+            self._flush()
+            view = view[size:]
+
+    def submit(self, method, path, headers, body=None):
+        """Sends a request and returns a `Future` for its response
+
+        The future's result is a tuple with the response's
+        status, headers and body.
+        """
+        request_headers = [(':method', method),
+                           (':authority', self.authority),
+                           (':scheme', self.scheme),
+                           (':path', path)]
+        for name, value in headers.items():
+            if value is not None:
+                request_headers.append((name.lower(), str(value)))
+
+        stream = _Stream()
+        with self._lock:
+            while (self.alive and self._conn.open_outbound_streams >=
+                   self._conn.remote_settings.max_concurrent_streams):
+                self._changed.wait()
+
+            if not self.alive:
+                raise errors.TransportError('Connection lost')
+
+            stream_id = self._conn.get_next_available_stream_id()
+            self._streams[stream_id] = stream
+            self._conn.send_headers(stream_id, request_headers,
+                                    end_stream=not body)
+            self._flush()
+
+            if body:
+                self._send_body(stream_id, body)
+
+        def cancelled(future):
+            if future.cancelled():
+                self._reset(stream_id)
+
+        stream.future.add_done_callback(cancelled)
+        return stream.future
+
+    def _reset(self, stream_id):
+        """Resets a stream whose response isn't awaited anymore
+
+        This frees its slot right away rather than once the
+        server answers.
+        """
+        with self._lock:
+            if self._streams.pop(stream_id, None) is None or not self.alive:
+                return
+
+            try:
+                self._conn.reset_stream(stream_id,
+                                        h2_errors.ErrorCodes.CANCEL)
+                self._flush()
+            except (h2_exceptions.StreamClosedError, socket.error):
+                # The stream or the connection are gone already.
+                pass
+            self._changed.notify_all()
+
+    def close(self):
+        try:
+            self._sock.close()
+        except Exception:
+            # The connection is being dropped
+            # anyway.
+            pass
+
+
+class Http2Transport(http.HttplibTransport):
+    """HTTP/2 transport
+
+    Concurrent requests to the same endpoint are multiplexed
+    over a single connection and the headers sent in every
+    request, i.e: `X-Auth-Token` and `Client-ID`, are only
+    sent in full once thanks to HPACK. Plain `http` endpoints
+    are spoken to with prior knowledge, `https` ones negotiate
+    HTTP/2 through ALPN.
+
+    Select it by passing `transport='http2'` in the client's
+    options. Besides `send`, `submit` returns a future which
+    can be awaited from asynchronous code through
+    `asyncio.wrap_future`.
+
+    :param options: Transport options:
+        - http2_timeout: Seconds to wait for a connection.
+            Default: 60
+        - timeouts: Seconds to wait for a response, keyed by
+            operation name. Refer to `Transport.get_timeout`.
+    :type options: `dict`
+    """
+
+    # Connection specific headers are not allowed
+    # by HTTP/2.
+    _static_headers = {'Content-Type': 'application/json',
+                       'Accept': 'application/json'}
+
+    def __init__(self, options):
+        super(Http2Transport, self).__init__(options)
+        self.timeout = float((options or {}).get('http2_timeout', 60))
+        self._connections = {}
+
+    def _get_connection(self, scheme, netloc):
+        key = (scheme, netloc)
+        with self._lock:
+            conn = self._connections.get(key)
+            if conn is None or not conn.alive:
+                try:
+                    conn = _Connection(scheme, netloc, self.timeout)
+                except Exception as ex:
+                    msg = 'Unable to connect to {0}: {1}'.format(netloc, ex)
+                    raise errors.TransportError(msg)
+                self._connections[key] = conn
+            return conn
+
+    def submit(self, request):
+        """Sends `request` and returns a future for its response
+
+        :returns: A future whose result is a `Response`.
+        :rtype: `concurrent.futures.Future`
+        """
+        parsed, method, path, headers, body = self._prepare_raw(request)
+        conn = self._get_connection(parsed.scheme, parsed.netloc)
+
+        result = futures.Future()
+
+        def done(future):
+            # Nothing to do if the response isn't awaited anymore.
+            if not result.set_running_or_notify_cancel():
+                return
+
+            try:
+                status, resp_headers, data = future.result()
+                text = data.decode('utf-8')
+                self._check_status(status, text)
+                result.set_result(response.Response(request, text,
+                                                    headers=resp_headers))
+            except Exception as ex:
+                result.set_exception(ex)
+
+        stream = conn.submit(method, path, headers, body)
+        stream.add_done_callback(done)
+
+        def cancel(future):
+            if future.cancelled():
+                stream.cancel()
+
+        result.add_done_callback(cancel)
+        return result
+
+    def send(self, request):
+        timeout = self.get_timeout(request)
+        future = self.submit(request)
+        try:
+            return future.result(timeout)
+        except futures.TimeoutError:
+            future.cancel()
+            raise errors.RequestTimeout('Timed out waiting for a response')
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, {}
+
+        for conn in connections.values():
+            conn.close()
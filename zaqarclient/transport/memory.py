@@ -0,0 +1,667 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+In-process transport that implements Zaqar's queue semantics.
+
+Stores are shared by every `MemoryTransport` instance pointing to
+the same endpoint, i.e: `memory://test` and `memory://test/v1.1`
+will see the same queues, which mimics what happens when different
+clients talk to the same server.
+"""
+
+import bisect
+import heapq
+import itertools
+import json
+import threading
+import time
+import uuid
+
+import six
+from six.moves.urllib import parse
+
+from zaqarclient.transport import base
+import zaqarclient.transport.errors as errors
+from zaqarclient.transport import response
+
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+_DEFAULT_LIMIT = 10
+_DEFAULT_TTL = 60
+
+
+def get_store(endpoint):
+    """Returns the store backing `endpoint`
+
+    :param endpoint: A `memory://` url. Only its location
+        is used to identify the store.
+    :type endpoint: `six.string_types`
+
+    :rtype: `_Store`
+    """
+    key = parse.urlparse(endpoint).netloc
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = _STORES[key] = _Store()
+        return store
+
+
+def reset(endpoint=None):
+    """Drops all the data stored for `endpoint`
+
+    If `endpoint` is None, every store will be dropped.
+    """
+    with _STORES_LOCK:
+        if endpoint is None:
+            _STORES.clear()
+        else:
+            _STORES.pop(parse.urlparse(endpoint).netloc, None)
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() == 'true'
+
+
+def _as_list(value):
+    if isinstance(value, six.string_types):
+        return [v for v in value.split(',') if v]
+    return list(value)
+
+
+class _Message(object):
+
+    __slots__ = ('id', 'ttl', 'body', 'created', 'expires',
+                 'client_id', 'claim_id', 'claim_expires')
+
+    def __init__(self, id, ttl, body, client_id, now):
+        self.id = id
+        self.ttl = ttl
+        self.body = body
+        self.created = now
+        self.expires = now + ttl
+        self.client_id = client_id
+        self.claim_id = None
+        self.claim_expires = 0
+
+    def is_claimed(self, now):
+        return self.claim_id is not None and self.claim_expires > now
+
+    def to_dict(self, href, now):
+        return {'href': href,
+                'ttl': self.ttl,
+                'age': int(now - self.created),
+                'body': self.body}
+
+
+class _Claim(object):
+
+    __slots__ = ('id', 'ttl', 'grace', 'created', 'expires', 'messages')
+
+    def __init__(self, ttl, grace, now):
+        self.id = uuid.uuid4().hex
+        self.ttl = ttl
+        self.grace = grace
+        self.created = now
+        self.expires = now + ttl
+        self.messages = []
+
+
+class _Queue(object):
+    """Messages are indexed by id in a dict and kept in
+    order in a sorted list of ids. Ids are generated from a
+    monotonic counter so posting is an append and seeking a
+    marker is a bisection. Deleted ids are removed from the
+    list lazily.
+
+    Free messages are kept in a heap of ids, so claims and
+    pops take the oldest ones without walking over claimed
+    messages. Claims and messages are expired from heaps
+    ordered by expiration time, which keeps the count of
+    claimed messages up to date for stats.
+    """
+
+    __slots__ = ('name', 'metadata', 'messages', 'claims', 'claimed',
+                 '_ids', '_head', '_dead', '_free', '_expiring',
+                 '_claims_expiring', '_seq')
+
+    def __init__(self, name, metadata=None):
+        self.name = name
+        self.metadata = metadata or {}
+        self.messages = {}
+        self.claims = {}
+        self.claimed = 0
+        self._ids = []
+        self._head = 0
+        self._dead = 0
+        self._free = []
+        self._expiring = []
+        self._claims_expiring = []
+        self._seq = itertools.count()
+
+    def add(self, message):
+        self.messages[message.id] = message
+        self._ids.append(message.id)
+        heapq.heappush(self._free, message.id)
+        heapq.heappush(self._expiring, (message.expires, message.id))
+
+    def remove(self, message_id):
+        message = self.messages.pop(message_id, None)
+        if message is None:
+            return False
+
+        if message.claim_id is not None:
+            self.claimed -= 1
+
+        self._dead += 1
+        if self._dead > 64 and self._dead > len(self.messages):
+            self._ids = [i for i in self._ids if i in self.messages]
+            self._head = 0
+            self._dead = 0
+        return True
+
+    def expire(self, now):
+        """Releases the expired claims and drops expired messages."""
+        while (self._claims_expiring and
+               self._claims_expiring[0][0] <= now):
+            expires, seq, claim = heapq.heappop(self._claims_expiring)
+            # Updated claims are pushed again, skip
+            # the entries left behind.
+            if claim.expires != expires:
+                continue
+            if self.claims.get(claim.id) is claim:
+                del self.claims[claim.id]
+            self._release(claim)
+
+        while self._expiring and self._expiring[0][0] <= now:
+            expires, message_id = heapq.heappop(self._expiring)
+            message = self.messages.get(message_id)
+            if message is not None and message.expires == expires:
+                self.remove(message_id)
+
+    def take(self, limit, now):
+        """Pops up to `limit` of the oldest free messages."""
+        self.expire(now)
+
+        taken = []
+        while self._free and len(taken) < limit:
+            message = self.messages.get(heapq.heappop(self._free))
+            if message is None or message.claim_id is not None:
+                continue
+            taken.append(message)
+        return taken
+
+    def hold(self, claim, message, grace):
+        # Messages must live, at least, as long as the
+        # claim does plus its grace.
+        expires = max(message.expires, claim.expires + grace)
+        if expires != message.expires:
+            message.expires = expires
+            heapq.heappush(self._expiring, (expires, message.id))
+
+        if message.claim_id is None:
+            self.claimed += 1
+        message.claim_id = claim.id
+        message.claim_expires = claim.expires
+
+    def watch(self, claim):
+        """Schedules `claim`'s expiration at its current `expires`."""
+        self.claims[claim.id] = claim
+        heapq.heappush(self._claims_expiring,
+                       (claim.expires, next(self._seq), claim))
+
+    def _release(self, claim):
+        for message_id in claim.messages:
+            message = self.messages.get(message_id)
+            if message is not None and message.claim_id == claim.id:
+                message.claim_id = None
+                message.claim_expires = 0
+                self.claimed -= 1
+                heapq.heappush(self._free, message.id)
+
+    def release(self, claim_id):
+        claim = self.claims.pop(claim_id, None)
+        if claim is not None:
+            self._release(claim)
+
+    def oldest(self):
+        while self._head < len(self._ids):
+            message = self.messages.get(self._ids[self._head])
+            if message is not None:
+                return message
+            self._head += 1
+        return None
+
+    def newest(self):
+        while len(self._ids) > self._head:
+            message = self.messages.get(self._ids[-1])
+            if message is not None:
+                return message
+            self._ids.pop()
+            self._dead -= 1
+        return None
+
+    def iterate(self, now, marker=None):
+        """Yields live messages after `marker`, expiring old ones."""
+        start = self._head
+        if marker:
+            start = bisect.bisect_right(self._ids, marker, start)
+
+        expired = []
+        try:
+            for message_id in itertools.islice(self._ids, start, None):
+                message = self.messages.get(message_id)
+                if message is None:
+                    continue
+
+                if message.expires <= now:
+                    expired.append(message_id)
+                    continue
+
+                yield message
+        finally:
+            for message_id in expired:
+                self.remove(message_id)
+
+    def claim(self, claim_id, now):
+        claim = self.claims.get(claim_id)
+        if claim is None or claim.expires <= now:
+            return None
+        return claim
+
+
+class _Store(object):
+    """Holds the state of an in-memory Zaqar server.
+
+    Every public method is named after the operation it
+    implements and gets called with the store's lock held.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.queues = {}
+        self.pools = {}
+        self.flavors = {}
+        self._counter = itertools.count(1)
+
+    def _next_id(self):
+        return '%024x' % next(self._counter)
+
+    def _queue(self, name, create=False):
+        queue = self.queues.get(name)
+        if queue is None:
+            if not create:
+                raise errors.ResourceNotFound('Queue %s does not exist'
+                                              % name)
+            queue = self.queues[name] = _Queue(name)
+        return queue
+
+    def _lookup(self, label, name):
+        # v1.1 treats missing queues as empty ones, v1
+        # raises a 404.
+        if label == 'v1':
+            return self._queue(name)
+        return self.queues.get(name)
+
+    def _href(self, label, queue, message, claim_id=None):
+        href = '/{0}/queues/{1}/messages/{2}'.format(label, queue.name,
+                                                     message.id)
+        if claim_id:
+            href += '?claim_id=' + claim_id
+        return href
+
+    def _take(self, queue, limit, now):
+        if limit <= 0:
+            return []
+        return queue.take(limit, now)
+
+    # Queues
+
+    def queue_list(self, label, params, content, client_id, now):
+        marker = params.get('marker')
+        limit = int(params.get('limit') or _DEFAULT_LIMIT)
+        detailed = _as_bool(params.get('detailed', False))
+
+        names = sorted(self.queues)
+        if marker:
+            names = names[bisect.bisect_right(names, marker):]
+        names = names[:limit]
+
+        if not names:
+            return None
+
+        queues = []
+        for name in names:
+            queue = {'name': name,
+                     'href': '/{0}/queues/{1}'.format(label, name)}
+            if detailed:
+                queue['metadata'] = self.queues[name].metadata
+            queues.append(queue)
+
+        query = {'marker': names[-1], 'limit': limit}
+        if detailed:
+            query['detailed'] = 'true'
+
+        href = '/{0}/queues?{1}'.format(label, parse.urlencode(query))
+        return {'queues': queues,
+                'links': [{'rel': 'next', 'href': href}]}
+
+    def queue_create(self, label, params, content, client_id, now):
+        queue = self._queue(params['queue_name'], create=True)
+        if content:
+            queue.metadata = content
+
+    def queue_exists(self, label, params, content, client_id, now):
+        self._queue(params['queue_name'])
+
+    def queue_delete(self, label, params, content, client_id, now):
+        self.queues.pop(params['queue_name'], None)
+
+    def queue_get_metadata(self, label, params, content, client_id, now):
+        return self._queue(params['queue_name']).metadata
+
+    def queue_set_metadata(self, label, params, content, client_id, now):
+        self._queue(params['queue_name']).metadata = content or {}
+
+    def queue_get_stats(self, label, params, content, client_id, now):
+        queue = self._queue(params['queue_name'])
+        queue.expire(now)
+
+        total = len(queue.messages)
+        claimed = queue.claimed
+        stats = {'free': total - claimed, 'claimed': claimed,
+                 'total': total}
+        oldest, newest = queue.oldest(), queue.newest()
+        for key, message in (('oldest', oldest), ('newest', newest)):
+            if message is not None:
+                created = time.strftime('%Y-%m-%dT%H:%M:%SZ',
+                                        time.gmtime(message.created))
+                stats[key] = {'href': self._href(label, queue, message),
+                              'age': int(now - message.created),
+                              'created': created}
+        return {'messages': stats}
+
+    # Messages
+
+    def message_list(self, label, params, content, client_id, now):
+        queue = self._lookup(label, params['queue_name'])
+        if queue is None:
+            return None
+
+        marker = params.get('marker')
+        limit = int(params.get('limit') or _DEFAULT_LIMIT)
+        echo = _as_bool(params.get('echo', False))
+        include_claimed = _as_bool(params.get('include_claimed', False))
+
+        messages = []
+        for message in queue.iterate(now, marker):
+            if not echo and message.client_id == client_id:
+                continue
+
+            if not include_claimed and message.is_claimed(now):
+                continue
+
+            messages.append(message)
+            if len(messages) == limit:
+                break
+
+        if not messages:
+            return None
+
+        query = {'marker': messages[-1].id, 'limit': limit}
+        if echo:
+            query['echo'] = 'true'
+        if include_claimed:
+            query['include_claimed'] = 'true'
+
+        href = '/{0}/queues/{1}/messages?{2}'.format(label, queue.name,
+                                                     parse.urlencode(query))
+        return {'messages': [m.to_dict(self._href(label, queue, m), now)
+                             for m in messages],
+                'links': [{'rel': 'next', 'href': href}]}
+
+    def message_post(self, label, params, content, client_id, now):
+        # Queues are lazily created in v1.1.
+        queue = self._queue(params['queue_name'], create=label != 'v1')
+
+        if not isinstance(content, list) or not content:
+            raise errors.MalformedRequest('No messages were found in the '
+                                          'request body.')
+
+        resources = []
+        for item in content:
+            if not isinstance(item, dict) or 'body' not in item:
+                raise errors.MalformedRequest('Missing "body" field.')
+
+            ttl = int(item.get('ttl') or _DEFAULT_TTL)
+            message = _Message(self._next_id(), ttl, item['body'],
+                               client_id, now)
+            queue.add(message)
+            resources.append(self._href(label, queue, message))
+
+        return {'resources': resources, 'partial': False}
+
+    def message_get(self, label, params, content, client_id, now):
+        queue = self._queue(params['queue_name'])
+        message = queue.messages.get(params['message_id'])
+        if message is None or message.expires <= now:
+            raise errors.ResourceNotFound('Message %s does not exist'
+                                          % params['message_id'])
+        return message.to_dict(self._href(label, queue, message), now)
+
+    def message_get_many(self, label, params, content, client_id, now):
+        queue = self._queue(params['queue_name'])
+
+        messages = []
+        for message_id in _as_list(params['ids']):
+            message = queue.messages.get(message_id)
+            if message is not None and message.expires > now:
+                href = self._href(label, queue, message)
+                messages.append(message.to_dict(href, now))
+        return messages or None
+
+    def message_delete(self, label, params, content, client_id, now):
+        queue = self.queues.get(params['queue_name'])
+        if queue is None:
+            return
+
+        message = queue.messages.get(params['message_id'])
+        if message is None:
+            return
+
+        claim_id = params.get('claim_id')
+        if message.is_claimed(now):
+            if claim_id != message.claim_id:
+                raise errors.ForbiddenError('Message is claimed by '
+                                            'another consumer.')
+        elif claim_id:
+            raise errors.ForbiddenError('Claim %s has expired or does '
+                                        'not own this message.' % claim_id)
+
+        queue.remove(message.id)
+
+    def message_delete_many(self, label, params, content, client_id, now):
+        if 'pop' in params:
+            return self.message_pop(label, params, content, client_id, now)
+
+        queue = self.queues.get(params['queue_name'])
+        if queue is not None:
+            for message_id in _as_list(params['ids']):
+                queue.remove(message_id)
+
+    def message_pop(self, label, params, content, client_id, now):
+        queue = self._lookup(label, params['queue_name'])
+        if queue is None:
+            return None
+
+        messages = []
+        for message in self._take(queue, int(params['pop']), now):
+            messages.append(message.to_dict(self._href(label, queue,
+                                                       message), now))
+            queue.remove(message.id)
+
+        # Unlike listings, pops have no links to follow.
+        if not messages:
+            return None
+        return {'messages': messages}
+
+    # Claims
+
+    def claim_create(self, label, params, content, client_id, now):
+        queue = self._lookup(label, params['queue_name'])
+        if queue is None:
+            return None
+
+        content = content or {}
+
+        ttl = int(content.get('ttl') or _DEFAULT_TTL)
+        grace = int(content.get('grace') or 0)
+        limit = int(content.get('limit') or _DEFAULT_LIMIT)
+
+        messages = self._take(queue, limit, now)
+        if not messages:
+            return None
+
+        claim = _Claim(ttl, grace, now)
+        queue.watch(claim)
+
+        claimed = []
+        for message in messages:
+            queue.hold(claim, message, grace)
+            claim.messages.append(message.id)
+
+            href = self._href(label, queue, message, claim.id)
+            claimed.append(message.to_dict(href, now))
+        return claimed
+
+    def claim_get(self, label, params, content, client_id, now):
+        queue = self._queue(params['queue_name'])
+        claim = queue.claim(params['claim_id'], now)
+        if claim is None:
+            raise errors.ResourceNotFound('Claim %s does not exist'
+                                          % params['claim_id'])
+
+        messages = []
+        for message_id in claim.messages:
+            message = queue.messages.get(message_id)
+            if message is not None and message.claim_id == claim.id:
+                href = self._href(label, queue, message, claim.id)
+                messages.append(message.to_dict(href, now))
+
+        href = '/{0}/queues/{1}/claims/{2}'.format(label, queue.name,
+                                                   claim.id)
+        return {'age': int(now - claim.created),
+                'ttl': claim.ttl,
+                'grace': claim.grace,
+                'href': href,
+                'messages': messages}
+
+    def claim_update(self, label, params, content, client_id, now):
+        queue = self._queue(params['queue_name'])
+        claim = queue.claim(params['claim_id'], now)
+        if claim is None:
+            raise errors.ResourceNotFound('Claim %s does not exist'
+                                          % params['claim_id'])
+
+        content = content or {}
+        claim.ttl = int(content.get('ttl', claim.ttl))
+        claim.grace = int(content.get('grace', claim.grace))
+        claim.expires = now + claim.ttl
+        queue.watch(claim)
+
+        for message_id in claim.messages:
+            message = queue.messages.get(message_id)
+            if message is not None and message.claim_id == claim.id:
+                queue.hold(claim, message, claim.grace)
+
+    def claim_delete(self, label, params, content, client_id, now):
+        queue = self.queues.get(params['queue_name'])
+        if queue is None:
+            return
+
+        queue.release(params['claim_id'])
+
+    # Admin
+
+    def pool_create(self, label, params, content, client_id, now):
+        self.pools[params['pool_name']] = content
+
+    def pool_delete(self, label, params, content, client_id, now):
+        self.pools.pop(params['pool_name'], None)
+
+    def flavor_create(self, label, params, content, client_id, now):
+        self.flavors[params['flavor_name']] = content
+
+    def flavor_delete(self, label, params, content, client_id, now):
+        self.flavors.pop(params['flavor_name'], None)
+
+    def health(self, label, params, content, client_id, now):
+        pass
+
+
+class MemoryTransport(base.Transport):
+    """Transport that serves requests from an in-process store.
+
+    This transport doesn't need a Zaqar server. It implements
+    queues, messages, claims, pools and flavors as Zaqar does,
+    which makes it suitable for testing code that relies on
+    this library. Use it by pointing the client to a `memory://`
+    url, i.e: `memory://localhost`.
+    """
+
+    def send(self, request):
+        # Nothing blocks here, the deadline just
+        # needs to be checked.
+        self.get_timeout(request)
+        store = get_store(request.endpoint)
+
+        params = dict(request.params)
+        operation = request.operation
+        if not operation:
+            # Requests with no operation come from
+            # `Client.follow`.
+            operation, query = request.api.resolve(request.ref)
+            params.update(query)
+
+        # Fail the same way `HttpTransport` does for
+        # operations not supported by this API.
+        request.api.get_schema(operation)
+
+        handler = getattr(store, operation, None)
+        if handler is None:
+            raise errors.MalformedRequest('%s is not supported'
+                                          % operation)
+
+        content = request.content
+        if content:
+            try:
+                content = json.loads(content)
+            except ValueError:
+                raise errors.MalformedRequest('Request body is not '
+                                              'valid JSON')
+
+        client_id = request.headers.get('Client-ID')
+        with store.lock:
+            result = handler(request.api.label, params, content,
+                             client_id, time.time())
+
+        if result is None:
+            return response.Response(request, None)
+        return response.Response(request, json.dumps(result))
@@ -0,0 +1,279 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import threading
+import time
+
+from zaqarclient.transport import base
+import zaqarclient.transport.errors as errors
+
+BLOCK = 'block'
+RAISE = 'raise'
+
+_SCOPES = ('project', 'queue')
+_KINDS = ('requests', 'messages')
+
+# AIMD parameters. The rate is halved on every 503 and
+# recovers by about 5% of the configured rate per second
+# of successful requests.
+_DECREASE_FACTOR = 0.5
+_INCREASE_RATIO = 0.05
+_MIN_RATIO = 0.01
+
+
+class TokenBucket(object):
+    """Thread safe token bucket
+
+    Tokens are added at `rate` per second, up to `capacity`.
+    Callers asking for more tokens than available reserve
+    them anyway and are told how long to wait, so they're
+    served in order.
+
+    :param rate: Tokens added per second.
+    :type rate: float
+    :param capacity: Maximum number of tokens kept, that is,
+        the allowed burst. Default: `rate`.
+    :type capacity: float
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.max_rate = self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self._tokens = self.capacity
+        self._stamp = time.time()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.time()
+        self._tokens = min(self.capacity,
+                           self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def reserve(self, tokens, timeout=None):
+        """Takes `tokens` out of the bucket
+
+        :returns: Seconds to wait before using the tokens.
+        :rtype: float
+
+        :raises: `errors.RateLimitExceeded` if that'd take
+            longer than `timeout`. No tokens are taken then.
+        """
+        with self._lock:
+            self._refill()
+
+            # Requests bigger than the bucket only need it
+            # full, otherwise they'd never pass.
+            needed = min(tokens, self.capacity)
+            delay = max(0.0, (needed - self._tokens) / self.rate)
+            if timeout is not None and delay > timeout:
+                raise errors.RateLimitExceeded('Rate limit exceeded, '
+                                               'retry in %.2fs' % delay)
+            self._tokens -= tokens
+            return delay
+
+    def refund(self, tokens):
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + tokens)
+
+    def decrease(self):
+        """Multiplicative decrease of the rate"""
+        with self._lock:
+            self._refill()
+            self.rate = max(self.max_rate * _MIN_RATIO,
+                            self.rate * _DECREASE_FACTOR)
+
+    def increase(self):
+        """Additive increase of the rate"""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill()
+                step = self.max_rate * _INCREASE_RATIO / self.rate
+                self.rate = min(self.max_rate, self.rate + step)
+
+
+class RateLimiter(object):
+    """Token bucket limits per project and per queue
+
+    Every project, identified by its `X-Project-Id`, and
+    every queue get their own buckets. Pass the same instance
+    to several clients, through the `rate_limiter` option,
+    to make them share the limits.
+
+    :param limits: Limits, i.e::
+
+        {
+            'project': {'requests': 100, 'messages': 1000},
+            'queue': {'requests': 20, 'messages': 200},
+            'policy': 'block',
+            'adaptive': True,
+        }
+
+        - project, queue: Requests and messages allowed per
+            second. Missing ones aren't limited.
+        - policy: Either `block`, to wait for the tokens as
+            long as the request's timeout allows, or `raise`.
+            Default: `block`
+        - adaptive: Whether to halve the rates when the
+            server returns a 503 and slowly recover them
+            afterwards. Default: False
+    :type limits: `dict`
+    """
+
+    def __init__(self, limits):
+        self.policy = limits.get('policy', BLOCK)
+        if self.policy not in (BLOCK, RAISE):
+            raise ValueError('Unknown rate limit policy: %s' % self.policy)
+
+        self.adaptive = limits.get('adaptive', False)
+        self._rates = {}
+        for scope in _SCOPES:
+            for kind in _KINDS:
+                rate = (limits.get(scope) or {}).get(kind)
+                if rate:
+                    self._rates[(scope, kind)] = rate
+
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, scope, kind, key):
+        bucket_key = (scope, kind, key)
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(bucket_key)
+                if bucket is None:
+                    rate = self._rates[(scope, kind)]
+                    bucket = self._buckets[bucket_key] = TokenBucket(rate)
+        return bucket
+
+    def buckets(self, project, queue, messages):
+        """Returns the buckets and tokens a request needs
+
+        :returns: A list of `(bucket, tokens)` tuples.
+        """
+        keys = {'project': project, 'queue': queue}
+        tokens = {'requests': 1, 'messages': messages}
+
+        needed = []
+        for scope, kind in self._rates:
+            if tokens[kind] and (scope != 'queue' or queue):
+                needed.append((self._bucket(scope, kind, keys[scope]),
+                               tokens[kind]))
+        return needed
+
+    def acquire(self, buckets, timeout):
+        """Waits until the tokens are available
+
+        :param buckets: As returned by `buckets`.
+        :param timeout: Seconds the request may wait. The
+            `raise` policy doesn't wait at all.
+
+        :raises: `errors.RateLimitExceeded`
+        """
+        if self.policy == RAISE:
+            timeout = 0
+
+        taken = []
+        delay = 0
+        try:
+            for bucket, tokens in buckets:
+                delay = max(delay, bucket.reserve(tokens, timeout))
+                taken.append((bucket, tokens))
+        except errors.RateLimitExceeded:
+            for bucket, tokens in taken:
+                bucket.refund(tokens)
+            raise
+
+        if delay:
+            time.sleep(delay)
+
+    def feedback(self, buckets, throttled):
+        """Adapts the rates to the server's response"""
+        if not self.adaptive:
+            return
+
+        for bucket, tokens in buckets:
+            if throttled:
+                bucket.decrease()
+            else:
+                bucket.increase()
+
+
+def _message_count(request, operation, params):
+    if operation == 'message_post' and request.content:
+        messages = json.loads(request.content)
+        return len(messages) if isinstance(messages, list) else 1
+    if operation == 'message_pop':
+        return int(params.get('pop') or 0)
+    if operation == 'message_delete_many':
+        return int(params.get('pop') or 0) or len(params.get('ids') or ())
+    if operation == 'claim_create' and request.content:
+        return json.loads(request.content).get('limit') or 10
+    return 0
+
+
+class RateLimitingTransport(base.Transport):
+    """Wraps a transport and enforces client side rate limits
+
+    Requests wait for, or fail without, the tokens of the
+    `RateLimiter` buckets they go through before reaching the
+    wrapped transport. Select it by passing `rate_limits`, or
+    a `rate_limiter` instance, in the client's options.
+
+    :param options: Transport options:
+        - rate_limiter: `RateLimiter` to use.
+        - rate_limits: Limits to build a `RateLimiter`
+            from, if `rate_limiter` is not given.
+    :type options: `dict`
+    :param transport: The transport to wrap.
+    :type transport: `zaqarclient.transport.base.Transport`
+    """
+
+    def __init__(self, options, transport):
+        super(RateLimitingTransport, self).__init__(options)
+        self.transport = transport
+        self.limiter = (options.get('rate_limiter') or
+                        RateLimiter(options['rate_limits']))
+
+    def _lookup(self, request):
+        params = request.params
+        operation = request.operation
+        if not operation and request.api and request.ref:
+            # Requests with no operation come from
+            # `Client.follow`.
+            try:
+                operation, params = request.api.resolve(request.ref)
+            except Exception:
+                params = {}
+        return operation, params
+
+    def send(self, request):
+        operation, params = self._lookup(request)
+        buckets = self.limiter.buckets(
+            request.headers.get('X-Project-Id'),
+            params.get('queue_name'),
+            _message_count(request, operation, params))
+
+        self.limiter.acquire(buckets, self.get_timeout(request))
+
+        try:
+            resp = self.transport.send(request)
+        except errors.ServiceUnavailableError:
+            self.limiter.feedback(buckets, throttled=True)
+            raise
+
+        self.limiter.feedback(buckets, throttled=False)
+        return resp
@@ -0,0 +1,244 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Transports to record sessions and replay them later on.
+
+Sessions are stored as JSON lines, one exchange per line. Files
+whose name ends in `.gz` are transparently (de)compressed.
+"""
+
+import collections
+import gzip
+import io
+import json
+import os
+import threading
+import time
+
+from zaqarclient.transport import base
+import zaqarclient.transport.errors as errors
+from zaqarclient.transport import response
+
+
+# Files being recorded to, by path. Transports recording to the same
+# file, i.e: clients sharing their options, share its `_Recorder`.
+_RECORDERS = {}
+_RECORDERS_LOCK = threading.Lock()
+
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, mode + 'b'),
+                                encoding='utf-8')
+    return io.open(path, mode, encoding='utf-8')
+
+
+def _default(obj):
+    # Params may contain sets, i.e:
+    # `Queue.delete_messages`.
+    if isinstance(obj, (set, frozenset, tuple)):
+        return sorted(obj)
+    raise TypeError('%r is not JSON serializable' % obj)
+
+
+class _Recorder(object):
+    """File recorded to by one or more transports"""
+
+    def __init__(self, path):
+        self.path = path
+        self.users = 0
+        self._lock = threading.Lock()
+        self._file = _open(path, 'w')
+
+    def write(self, line):
+        with self._lock:
+            self._file.write(line + u'\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def _acquire(path):
+    path = os.path.abspath(path)
+    with _RECORDERS_LOCK:
+        recorder = _RECORDERS.get(path)
+        if recorder is None:
+            recorder = _RECORDERS[path] = _Recorder(path)
+        recorder.users += 1
+        return recorder
+
+
+def _release(recorder):
+    with _RECORDERS_LOCK:
+        recorder.users -= 1
+        if recorder.users:
+            return
+        del _RECORDERS[recorder.path]
+    recorder.close()
+
+
+def _key(operation, ref, params, content):
+    return (operation, ref,
+            json.dumps(params, sort_keys=True, default=_default),
+            content)
+
+
+class RecordingTransport(base.Transport):
+    """Wraps a transport and records every exchange
+
+    Each request's operation, ref, params and content are
+    written along with the response's content, headers and
+    the time it took to get it. Errors are recorded as well
+    and re-raised. Transports recording to the same file
+    share it, the file is closed once they're all closed.
+
+    :param options: Transport options:
+        - record_file: Path of the file to record to.
+    :type options: `dict`
+    :param transport: The transport to wrap.
+    :type transport: `zaqarclient.transport.base.Transport`
+    """
+
+    def __init__(self, options, transport):
+        super(RecordingTransport, self).__init__(options)
+        self.transport = transport
+        self._recorder = _acquire(options['record_file'])
+
+    def _write(self, record):
+        line = json.dumps(record, separators=(',', ':'), default=_default)
+        self._recorder.write(line)
+
+    def send(self, request):
+        # Transports may consume the request's
+        # params, copy them before sending.
+        record = {'operation': request.operation,
+                  'ref': request.ref,
+                  'params': dict(request.params),
+                  'content': request.content}
+
+        start = time.time()
+        try:
+            resp = self.transport.send(request)
+        except errors.TransportError as ex:
+            record['elapsed'] = time.time() - start
+            record['error'] = {'type': type(ex).__name__,
+                               'message': str(ex)}
+            self._write(record)
+            raise
+
+        record['elapsed'] = time.time() - start
+        record['response'] = {'content': resp.content,
+                              'headers': dict(resp.headers)}
+        self._write(record)
+        return resp
+
+    def close(self):
+        recorder, self._recorder = self._recorder, None
+        if recorder is not None:
+            _release(recorder)
+
+
+class ReplayTransport(base.Transport):
+    """Serves responses from a recorded session
+
+    Requests are matched against the recorded ones by their
+    operation, ref, params and content. If there's no exact
+    match, the first unused exchange with the same operation
+    and ref is used. Once all the matching exchanges have been
+    served, the last one is served again, which keeps polling
+    loops going.
+
+    :param options: Transport options:
+        - replay_file: Path of the recorded session.
+        - replay_latency: Factor to apply to the recorded
+            latency. Latency is not simulated by default.
+    :type options: `dict`
+    """
+
+    def __init__(self, options):
+        super(ReplayTransport, self).__init__(options)
+        self.latency = float(options.get('replay_latency') or 0)
+
+        self._lock = threading.Lock()
+        self._used = set()
+        self._last = {}
+        self._exact = collections.defaultdict(collections.deque)
+        self._loose = collections.defaultdict(collections.deque)
+
+        with _open(options['replay_file'], 'r') as session:
+            self._records = [json.loads(line) for line in session if line]
+
+        for index, record in enumerate(self._records):
+            key = _key(record['operation'], record['ref'],
+                       record['params'], record['content'])
+            self._exact[key].append(index)
+            self._loose[key[:2]].append(index)
+
+    def _pop(self, key, indexes):
+        while indexes:
+            index = indexes.popleft()
+            if index not in self._used:
+                self._used.add(index)
+                self._last[key] = index
+                return index
+        return None
+
+    def _find(self, request):
+        key = _key(request.operation, request.ref,
+                   request.params, request.content)
+
+        with self._lock:
+            index = self._pop(key, self._exact[key])
+            if index is None:
+                index = self._pop(key, self._loose[key[:2]])
+            if index is None:
+                index = self._last.get(key)
+            if index is None:
+                index = self._last.get(key[:2])
+
+            # Make loose matches reusable for
+            # subsequent requests.
+            if index is not None:
+                self._last[key[:2]] = index
+
+        if index is None:
+            msg = 'No recorded response for {0} {1}'.format(
+                request.operation, request.ref)
+            raise errors.TransportError(msg)
+        return self._records[index]
+
+    def send(self, request):
+        timeout = self.get_timeout(request)
+        record = self._find(request)
+
+        if self.latency:
+            delay = record.get('elapsed', 0) * self.latency
+            if delay > timeout:
+                time.sleep(timeout)
+                raise errors.RequestTimeout('Timed out waiting '
+                                            'for a response')
+            time.sleep(delay)
+
+        error = record.get('error')
+        if error is not None:
+            error_cls = getattr(errors, error['type'], errors.TransportError)
+            raise error_cls(error['message'])
+
+        resp = record['response']
+        return response.Response(request, resp['content'],
+                                 headers=resp['headers'])
@@ -15,10 +15,13 @@
 # limitations under the License.
 
 import json
+import time
+
 from stevedore import driver
 
 from zaqarclient import auth
 from zaqarclient import errors
+import zaqarclient.transport.errors as transport_errors
 
 
 def prepare_request(auth_opts=None, data=None, **kwargs):
@@ -42,6 +45,11 @@ def prepare_request(auth_opts=None, data=None, **kwargs):
     """
 
     req = Request(**kwargs)
+
+    # Fail fast, there's no point in
+    # authenticating otherwise.
+    req.remaining()
+
     auth_backend = auth.get_backend(**(auth_opts or {}))
     # TODO(flaper87): Do something smarter
     # to get the api_version.
@@ -77,11 +85,14 @@ class Request(object):
     :type headers: dict
     :param api: Api entry point. i.e: 'queues.v1'
     :type api: `six.text_type`.
+    :param deadline: Time, as returned by `time.time`, by
+        which the request must be completed. Default: None
+    :type deadline: float
     """
 
     def __init__(self, endpoint='', operation='',
                  ref='', content=None, params=None,
-                 headers=None, api=None):
+                 headers=None, api=None, deadline=None):
 
         self._api = None
         self._api_mod = api
@@ -92,6 +103,7 @@ class Request(object):
         self.content = content
         self.params = params or {}
         self.headers = headers or {}
+        self.deadline = deadline
 
     @property
     def api(self):
@@ -114,3 +126,21 @@ class Request(object):
         """
         return self.api.validate(params=self.params,
                                  content=self.content)
+
+    def remaining(self):
+        """Returns the seconds left before the deadline
+
+        :returns: The seconds left or None if the
+            request has no deadline.
+        :rtype: float
+
+        :raises: `errors.DeadlineExceeded` if the
+            deadline has passed already.
+        """
+        if self.deadline is None:
+            return None
+
+        remaining = self.deadline - time.time()
+        if remaining <= 0:
+            raise transport_errors.DeadlineExceeded()
+        return remaining
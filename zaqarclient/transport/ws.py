@@ -0,0 +1,271 @@
+# Copyright (c) 2014 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import json
+import threading
+import uuid
+
+import websocket
+
+from zaqarclient.transport import base
+import zaqarclient.transport.errors as errors
+from zaqarclient.transport import http
+from zaqarclient.transport import response
+
+# Header used to match responses with their requests.
+# Zaqar echoes the request, headers included, in
+# every response.
+REQUEST_ID = 'X-Request-ID'
+
+
+def _default(obj):
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError('%r is not JSON serializable' % obj)
+
+
+class _Disconnected(Exception):
+    """The connection was lost before the request was sent."""
+
+
+class _Waiter(object):
+
+    __slots__ = ('_event', 'result', 'error')
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.result = None
+        self.error = None
+
+    def set(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self._event.set()
+
+    def wait(self, timeout):
+        if not self._event.wait(timeout):
+            raise errors.RequestTimeout('Timed out waiting for a response')
+
+        if self.error is not None:
+            raise errors.TransportError('Connection lost: %s' % self.error)
+        return self.result
+
+
+class _Connection(object):
+    """A websocket shared by many concurrent requests
+
+    Requests are written under a lock and a reader thread
+    hands each response to the request waiting for it.
+    """
+
+    def __init__(self, url, timeout):
+        self._ws = websocket.create_connection(url, timeout=timeout)
+        self._ws.settimeout(None)
+
+        self.alive = True
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._pending = {}
+
+        reader = threading.Thread(target=self._read)
+        reader.daemon = True
+        reader.start()
+
+    def _read(self):
+        try:
+            while True:
+                data = json.loads(self._ws.recv())
+
+                req = data.get('request') or {}
+                req_id = (req.get('headers', {}).get(REQUEST_ID) or
+                          data.get('headers', {}).get(REQUEST_ID))
+
+                with self._lock:
+                    waiter = self._pending.pop(req_id, None)
+
+                if waiter is not None:
+                    waiter.set(data)
+        except Exception as ex:
+            self._fail(ex)
+
+    def _fail(self, ex):
+        with self._lock:
+            self.alive = False
+            pending, self._pending = self._pending, {}
+
+        for waiter in pending.values():
+            waiter.set(error=ex)
+
+    def request(self, req_id, message, timeout):
+        waiter = _Waiter()
+        with self._lock:
+            if not self.alive:
+                raise _Disconnected()
+            self._pending[req_id] = waiter
+
+        try:
+            with self._send_lock:
+                self._ws.send(message)
+        except Exception as ex:
+            with self._lock:
+                self._pending.pop(req_id, None)
+            self._fail(ex)
+            self.close()
+            raise _Disconnected()
+
+        try:
+            return waiter.wait(timeout)
+        except errors.RequestTimeout:
+            # Stop waiting for a response that may never come.
+            with self._lock:
+                self._pending.pop(req_id, None)
+            raise
+
+    def close(self):
+        try:
+            self._ws.close()
+        except Exception:
+            # The connection is being dropped
+            # anyway.
+            pass
+
+
+class WebsocketTransport(base.Transport):
+    """Transport for Zaqar's websocket API
+
+    Requests are sent as JSON frames over persistent
+    connections, which are shared by all the threads using
+    this transport. Broken connections are re-opened the
+    next time they're needed. It requires `websocket-client`
+    to be installed.
+
+    :param options: Transport options:
+        - ws_connections: Number of connections to open
+            per endpoint. Default: 1
+        - ws_timeout: Seconds to wait for a connection.
+            Default: 60
+        - timeouts: Seconds to wait for a response, keyed by
+            operation name. Refer to `Transport.get_timeout`.
+    :type options: `dict`
+    """
+
+    http_to_zaqar = http.HttpTransport.http_to_zaqar
+
+    # The websocket API expects the request content within
+    # the body, under these keys.
+    _content_keys = {
+        'message_post': 'messages',
+        'queue_create': 'metadata',
+        'queue_set_metadata': 'metadata',
+    }
+
+    _param_keys = {
+        'ids': 'message_ids',
+    }
+
+    def __init__(self, options):
+        super(WebsocketTransport, self).__init__(options)
+        options = options or {}
+        self.size = int(options.get('ws_connections', 1))
+        self.timeout = float(options.get('ws_timeout', 60))
+
+        self._lock = threading.Lock()
+        self._pools = {}
+        self._counter = itertools.count()
+
+    def _get_connection(self, url):
+        with self._lock:
+            pool = self._pools.get(url)
+            if pool is None:
+                pool = self._pools[url] = [None] * self.size
+
+            index = next(self._counter) % self.size
+            conn = pool[index]
+            if conn is None or not conn.alive:
+                try:
+                    conn = pool[index] = _Connection(url, self.timeout)
+                except Exception as ex:
+                    msg = 'Unable to connect to {0}: {1}'.format(url, ex)
+                    raise errors.TransportError(msg)
+            return conn
+
+    def _prepare(self, request):
+        params = dict(request.params)
+        operation = request.operation
+        if not operation:
+            # Requests with no operation come from
+            # `Client.follow`.
+            operation, query = request.api.resolve(request.ref)
+            params.update(query)
+
+        body = dict((self._param_keys.get(key, key), value)
+                    for key, value in params.items())
+
+        if request.content:
+            content = json.loads(request.content)
+            key = self._content_keys.get(operation)
+            if key is not None:
+                body[key] = content
+            else:
+                body.update(content)
+
+        req_id = uuid.uuid4().hex
+        headers = dict(request.headers)
+        headers[REQUEST_ID] = req_id
+
+        message = json.dumps({'action': operation,
+                              'headers': headers,
+                              'body': body}, default=_default)
+        return req_id, message
+
+    def send(self, request):
+        req_id, message = self._prepare(request)
+
+        # Retry once if the connection was found broken
+        # before the request went out. Requests lost after
+        # being sent are not retried since they may have
+        # been processed already.
+        for attempt in range(2):
+            conn = self._get_connection(request.endpoint)
+            try:
+                data = conn.request(req_id, message,
+                                    self.get_timeout(request))
+                break
+            except _Disconnected:
+                if attempt:
+                    raise errors.TransportError('Connection lost')
+
+        status = data.get('headers', {}).get('status', 200)
+        body = data.get('body')
+
+        if status in self.http_to_zaqar:
+            msg = ''
+            if isinstance(body, dict):
+                msg = body.get('error') or body.get('description', '')
+            raise self.http_to_zaqar[status](msg)
+
+        if status == 204 or body is None or body == '':
+            return response.Response(request, None)
+        return response.Response(request, json.dumps(body))
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+
+        for pool in pools.values():
+            for conn in pool:
+                if conn is not None:
+                    conn.close()